@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+from activity import get_activity_types
+from vocabulary import get_energy_levels, get_time_blocks
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def range_mask(log, start=None, end=None):
+    """Boolean mask of entries whose timestamp falls in [start, end] (dates, inclusive)."""
+    days = log.column(log.DATE_FIELD).astype("datetime64[D]")
+    mask = ~np.isnat(days)
+    if start is not None:
+        mask &= days >= np.datetime64(start, "D")
+    if end is not None:
+        mask &= days <= np.datetime64(end, "D")
+    return mask
+
+
+def energy_heatmap(energy_log, start=None, end=None):
+    """Mean energy per weekday x time block, as a DataFrame (NaN where nothing was logged)."""
+    mask = range_mask(energy_log, start, end)
+    scores = energy_log.energy_scores()
+    blocks = energy_log.column("Time Block")
+    mask &= ~np.isnan(scores) & (blocks >= 0) & (blocks < len(get_time_blocks()))
+    days = energy_log.column("Timestamp")[mask].astype("datetime64[D]").astype(np.int64)
+    weekdays = (days + 3) % 7  # 1970-01-01 was a Thursday; Monday = 0
+    cells = weekdays * len(get_time_blocks()) + blocks[mask]
+    size = len(WEEKDAYS) * len(get_time_blocks())
+    counts = np.bincount(cells, minlength=size)
+    sums = np.bincount(cells, weights=scores[mask], minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    return pd.DataFrame(means.reshape(len(WEEKDAYS), -1), index=WEEKDAYS, columns=get_time_blocks())
+
+
+def activity_categories(energy_log):
+    """Map every activity code of a log to its category name ("Other" for unknown activities)."""
+    category_of = {
+        activity: category for category, activities in get_activity_types().items() for activity in activities
+    }
+    return [category_of.get(activity, "Other") for activity in energy_log.categories("Activity Type")]
+
+
+def energy_distribution(energy_log, by="Activity Type", start=None, end=None):
+    """Share of each energy level per activity (or per category with by="Category").
+
+    Returns a DataFrame with one row per group: the share of entries at each
+    energy level, the entry count and the mean energy.
+    """
+    levels = get_energy_levels()
+    mask = range_mask(energy_log, start, end)
+    scores = energy_log.energy_scores()
+    activities = energy_log.column("Activity Type")
+    mask &= ~np.isnan(scores) & (activities >= 0)
+    if by == "Category":
+        names = activity_categories(energy_log)
+        groups = sorted(set(names))
+        group_of_code = np.array([groups.index(name) for name in names], dtype=np.int64)
+    else:
+        groups = energy_log.categories("Activity Type")
+        group_of_code = np.arange(len(groups))
+    group_codes = group_of_code[activities[mask]]
+    level_codes = scores[mask].astype(np.int64) - 1
+    counts = np.bincount(group_codes * len(levels) + level_codes, minlength=len(groups) * len(levels))
+    counts = counts.reshape(len(groups), len(levels))
+    totals = counts.sum(axis=1)
+    frame = pd.DataFrame(counts, index=pd.Index(groups, name=by), columns=levels)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frame = frame.div(totals, axis=0)
+        frame["Entries"] = totals
+        frame["Mean Energy"] = (counts * np.arange(1, len(levels) + 1)).sum(axis=1) / totals
+    return frame[frame["Entries"] > 0].sort_values("Mean Energy", ascending=False)
+
+
+def daily_mean_energy(energy_log, start=None, end=None):
+    """Mean energy per calendar day, indexed by datetime64[D]."""
+    mask = range_mask(energy_log, start, end)
+    scores = energy_log.energy_scores()
+    mask &= ~np.isnan(scores)
+    days = energy_log.column("Timestamp")[mask].astype("datetime64[D]")
+    unique, inverse = np.unique(days, return_inverse=True)
+    means = np.bincount(inverse, weights=scores[mask]) / np.bincount(inverse)
+    return pd.Series(means, index=pd.DatetimeIndex(unique), name="Mean Energy")
+
+
+def nightly_sleep(sleep_log, start=None, end=None):
+    """Hours slept per night, keyed by the day the sleep was logged (the morning after)."""
+    mask = range_mask(sleep_log, start, end)
+    hours = sleep_log.column("Duration (hrs)")
+    mask &= ~np.isnan(hours)
+    days = sleep_log.column("Timestamp")[mask].astype("datetime64[D]")
+    unique, inverse = np.unique(days, return_inverse=True)
+    # Several logs on one day (e.g. a nap) add up
+    return pd.Series(np.bincount(inverse, weights=hours[mask]), index=pd.DatetimeIndex(unique), name="Sleep (hrs)")
+
+
+def sleep_energy_correlation(energy_log, sleep_log, start=None, end=None):
+    """Pair each day's mean energy with the previous night's sleep.
+
+    Returns (frame, r): one row per day with both values, and the Pearson
+    correlation between them (NaN with fewer than three days).
+    """
+    frame = pd.concat(
+        [nightly_sleep(sleep_log, start, end), daily_mean_energy(energy_log, start, end)], axis=1, join="inner"
+    )
+    frame.index.name = "Date"
+    if len(frame) < 3:
+        return frame, float("nan")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return frame, float(np.corrcoef(frame["Sleep (hrs)"], frame["Mean Energy"])[0, 1])
@@ -0,0 +1,373 @@
+"""Read-only JSON API over the energy, sleep and task logs, for external dashboards.
+
+Serves the same local replica and columnar logs as the Streamlit app, kept
+in memory per user, so dashboards can query at high rates without pulling
+whole files through the GitHub contents API.
+
+Usage:
+    python api.py [--host 127.0.0.1] [--port 8600]
+
+Endpoints (GET only; responses are JSON, gzipped when the client accepts it):
+    /users                              registered user IDs
+    /users/<id>/<energy|sleep|tasks>    entries, newest first
+        start, end      dates (YYYY-MM-DD, inclusive)
+        activity        energy only; comma-separated activity types
+        time_block      energy only; comma-separated time blocks
+        task_type       tasks only; comma-separated task types
+        offset, limit   window of the matching entries (limit at most MAX_LIMIT)
+    /users/<id>/<energy|sleep>/summary  per-group aggregates over the same filters
+        by              day, week, activity or time_block (energy)
+"""
+import argparse
+import asyncio
+import datetime
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+import metrics
+from analytics import range_mask
+from cache import LRUCache
+from config import load_config
+from github_api import GitHubContents, LocalContents
+from model import load_log
+from reconcile import Reconciler
+from storage import ENERGY, SLEEP, TASKS, SQLiteStorage
+from users import list_users, user_db_path, valid_user_id
+
+DEFAULT_PORT = 8600
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 5000
+CACHE_SIZE = 512      # Encoded responses kept across all users
+GZIP_MIN_BYTES = 512  # Smaller bodies are sent as they are
+
+KINDS = [ENERGY, SLEEP, TASKS]
+# Query parameter -> display key it filters on, per dataset
+FILTERS = {
+    ENERGY: {"activity": "Activity Type", "time_block": "Time Block"},
+    SLEEP: {},
+    TASKS: {"task_type": "Task Type"},
+}
+GROUPS = {ENERGY: ["day", "week", "activity", "time_block"], SLEEP: ["day", "week"]}
+
+logger = logging.getLogger(__name__)
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class UserIndex:
+    """One user's logs held in memory and refreshed when the local store changes.
+
+    Entries the reconciler pulls go into a copy that replaces the log, so
+    requests still reading the old one on other threads never see it
+    change; writes from other processes (the Streamlit app) change the
+    store's data version and trigger a reload of the affected user's logs.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._lock = threading.Lock()
+        self._logs = {}  # kind -> log
+        self._versions = {}  # kind -> remote version the log includes
+        self._data_version = storage.data_version()
+
+    def stamp(self):
+        """Identify the current contents of the store, for keying cached responses."""
+        return (self.storage.data_version(),) + tuple(self.storage.remote_version(kind) for kind in KINDS)
+
+    def log(self, kind):
+        with self._lock:
+            data_version = self.storage.data_version()
+            if data_version != self._data_version:
+                self._logs.clear()
+                self._data_version = data_version
+            version = self.storage.remote_version(kind)
+            if kind in self._logs and self._versions[kind] != version:
+                pulled = self.storage.imported_since(kind, self._versions[kind])
+                if pulled is None:
+                    del self._logs[kind]
+                else:
+                    self._logs[kind] = self._logs[kind].with_new(pulled)[0]
+            if kind not in self._logs:
+                self._logs[kind] = load_log(self.storage, kind)
+            self._versions[kind] = version
+            return self._logs[kind]
+
+
+class Api:
+    """Routes requests to per-user indexes and caches the encoded responses."""
+
+    def __init__(self, config=None):
+        self.config = config or load_config()
+        self._indexes = {}
+        self._reconcilers = {}
+        self._lock = threading.Lock()
+        self._cache = LRUCache(CACHE_SIZE)
+
+    def index(self, user_id):
+        """Return a user's index, opening their store (and keeping it pulled from GitHub) on first use."""
+        with self._lock:
+            if user_id not in self._indexes:
+                storage = SQLiteStorage(user_db_path(user_id))
+                if self.config.sync_enabled:
+                    # Pull only: the app owns the sync queue and pushes local entries
+                    contents = GitHubContents(self.config.github_pat, self.config.github_repo)
+                    self._reconcilers[user_id] = Reconciler(storage, contents, user_id).start()
+                else:
+                    # Same as the app without a token: import the bundled JSON files once
+                    Reconciler(storage, LocalContents("."), user_id).reconcile()
+                self._indexes[user_id] = UserIndex(storage)
+            return self._indexes[user_id]
+
+    def respond(self, target, accept_gzip=False, if_none_match=None):
+        """Return (status, headers, body) for a GET of `target`."""
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        endpoint = "/".join(parts[:1] + ["<id>"] + parts[2:]) if len(parts) > 1 else url.path
+        with metrics.span("api_request", endpoint=endpoint):
+            try:
+                if parts == ["users"]:
+                    stamp, compute = None, lambda: list_users()
+                else:
+                    stamp, compute = self._route(parts, query)
+            except ApiError as e:
+                metrics.count("api_errors_total", status=e.status)
+                return _error(e.status, e.message)
+            key = (url.path, tuple(sorted(query.items())), stamp)
+            cached = self._cache.get(key)
+            if cached is None:
+                metrics.count("api_cache_total", result="miss")
+                try:
+                    body = _encode(compute())
+                except ApiError as e:
+                    metrics.count("api_errors_total", status=e.status)
+                    return _error(e.status, e.message)
+                etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+                compressed = gzip.compress(body, mtime=0) if len(body) >= GZIP_MIN_BYTES else None
+                cached = (etag, body, compressed)
+                if stamp is not None:
+                    self._cache.put(key, cached)
+            else:
+                metrics.count("api_cache_total", result="hit")
+        etag, body, compressed = cached
+        headers = {"Content-Type": "application/json", "ETag": etag, "Vary": "Accept-Encoding"}
+        if if_none_match == etag:
+            return 304, headers, b""
+        if accept_gzip and compressed is not None:
+            headers["Content-Encoding"] = "gzip"
+            body = compressed
+        return 200, headers, body
+
+    def _route(self, parts, query):
+        """Return (cache stamp, function computing the response) for /users/<id>/<kind>[/summary]."""
+        if len(parts) not in (3, 4) or parts[0] != "users" or parts[2] not in KINDS:
+            raise ApiError(404, "Not found")
+        user_id, kind = parts[1], parts[2]
+        if not valid_user_id(user_id) or user_id not in list_users():
+            raise ApiError(404, f"Unknown user {user_id!r}")
+        if len(parts) == 4 and (parts[3] != "summary" or kind not in GROUPS):
+            raise ApiError(404, "Not found")
+        index = self.index(user_id)
+        if len(parts) == 4:
+            return index.stamp(), lambda: summary(index.log(kind), kind, query)
+        return index.stamp(), lambda: entries(index.log(kind), kind, query)
+
+
+# Queries
+def _date(query, name):
+    value = query.get(name)
+    if value is None:
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ApiError(400, f"{name} must be a date (YYYY-MM-DD), got {value!r}")
+
+
+def _int(query, name, default, maximum=None):
+    try:
+        value = int(query.get(name, default))
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+    if value < 0:
+        raise ApiError(400, f"{name} must not be negative")
+    return min(value, maximum) if maximum is not None else value
+
+
+def select(log, kind, query):
+    """Return the rows matching the query's filters, newest first."""
+    unknown = set(query) - set(FILTERS[kind]) - {"start", "end", "offset", "limit", "by"}
+    if unknown:
+        raise ApiError(400, f"Unknown parameter {sorted(unknown)[0]!r}")
+    if log.DATE_FIELD:
+        mask = range_mask(log, _date(query, "start"), _date(query, "end"))
+    else:
+        mask = np.ones(len(log), dtype=bool)
+    for name, key in FILTERS[kind].items():
+        if name in query:
+            wanted = set(query[name].split(","))
+            codes = [code for code, label in enumerate(log.categories(key)) if label in wanted]
+            mask &= np.isin(log.column(key), codes)
+    rows = np.flatnonzero(mask)
+    if log.DATE_FIELD:
+        rows = rows[np.argsort(log.column(log.DATE_FIELD)[rows], kind="stable")]
+    return rows[::-1]
+
+
+def entries(log, kind, query):
+    rows = select(log, kind, query)
+    offset = _int(query, "offset", 0)
+    limit = _int(query, "limit", DEFAULT_LIMIT, MAX_LIMIT)
+    return {
+        "total": len(rows),
+        "offset": offset,
+        "entries": [log[row] for row in rows[offset:offset + limit]],
+    }
+
+
+def summary(log, kind, query):
+    """Entry count and mean energy (energy) or hours slept (sleep) per group, in group order."""
+    by = query.get("by", "day")
+    if by not in GROUPS[kind]:
+        raise ApiError(400, f"by must be one of {', '.join(GROUPS[kind])}")
+    rows = select(log, kind, query)
+    if kind == ENERGY:
+        values = log.energy_scores(rows)
+    else:
+        values = log.column("Duration (hrs)")[rows]
+    if by in ("day", "week"):
+        days = log.column(log.DATE_FIELD)[rows].astype("datetime64[D]")
+        unique, codes = np.unique(days, return_inverse=True)
+        labels = [str(day) for day in unique]
+        if by == "week":
+            weeks = [_iso_week(label) for label in labels]
+            labels = sorted(set(weeks))
+            codes = np.array([labels.index(week) for week in weeks], dtype=np.int64)[codes]
+    else:
+        key = "Activity Type" if by == "activity" else "Time Block"
+        labels = log.categories(key)
+        codes = log.column(key)[rows]
+        known = codes >= 0
+        codes, values = codes[known], values[known]
+    valid = ~np.isnan(values)
+    counts = np.bincount(codes, minlength=len(labels))
+    measured = np.bincount(codes[valid], minlength=len(labels))
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=len(labels))
+    groups = []
+    for label, count, n, total in zip(labels, counts, measured, sums):
+        if not count:
+            continue
+        group = {by: label, "entries": int(count)}
+        if kind == ENERGY:
+            group["mean_energy"] = round(total / n, 4) if n else None
+        else:
+            group["sleep_hours"] = round(float(total), 2)
+        groups.append(group)
+    return {"by": by, "total": len(rows), "groups": groups}
+
+
+def _iso_week(day):
+    year, week, _ = datetime.date.fromisoformat(day).isocalendar()
+    return f"{year}-W{week:02d}"  # Same buckets as the rollup table
+
+
+def _encode(data):
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def _error(status, message):
+    return status, {"Content-Type": "application/json"}, _encode({"error": message})
+
+
+# HTTP
+REASONS = {
+    200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+async def handle_connection(api, reader, writer):
+    """Serve HTTP/1.1 requests on one connection until the client closes it."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            try:
+                method, target, version = request_line.decode("latin-1").split()
+            except ValueError:
+                method, target, version = "GET", None, "HTTP/1.0"  # Answered with a 400, then closed
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+            if target is None:
+                status, response_headers, body = _error(400, "Malformed request line")
+            elif method not in ("GET", "HEAD") or "content-length" in headers:
+                status, response_headers, body = 405, {"Allow": "GET, HEAD"}, b""
+                keep_alive = False
+            else:
+                try:
+                    # Index builds and SQLite reads block, so they run off the event loop
+                    status, response_headers, body = await asyncio.to_thread(
+                        api.respond, target, "gzip" in headers.get("accept-encoding", ""), headers.get("if-none-match")
+                    )
+                except Exception:
+                    logger.exception("Failed to serve %s", target)
+                    metrics.count("api_errors_total", status=500)
+                    status, response_headers, body = _error(500, "Internal server error")
+            head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", f"Content-Length: {len(body)}"]
+            head += [f"{name}: {value}" for name, value in response_headers.items()]
+            if not keep_alive:
+                head.append("Connection: close")
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+            if method != "HEAD":
+                writer.write(body)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass  # Client went away
+    finally:
+        writer.close()
+
+
+async def serve(api, host, port):
+    server = await asyncio.start_server(lambda r, w: handle_connection(api, r, w), host, port)
+    logger.info("Serving the log API on http://%s:%d", host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the energy, sleep and task logs as a read-only JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    config = load_config()
+    metrics.configure(config.metrics_enabled, port=config.metrics_port, log_path=config.metrics_log)
+    try:
+        asyncio.run(serve(Api(config), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
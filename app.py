@@ -1,108 +1,187 @@
 import streamlit as st
-import json
-import os
-import requests
-import base64
-from log import log_energy_page   # Import the Log Energy page
-from sleep import sleep_page      # Import the Sleep Log page
-from view import view_logs_page   # Import the View Logs page
-from task import task_page        # Import the Task Management page
-
-# GitHub Configuration
-GITHUB_REPO = "hawkarabdulhaq/energy"  # Your GitHub repository
-ENERGY_FILE_PATH = "database/energy_logs.json"  # Updated energy logs file path
-TASK_FILE_PATH = "database/task.json"          # Task logs file in repo
-SLEEP_FILE_PATH = "database/sleep.json"        # Sleep logs file in repo
-GITHUB_PAT = st.secrets["github_pat"]          # Access GitHub PAT from secrets
-
-HEADERS = {
-    "Authorization": f"token {GITHUB_PAT}",
-    "Accept": "application/vnd.github.v3+json",
+import importlib
+import time
+import uuid
+import metrics
+from config import load_config
+from github_api import GitHubContents, LocalContents
+from storage import ENERGY, SLEEP, TASKS, SQLiteStorage
+from reconcile import Reconciler
+from scheduler import Scheduler
+from shared import DatasetRegistry
+from sync import GitHubSync
+from users import DEFAULT_USER, list_users, user_db_path, valid_user_id
+
+# Page name -> (module, page function); modules are imported on first visit, so a cold
+# start only pays for the page being shown (the View page pulls in pandas and Plotly)
+PAGES = {
+    "Log Energy": ("log", "log_energy_page"),
+    "Log Sleep": ("sleep", "sleep_page"),
+    "Log Tasks": ("task", "task_page"),
+    "View Your Energy": ("view", "view_logs_page"),
+    "Import / Export": ("transfer", "import_export_page"),
 }
 
+
+def page(name):
+    """Return the page function for `name`, importing its module if needed."""
+    module, function = PAGES[name]
+    return getattr(importlib.import_module(module), function)
+
+
 # Helper Functions
-def load_data_from_github(file_path):
-    """Load data from a specified JSON file in the GitHub repository."""
-    url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{file_path}"
-    response = requests.get(url, headers=HEADERS)
-    if response.status_code == 200:
-        content = response.json().get("content", "")
-        if content:
-            return json.loads(base64.b64decode(content).decode("utf-8"))
-        else:
-            # File is empty but exists
-            return []
-    elif response.status_code == 404:
-        st.warning(f"No data found for {file_path} in the GitHub repository. Initializing empty dataset.")
-        return []
-    else:
-        st.error(f"Error loading data from {file_path} on GitHub: {response.status_code}")
-        return []
-
-def save_data_to_github(file_path, data):
-    """Save data to a specified JSON file in the GitHub repository."""
-    url = f"https://api.github.com/repos/{GITHUB_REPO}/contents/{file_path}"
-    response = requests.get(url, headers=HEADERS)
-    sha = response.json().get("sha", None) if response.status_code == 200 else None
-
-    commit_message = f"Update {os.path.basename(file_path)} - {len(data)} entries"
-    payload = {
-        "message": commit_message,
-        "content": base64.b64encode(json.dumps(data).encode("utf-8")).decode("utf-8"),
-    }
-    if sha:
-        payload["sha"] = sha
-
-    put_response = requests.put(url, headers=HEADERS, json=payload)
-    if put_response.status_code in [200, 201]:
-        st.success(f"Data successfully saved to {file_path} on GitHub!")
-    else:
-        st.error(f"Error saving data to GitHub ({file_path}): {put_response.status_code}")
+@st.cache_resource
+def get_config():
+    """Read secrets once per process; every page and session shares the result."""
+    return load_config(st.secrets)
+
+
+@st.cache_resource
+def get_metrics():
+    """Turn on timing and metrics export once per process if the config asks for it."""
+    config = get_config()
+    return metrics.configure(config.metrics_enabled, port=config.metrics_port, log_path=config.metrics_log)
+
+
+def github_contents(config):
+    return GitHubContents(config.github_pat, config.github_repo)
+
+
+@st.cache_resource
+def get_sync():
+    """Start the process-wide GitHub write-behind queue, or return None without a token."""
+    config = get_config()
+    if not config.sync_enabled:
+        return None
+    return GitHubSync(github_contents(config), batch_window=config.sync_batch_window).start()
+
+
+@st.cache_resource
+def get_storage(user_id):
+    """Open a user's local replica; pages read and write it without waiting on the network."""
+    storage = SQLiteStorage(user_db_path(user_id))
+    sync = get_sync()
+    if sync:
+        storage.add_listener(sync.listener(user_id))
+    return storage
+
+
+@st.cache_resource
+def get_datasets():
+    """Logs shared by every session in the process; sessions only hold views of them."""
+    return DatasetRegistry()
+
 
-# Load logs into session state on app start
-if "data" not in st.session_state:
-    # Energy logs
-    st.session_state["data"] = load_data_from_github(ENERGY_FILE_PATH)
+@st.cache_resource
+def get_scheduler():
+    """Start the background jobs once per process, or return None if the config turns them off."""
+    if not get_config().scheduler_enabled:
+        return None
 
-if "tasks" not in st.session_state:
-    # Task data
-    st.session_state["tasks"] = load_data_from_github(TASK_FILE_PATH)
+    def warm(user_id):
+        # Only logs some session holds: the caches are keyed on them, and users nobody is viewing stay unloaded
+        logs = [get_datasets().loaded(user_id, kind) for kind in (ENERGY, TASKS, SLEEP)]
+        if all(log is not None for log in logs):
+            importlib.import_module(PAGES["View Your Energy"][0]).warm_caches(*logs)
+
+    return Scheduler(get_storage, warm=warm).start()
+
+
+@st.cache_resource
+def get_reconciler(user_id):
+    """Keep a user's local replica converged with GitHub in the background."""
+    config = get_config()
+    if config.sync_enabled:
+        return Reconciler(get_storage(user_id), github_contents(config), user_id, get_sync()).start()
+    # Without a token, import the JSON files shipped in the repo once; they are local, so this is quick
+    reconciler = Reconciler(get_storage(user_id), LocalContents("."), user_id)
+    try:
+        reconciler.reconcile()
+    except Exception as e:
+        st.error(f"Error loading the bundled data files: {e}")
+    return reconciler
+
+
+get_metrics()
+get_scheduler()
+
+# User Selection: ?user=<id> in the URL, or pick from the registered users
+users = list_users()
+requested_user = st.query_params.get("user", st.session_state.get("user_id", DEFAULT_USER))
+if not valid_user_id(requested_user):
+    st.sidebar.error(f"Invalid user ID {requested_user!r}; showing user {DEFAULT_USER}.")
+    requested_user = DEFAULT_USER
+if requested_user not in users:
+    users.append(requested_user)
+user_id = st.sidebar.selectbox("User", users, index=users.index(requested_user))
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex
+if st.session_state.get("user_id") != user_id:
+    # Switching users releases this session's views of the previous user's logs
+    get_datasets().release(st.session_state["session_id"])
+    st.session_state["user_id"] = user_id
+
+storage = get_storage(user_id)
+reconciler = get_reconciler(user_id)
+
+
+def session_log(kind):
+    """This session's view of a dataset shared by all sessions, loaded the first time any page needs it."""
+    return get_datasets().view(st.session_state["session_id"], user_id, storage, kind)
 
-if "sleep_data" not in st.session_state:
-    # Sleep data
-    st.session_state["sleep_data"] = load_data_from_github(SLEEP_FILE_PATH)
 
 if "page" not in st.session_state:
     st.session_state["page"] = "Log Energy"  # Default page
 
 # Sidebar Navigation with Buttons
 st.sidebar.title("Navigation")
-if st.sidebar.button("Log Energy"):
-    st.session_state["page"] = "Log Energy"
-if st.sidebar.button("Log Sleep"):
-    st.session_state["page"] = "Log Sleep"
-if st.sidebar.button("Log Tasks"):
-    st.session_state["page"] = "Log Tasks"
-if st.sidebar.button("View Your Energy"):
-    st.session_state["page"] = "View Your Energy"
+for name in PAGES:
+    if st.sidebar.button(name):
+        st.session_state["page"] = name
+
+# Sync Status
+sync = get_sync()
+if sync is None:
+    st.sidebar.caption("💾 Saved locally (GitHub sync not configured)")
+else:
+    status = sync.status()
+    if status["last_error"]:
+        st.sidebar.caption(f"⚠️ {status['pending']} entries waiting to sync, retrying: {status['last_error']}")
+    elif status["pending"]:
+        st.sidebar.caption(f"🔄 Syncing {status['pending']} entries to GitHub...")
+    else:
+        st.sidebar.caption("✅ All entries synced to GitHub")
+    pulled = reconciler.status()
+    if pulled["last_error"]:
+        st.sidebar.caption(f"📴 Showing the local copy; GitHub unreachable, retrying: {pulled['last_error']}")
+    elif pulled["last_success"] is None:
+        st.sidebar.caption("🔄 Fetching your history from GitHub...")
+    else:
+        st.sidebar.caption(f"⬇️ Checked GitHub for changes at {time.strftime('%H:%M', time.localtime(pulled['last_success']))}")
 
 # Page Routing
-if st.session_state["page"] == "Log Energy":
-    # Save energy logs back to GitHub
-    log_energy_page(st.session_state["data"], lambda logs: save_data_to_github(ENERGY_FILE_PATH, logs))
-
-elif st.session_state["page"] == "Log Sleep":
-    # Sleep logs handled in sleep.py (If needed, integrate GitHub saving there)
-    sleep_page()
-
-elif st.session_state["page"] == "Log Tasks":
-    # Tasks handled in task.py (If needed, integrate GitHub saving there)
-    task_page()
-
-elif st.session_state["page"] == "View Your Energy":
-    # Now passing energy logs, tasks, and sleep data
-    view_logs_page(
-        st.session_state["data"],  # Energy logs
-        st.session_state["tasks"],  # Task logs
-        st.session_state["sleep_data"],  # Sleep logs
-    )
+with metrics.span("page_render", page=st.session_state["page"]):
+    if st.session_state["page"] == "Log Energy":
+        # Save energy logs to local storage (synced to GitHub in the background)
+        page("Log Energy")(session_log(ENERGY), lambda entry: storage.append(ENERGY, entry))
+
+    elif st.session_state["page"] == "Log Sleep":
+        # Sleep logs handled in sleep.py
+        page("Log Sleep")(session_log(SLEEP), storage)
+
+    elif st.session_state["page"] == "Log Tasks":
+        # Tasks handled in task.py
+        page("Log Tasks")(session_log(TASKS), storage)
+
+    elif st.session_state["page"] == "View Your Energy":
+        # Now passing energy logs, tasks, and sleep data
+        page("View Your Energy")(
+            session_log(ENERGY),  # Energy logs
+            session_log(TASKS),  # Task logs
+            session_log(SLEEP),  # Sleep logs
+            storage,  # Precomputed rollups for trend charts
+        )
+
+    elif st.session_state["page"] == "Import / Export":
+        # Bulk CSV/JSON Lines import and streaming export
+        page("Import / Export")(storage)
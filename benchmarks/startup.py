@@ -0,0 +1,127 @@
+"""Cold-start benchmark: import time per module and time to first render.
+
+Every measurement runs in a fresh interpreter against a scratch copy of the
+tree (seeded from the JSON files, no GitHub token), so runs are comparable
+across commits.
+
+Usage:
+    python benchmarks/startup.py [--repeat 5] [--output startup.json]
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Time to import one module on top of Streamlit, which the app always loads first
+IMPORT_SCRIPT = """
+import json, sys, time
+import streamlit
+start = time.perf_counter()
+__import__(sys.argv[1])
+print(json.dumps(time.perf_counter() - start))
+"""
+
+# Time to render the default page from a cold process, then each page on its first visit
+RENDER_SCRIPT = """
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=120)
+result = {"streamlit_import": time.perf_counter() - start}
+start = time.perf_counter()
+at.run()
+result["first_render"] = time.perf_counter() - start
+result["pages"] = {}
+for label in [button.label for button in at.sidebar.button]:
+    start = time.perf_counter()
+    next(button for button in at.sidebar.button if button.label == label).click().run()
+    result["pages"][label] = time.perf_counter() - start
+result["errors"] = [str(e.value) for e in at.exception]
+print(json.dumps(result))
+"""
+
+
+def app_modules():
+    """Top-level modules of the app, except the Streamlit script itself."""
+    names = (os.path.splitext(os.path.basename(path))[0] for path in glob.glob(os.path.join(ROOT, "*.py")))
+    return sorted(name for name in names if name != "app")
+
+
+def scratch_tree():
+    """Copy the app into a temporary directory without local databases or secrets."""
+    root = tempfile.mkdtemp(prefix="energy-startup-")
+    for path in glob.glob(os.path.join(ROOT, "*.py")):
+        shutil.copy(path, root)
+    shutil.copytree(
+        os.path.join(ROOT, "database"),
+        os.path.join(root, "database"),
+        ignore=shutil.ignore_patterns("*.db", "sync_queue.jsonl*"),
+    )
+    return root
+
+
+def run_json(script, cwd, *args):
+    output = subprocess.run(
+        [sys.executable, "-c", script, *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def median(samples):
+    return round(statistics.median(samples), 4)
+
+
+def benchmark(repeat):
+    imports = {name: median([run_json(IMPORT_SCRIPT, ROOT, name) for _ in range(repeat)]) for name in app_modules()}
+    renders = []
+    for _ in range(repeat):
+        root = scratch_tree()  # Fresh copy each time so every run seeds an empty store
+        try:
+            renders.append(run_json(RENDER_SCRIPT, root))
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return {
+        "commit": commit(),
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "imports": imports,
+        "streamlit_import": median([r["streamlit_import"] for r in renders]),
+        "first_render": median([r["first_render"] for r in renders]),
+        "pages": {label: median([r["pages"][label] for r in renders]) for label in renders[0]["pages"]},
+        "errors": sorted({error for r in renders for error in r["errors"]}),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import time per module and time to first render.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the median is reported")
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = json.dumps(benchmark(args.repeat), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(results + "\n")
+    else:
+        print(results)
+
+
+if __name__ == "__main__":
+    main()
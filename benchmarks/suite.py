@@ -0,0 +1,182 @@
+"""Load, save and View page benchmarks against synthetic histories of growing size.
+
+Storage runs on a scratch SQLite file and the GitHub contents API on
+LocalContents, so runs need no network and are comparable across commits.
+Each metric is the median wall time in seconds over `--repeat` runs.
+
+Usage:
+    python benchmarks/suite.py [--sizes 10000 100000 1000000] [--repeat 3] [--output results.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analytics import energy_distribution, energy_heatmap, sleep_energy_correlation  # noqa: E402
+from github_api import LocalContents  # noqa: E402
+from journal import CHUNK_ENTRIES, ChunkedSnapshot, Journal, encode_chunk, encode_segment  # noqa: E402
+from model import load_log  # noqa: E402
+from storage import ENERGY, SLEEP, TASKS, SQLiteStorage  # noqa: E402
+from startup import commit  # noqa: E402
+from synthetic import ENERGY_PER_DAY, energy_entries, sleep_entries, task_entries  # noqa: E402
+from view import build_analytics, build_day_view  # noqa: E402
+
+SIZES = [10_000, 100_000]
+SNAPSHOT_PATH = "database/energy_logs.json"
+TAIL_SEGMENTS = 20   # Segments written since the last compaction
+SEGMENT_ENTRIES = 5  # Entries per segment; each background sync usually carries a few saves
+APPENDS = 100        # Single-entry saves averaged per run
+RANGE_DAYS = 30      # Days read by the ranged chunk load
+
+
+def timed(run, repeat, setup=None):
+    """Median seconds of `run(state)` over `repeat` runs, with untimed `setup()` before each."""
+    samples = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        run(state)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def bench_journal(workdir, energy, repeat):
+    """Chunked snapshot + segment journal on the local contents stand-in."""
+    contents = LocalContents(workdir)
+    head = energy[:-TAIL_SEGMENTS * SEGMENT_ENTRIES]
+    tail = [energy[-TAIL_SEGMENTS * SEGMENT_ENTRIES:][i::TAIL_SEGMENTS] for i in range(TAIL_SEGMENTS)]
+    # The last RANGE_DAYS of history; nothing in the app reads ranges remotely yet (it reads its local store),
+    # this measures what a ranged ChunkedSnapshot.load costs against a full one
+    last = datetime.datetime.fromisoformat(str(energy[-1]["Timestamp"]))
+    start = (last - datetime.timedelta(days=RANGE_DAYS)).date().isoformat()
+
+    def reset():
+        shutil.rmtree(os.path.join(workdir, "database"), ignore_errors=True)
+        journal = Journal(contents, SNAPSHOT_PATH, compact_every=10**9)  # Compaction is timed separately
+        journal.chunks.fold(head)
+        for segment in tail:
+            journal.append(segment)
+        return journal
+
+    results = {
+        "chunk_encode": timed(
+            lambda _: [encode_chunk(head[i:i + CHUNK_ENTRIES]) for i in range(0, len(head), CHUNK_ENTRIES)], repeat
+        ),
+        "segment_encode": timed(lambda _: [encode_segment(segment) for segment in tail], repeat),
+    }
+    reset()
+    results["journal_load"] = timed(lambda _: Journal(contents, SNAPSHOT_PATH).load(), repeat)
+    results["chunks_load_range"] = timed(lambda _: ChunkedSnapshot(contents, SNAPSHOT_PATH).load(start), repeat)
+    results["journal_append"] = timed(
+        lambda journal: [journal.append([entry]) for entry in energy[:APPENDS]], repeat, setup=reset
+    ) / APPENDS
+    results["journal_compact"] = timed(lambda journal: journal.compact(), repeat, setup=reset)
+    return results
+
+
+def bench_storage(workdir, energy, sleep, tasks, repeat):
+    """Local SQLite store plus the columnar logs the pages read."""
+    path = os.path.join(workdir, "bench.db")
+
+    def fresh():
+        if os.path.exists(path):
+            os.remove(path)
+        return SQLiteStorage(path)
+
+    def bulk_write(storage):
+        storage.append_many(ENERGY, energy)
+        storage.close()
+
+    results = {"storage_bulk_write": timed(bulk_write, repeat, setup=fresh)}
+    storage = fresh()
+    storage.append_many(ENERGY, energy[:-APPENDS])
+    storage.append_many(SLEEP, sleep)
+    storage.append_many(TASKS, tasks)
+
+    def appends(_):
+        for entry in energy[-APPENDS:]:
+            storage.append(ENERGY, entry)
+
+    # Runs after the first only hit the ID index and are skipped, so time a single pass
+    results["storage_append"] = timed(appends, 1) / APPENDS
+    results["log_load"] = timed(lambda _: load_log(storage, ENERGY), repeat)
+    results["page_read"] = timed(lambda _: storage.load_page(ENERGY, offset=len(energy) // 2, limit=25), repeat)
+    logs = load_log(storage, ENERGY), load_log(storage, SLEEP)
+    storage.close()
+    return results, logs
+
+
+def bench_view(energy_log, sleep_log, repeat):
+    """Data prep and figure builds behind the View page (the *_build metrics include their prep)."""
+    last_day = energy_log.dates()[-1]
+    first, last = energy_log.dates()[0], last_day
+    # Plotly loads its validators on first use; keep that one-off cost out of the first size
+    build_day_view(energy_log, sleep_log, last_day)
+
+    def analytics_prep(_):
+        energy_heatmap(energy_log, first, last)
+        energy_distribution(energy_log, "Activity Type", first, last)
+        sleep_energy_correlation(energy_log, sleep_log, first, last)
+
+    return {
+        "view_date_index": timed(lambda _: (energy_log._index(), energy_log.dates()), repeat,
+                                 setup=lambda: setattr(energy_log, "_date_index", None)),
+        "view_day_prep": timed(lambda _: energy_log.day_frame(last_day).sort_values(by="Start Hour"), repeat),
+        "view_day_build": timed(lambda _: build_day_view(energy_log, sleep_log, last_day), repeat),
+        "view_analytics_prep": timed(analytics_prep, repeat),
+        "view_analytics_build": timed(
+            lambda _: build_analytics(energy_log, sleep_log, first, last, "Activity Type"), repeat
+        ),
+    }
+
+
+def benchmark(sizes, repeat):
+    results = {}
+    for size in sizes:
+        energy = energy_entries(size)
+        sleep = sleep_entries(max(1, size // ENERGY_PER_DAY))
+        tasks = task_entries(max(1, size // 10))
+        workdir = tempfile.mkdtemp(prefix="energy-bench-")
+        try:
+            row = bench_journal(workdir, energy, repeat)
+            storage_results, (energy_log, sleep_log) = bench_storage(workdir, energy, sleep, tasks, repeat)
+            row.update(storage_results)
+            row.update(bench_view(energy_log, sleep_log, repeat))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        results[str(size)] = {name: round(seconds, 6) for name, seconds in row.items()}
+        print(f"{size} entries done", file=sys.stderr)
+    return {
+        "commit": commit(),
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark load, save and View page prep on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Energy entries per run")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the median is reported")
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = json.dumps(benchmark(args.sizes, args.repeat), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(results + "\n")
+    else:
+        print(results)
+
+
+if __name__ == "__main__":
+    main()
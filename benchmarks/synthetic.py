@@ -0,0 +1,74 @@
+"""Deterministic synthetic energy, sleep and task histories built from the app's own vocabularies."""
+import datetime
+import random
+
+from model import get_activity_list
+from vocabulary import (
+    get_energy_levels,
+    get_sleep_start_times,
+    get_task_lengths,
+    get_task_types,
+    get_time_block_hours,
+    get_wake_up_times,
+)
+
+START = datetime.datetime(2020, 1, 1)
+ENERGY_PER_DAY = 6  # Entries logged on a typical day
+
+
+def _entry_id(rng):
+    return f"{rng.getrandbits(128):032x}"
+
+
+def energy_entries(count, seed=0):
+    """`count` energy entries, ENERGY_PER_DAY per day, oldest first."""
+    rng = random.Random(seed)
+    blocks = list(get_time_block_hours().items())
+    levels = get_energy_levels()
+    activities = get_activity_list()
+    entries = []
+    for i in range(count):
+        block, (start_hour, end_hour) = rng.choice(blocks)
+        day = START + datetime.timedelta(days=i // ENERGY_PER_DAY)
+        timestamp = day + datetime.timedelta(
+            hours=rng.randrange(start_hour, end_hour), minutes=rng.randrange(60), microseconds=rng.randrange(10**6)
+        )
+        entries.append({
+            "Time Block": block,
+            # Skewed towards the middle of the scale, like real logs
+            "Energy Level": levels[min(4, max(0, round(rng.gauss(2, 1))))],
+            "Activity Type": rng.choice(activities),
+            "Timestamp": str(timestamp),
+            "ID": _entry_id(rng),
+        })
+    return entries
+
+
+def sleep_entries(count, seed=0):
+    """`count` sleep entries, one per night, logged the morning after."""
+    rng = random.Random(seed + 1)
+    starts = get_sleep_start_times()
+    wakes = get_wake_up_times()
+    entries = []
+    for i in range(count):
+        start, wake = rng.choice(starts), rng.choice(wakes)
+        minutes = (int(wake[:2]) * 60 + int(wake[3:]) - int(start[:2]) * 60 - int(start[3:])) % (24 * 60)
+        logged = START + datetime.timedelta(days=i, hours=int(wake[:2]), minutes=int(wake[3:]) + rng.randrange(30))
+        entries.append({
+            "Sleep Start": start,
+            "Wake Up": wake,
+            "Duration (hrs)": round(minutes / 60, 2),
+            "Timestamp": str(logged),
+            "ID": _entry_id(rng),
+        })
+    return entries
+
+
+def task_entries(count, seed=0):
+    """`count` task entries."""
+    rng = random.Random(seed + 2)
+    types, lengths = get_task_types(), get_task_lengths()
+    return [
+        {"Task Type": rng.choice(types), "Task Length": rng.choice(lengths), "ID": _entry_id(rng)}
+        for _ in range(count)
+    ]
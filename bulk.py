@@ -0,0 +1,281 @@
+"""Bulk import and export of energy, sleep and task logs.
+
+Usage:
+    python bulk.py import --kind energy --user 1 export.csv
+    python bulk.py export --kind sleep --user 1 --format parquet sleep.parquet
+"""
+import argparse
+import csv
+import datetime
+import io
+import json
+import os
+import re
+import sys
+
+from activity import get_activity_types
+from storage import ENERGY, ENTRY_ID, SCHEMAS, SLEEP, TASKS, SQLiteStorage, with_ids
+from users import DEFAULT_USER, user_db_path
+from vocabulary import get_energy_levels, get_task_lengths, get_task_types, get_time_blocks
+
+try:  # Parquet export is optional
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+BATCH_SIZE = 1000   # Entries per storage transaction
+MAX_ERRORS = 20     # Validation messages kept for the report
+FORMATS = ["csv", "jsonl", "parquet"]
+
+_CLOCK = re.compile(r"([01]?\d|2[0-3]):([0-5]\d)")
+
+
+class ImportReport:
+    """Counts of what happened to the records of one import."""
+
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors = []
+
+    def error(self, record_number, message):
+        self.invalid += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"Record {record_number}: {message}")
+
+    def summary(self):
+        return (
+            f"{self.read} records read: {self.imported} imported, "
+            f"{self.duplicates} duplicates skipped, {self.invalid} invalid"
+        )
+
+
+# Parsing
+def detect_format(filename):
+    """Guess the input format from a file name."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension == ".json":
+        return "json"
+    if extension == ".csv":
+        return "csv"
+    raise ValueError(f"Unsupported file type: {extension or filename}")
+
+
+def read_records(stream, fmt):
+    """Yield one record per row from a binary stream without reading it all at once.
+
+    A plain .json array has to be parsed whole; CSV and JSON Lines stream.
+    JSON Lines records are yielded as their text and parsed by import_records,
+    so a malformed line fails only that record.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        yield from csv.DictReader(text)
+    elif fmt == "jsonl":
+        for line in text:
+            if line.strip():
+                yield line
+    elif fmt == "json":
+        yield from json.load(text)
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+# Validation
+def _normalize(name):
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+
+def _aliases(kind):
+    """Accept either the display keys ("Time Block") or the column names (time_block)."""
+    aliases = {}
+    for key, column in SCHEMAS[kind]["columns"].items():
+        aliases[_normalize(key)] = key
+        aliases[_normalize(column)] = key
+    return aliases
+
+
+def _choice(value, options, field):
+    # Compared without punctuation, so "6-8 am" matches "6–8 AM"
+    value = str(value or "").strip()
+    for option in options:
+        if value == option or _normalize(value) == _normalize(option):
+            return option
+    raise ValueError(f"unknown {field} {value!r}")
+
+
+def _timestamp(value):
+    if not value:
+        raise ValueError("missing Timestamp")
+    try:
+        parsed = datetime.datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"unparseable Timestamp {value!r}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)  # Stored timestamps are local time
+    return str(parsed)
+
+
+def _clock(value, field):
+    match = _CLOCK.fullmatch(str(value or "").strip())
+    if not match:
+        raise ValueError(f"{field} must be HH:MM, got {value!r}")
+    return f"{int(match.group(1)):02d}:{match.group(2)}"
+
+
+def validate(kind, record, seen=None):
+    """Turn a raw record into a storage entry, raising ValueError if it is not usable.
+
+    Records without an ID get the one storage gives the same entry (see
+    storage.with_ids); pass one `seen` dict for all the records of a file.
+    """
+    if not isinstance(record, dict):
+        raise ValueError(f"expected an object, got {type(record).__name__}")
+    aliases = _aliases(kind)
+    fields = {aliases[_normalize(k)]: v for k, v in record.items() if _normalize(k) in aliases and v not in ("", None)}
+    if kind == ENERGY:
+        level = fields.get("Energy Level")
+        if str(level).strip() in {"1", "2", "3", "4", "5"}:
+            level = get_energy_levels()[int(level) - 1]  # Numeric 1-5 scores
+        activities = [activity for group in get_activity_types().values() for activity in group]
+        entry = {
+            "Time Block": _choice(fields.get("Time Block"), get_time_blocks(), "Time Block"),
+            "Energy Level": _choice(level, get_energy_levels(), "Energy Level"),
+            "Activity Type": _choice(fields.get("Activity Type"), activities, "Activity Type"),
+            "Timestamp": _timestamp(fields.get("Timestamp")),
+        }
+    elif kind == SLEEP:
+        start = _clock(fields.get("Sleep Start"), "Sleep Start")
+        wake = _clock(fields.get("Wake Up"), "Wake Up")
+        if "Duration (hrs)" in fields:
+            try:
+                duration = round(float(fields["Duration (hrs)"]), 2)
+            except ValueError:
+                raise ValueError(f"Duration (hrs) must be a number, got {fields['Duration (hrs)']!r}")
+        else:
+            minutes = (int(wake[:2]) * 60 + int(wake[3:]) - int(start[:2]) * 60 - int(start[3:])) % (24 * 60)
+            duration = round(minutes / 60, 2)
+        if not 0 <= duration <= 24:
+            raise ValueError(f"Duration (hrs) out of range: {duration}")
+        entry = {
+            "Sleep Start": start,
+            "Wake Up": wake,
+            "Duration (hrs)": duration,
+            "Timestamp": _timestamp(fields.get("Timestamp")),
+        }
+    elif kind == TASKS:
+        entry = {
+            "Task Type": _choice(fields.get("Task Type"), get_task_types(), "Task Type"),
+            "Task Length": _choice(fields.get("Task Length"), get_task_lengths(), "Task Length"),
+        }
+    else:
+        raise ValueError(f"Unknown dataset: {kind}")
+    # Derived from the record as read, so re-importing a file (or a legacy JSON snapshot) is a no-op
+    entry[ENTRY_ID] = str(fields.get(ENTRY_ID) or with_ids([record], seen)[0][ENTRY_ID])
+    return entry
+
+
+# Import / Export
+def import_records(storage, kind, records, batch_size=BATCH_SIZE, progress=None):
+    """Validate records and write them to storage in batches; return an ImportReport.
+
+    Memory stays bounded by one batch; duplicates (same ID, in the file or
+    already stored) are skipped by the storage layer.
+    """
+    report = ImportReport()
+    batch = []
+    seen = {}  # Content keys of records without an ID, counted over the whole file
+
+    def flush():
+        inserted = storage.append_many(kind, batch)
+        report.imported += inserted
+        report.duplicates += len(batch) - inserted
+        batch.clear()
+        if progress:
+            progress(report)
+
+    for number, record in enumerate(records, start=1):
+        report.read += 1
+        try:
+            if isinstance(record, str):
+                record = json.loads(record)  # A JSON Lines line
+            batch.append(validate(kind, record, seen))
+        except (ValueError, TypeError, AttributeError) as e:
+            report.error(number, e)
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return report
+
+
+def export_entries(storage, kind, out, fmt, batch_size=BATCH_SIZE):
+    """Stream a dataset to a binary file object as CSV, JSON Lines or Parquet; return the entry count."""
+    keys = list(SCHEMAS[kind]["columns"])
+    count = 0
+    if fmt == "parquet":
+        if pa is None:
+            raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+        writer = None
+        for batch in storage.iter_batches(kind, batch_size):
+            table = pa.Table.from_pylist([{key: entry.get(key) for key in keys} for entry in batch])
+            if writer is None:
+                writer = pq.ParquetWriter(out, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            count += len(batch)
+        if writer is not None:
+            writer.close()
+        return count
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    if fmt == "csv":
+        writer = csv.DictWriter(text, fieldnames=keys, extrasaction="ignore")
+        writer.writeheader()
+    elif fmt != "jsonl":
+        raise ValueError(f"Unsupported format: {fmt}")
+    for batch in storage.iter_batches(kind, batch_size):
+        if fmt == "csv":
+            writer.writerows(batch)
+        else:
+            text.writelines(json.dumps(entry) + "\n" for entry in batch)
+        count += len(batch)
+    text.detach()  # Leave `out` open for the caller
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import/export of energy, sleep and task logs.")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("path", help="File to import from or export to")
+    parser.add_argument("--kind", choices=[ENERGY, SLEEP, TASKS], required=True)
+    parser.add_argument("--user", default=DEFAULT_USER)
+    parser.add_argument("--format", help="csv, jsonl, json (import) or parquet (export); defaults to the file extension")
+    args = parser.parse_args(argv)
+
+    storage = SQLiteStorage(user_db_path(args.user))
+    if args.command == "import":
+        fmt = args.format or detect_format(args.path)
+        with open(args.path, "rb") as f:
+            report = import_records(
+                storage, args.kind, read_records(f, fmt), progress=lambda r: print(r.summary(), file=sys.stderr)
+            )
+        print(report.summary())
+        for message in report.errors:
+            print(f"  {message}")
+    else:
+        fmt = args.format or os.path.splitext(args.path)[1].lstrip(".").lower()
+        if fmt not in FORMATS:
+            parser.error(f"--format must be one of {', '.join(FORMATS)}")
+        with open(args.path, "wb") as f:
+            count = export_entries(storage, args.kind, f, fmt)
+        print(f"Exported {count} {args.kind} entries to {args.path}")
+    storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""Sleep debt, sleep regularity and a per-time-block energy forecast over the full history.
+
+Everything works on arrays aligned by calendar day: one slot per day from
+the first to the last logged date, with nightly sleep filed under the day
+it was logged (the morning after). The model keeps running sums per day,
+so new entries are folded in without rereading the history, and each
+statistic is a few vectorized passes over the day arrays.
+
+The forecast fits, per time block, a baseline energy plus one shared
+slope on the sleep debt going into the day. Recent days weigh more
+(HALF_LIFE_DAYS). Tomorrow's debt assumes tonight's sleep matches the
+recent average.
+"""
+import datetime
+import threading
+
+import numpy as np
+
+from schema import ENERGY_CODE, START_MINUTE, WAKE_MINUTE
+from vocabulary import get_time_block_hours, get_time_blocks
+
+SLEEP_NEED = 8.0         # Hours per night; shortfalls add to the debt, extra sleep pays it back
+DEBT_WINDOW = 14         # Nights counted in the rolling sleep debt
+REGULARITY_WINDOW = 7    # Nights in the rolling sleep-midpoint spread
+HALF_LIFE_DAYS = 60.0    # Age at which a day weighs half as much in the forecast fit
+RECENT_NIGHTS = 7        # Nights averaged for the sleep assumed tonight
+DAY_MINUTES = 24 * 60
+
+
+class CircadianModel:
+    """Per-day energy and sleep accumulators for one energy log and one sleep log."""
+
+    def __init__(self):
+        self.blocks = get_time_blocks()
+        self._lock = threading.Lock()  # Held by update and summary; arrays are rebound as they grow
+        self._reset()
+
+    def _reset(self):
+        self.start = None  # datetime64[D] of slot 0
+        self._energy_sum = np.zeros((0, len(self.blocks)))
+        self._energy_count = np.zeros((0, len(self.blocks)))
+        self._sleep_hours = np.zeros(0)
+        self._sleep_nights = np.zeros(0)
+        self._midpoint_cos = np.zeros(0)  # Sleep midpoints as unit vectors, so 23:30 and 00:30 average to midnight
+        self._midpoint_sin = np.zeros(0)
+        self._midpoint_nights = np.zeros(0)
+        self._sources = None  # (energy log uid, sleep log uid) the rows below came from
+        self._rows = (0, 0)   # Rows of each log already folded in
+
+    def update(self, energy_log, sleep_log):
+        """Fold in the rows appended to the logs since the last call (all of them the first time)."""
+        with self._lock:
+            self._update(energy_log, sleep_log)
+        return self
+
+    def _update(self, energy_log, sleep_log):
+        if self._sources != (energy_log.uid, sleep_log.uid):
+            self._reset()
+            self._sources = (energy_log.uid, sleep_log.uid)
+        energy_seen, sleep_seen = self._rows
+        self._add_energy(energy_log, energy_seen)
+        self._add_sleep(sleep_log, sleep_seen)
+        self._rows = (len(energy_log), len(sleep_log))
+
+    def summary(self, energy_log, sleep_log):
+        """Update from the logs, then return (forecast date, predictions, sleep debt, midpoint spread) in one step.
+
+        Runs under the lock, so another thread's update cannot grow the arrays midway.
+        """
+        with self._lock:
+            self._update(energy_log, sleep_log)
+            date, predicted = self.forecast()
+            return date, predicted, self.sleep_debt(), self.midpoint_regularity()
+
+    def _slots(self, timestamps):
+        """Day slot of each timestamp (-1 for NaT), growing the arrays to cover new days."""
+        days = timestamps.astype("datetime64[D]")
+        known = ~np.isnat(days)
+        if known.any():
+            first, last = days[known].min(), days[known].max()
+            if self.start is None:
+                self.start = first
+            if first < self.start:
+                self._grow(int((self.start - first) / np.timedelta64(1, "D")), front=True)
+                self.start = first
+            needed = int((last - self.start) / np.timedelta64(1, "D")) + 1
+            if needed > len(self._sleep_hours):
+                self._grow(needed - len(self._sleep_hours), front=False)
+        slots = np.full(len(days), -1, dtype=np.int64)
+        if known.any():
+            slots[known] = ((days[known] - self.start) / np.timedelta64(1, "D")).astype(np.int64)
+        return slots
+
+    def _grow(self, days, front):
+        for name in ("_energy_sum", "_energy_count", "_sleep_hours", "_sleep_nights",
+                     "_midpoint_cos", "_midpoint_sin", "_midpoint_nights"):
+            array = getattr(self, name)
+            pad = np.zeros((days,) + array.shape[1:])
+            setattr(self, name, np.concatenate([pad, array] if front else [array, pad]))
+
+    def _add_energy(self, log, seen):
+        if len(log) <= seen:
+            return
+        rows = slice(seen, len(log))
+        slots = self._slots(log.column(log.DATE_FIELD)[rows])
+        blocks = log.column("Time Block")[rows].astype(np.int64)
+        scores = log.column(ENERGY_CODE)[rows]
+        valid = (slots >= 0) & (blocks >= 0) & (blocks < len(self.blocks)) & ~np.isnan(scores)
+        cells = slots[valid] * len(self.blocks) + blocks[valid]
+        size = self._energy_sum.size
+        self._energy_sum += np.bincount(cells, weights=scores[valid], minlength=size).reshape(self._energy_sum.shape)
+        self._energy_count += np.bincount(cells, minlength=size).reshape(self._energy_count.shape)
+
+    def _add_sleep(self, log, seen):
+        if len(log) <= seen:
+            return
+        rows = slice(seen, len(log))
+        slots = self._slots(log.column(log.DATE_FIELD)[rows])
+        hours = log.column("Duration (hrs)")[rows]
+        valid = (slots >= 0) & ~np.isnan(hours)
+        size = len(self._sleep_hours)
+        self._sleep_hours += np.bincount(slots[valid], weights=hours[valid], minlength=size)  # Naps add up
+        self._sleep_nights += np.bincount(slots[valid], minlength=size)
+        start, wake = log.column(START_MINUTE)[rows], log.column(WAKE_MINUTE)[rows]
+        valid &= ~np.isnan(start) & ~np.isnan(wake)
+        midpoint = (start[valid] + (wake[valid] - start[valid]) % DAY_MINUTES / 2) % DAY_MINUTES
+        angle = midpoint / DAY_MINUTES * 2 * np.pi
+        self._midpoint_cos += np.bincount(slots[valid], weights=np.cos(angle), minlength=size)
+        self._midpoint_sin += np.bincount(slots[valid], weights=np.sin(angle), minlength=size)
+        self._midpoint_nights += np.bincount(slots[valid], minlength=size)
+
+    def days(self):
+        """Dates of the day slots, oldest first."""
+        if self.start is None:
+            return np.array([], dtype="datetime64[D]")
+        return self.start + np.arange(len(self._sleep_hours))
+
+    def sleep_debt(self, window=DEBT_WINDOW):
+        """Hours of sleep owed going into each day over the last `window` logged-or-not nights.
+
+        Nights without a log count as neither debt nor repayment.
+        """
+        shortfall = np.where(self._sleep_nights > 0, SLEEP_NEED - self._sleep_hours, 0.0)
+        return _rolling_sum(shortfall, window)
+
+    def midpoint_regularity(self, window=REGULARITY_WINDOW):
+        """Circular spread (minutes) of the sleep midpoint over the last `window` nights; NaN below two nights."""
+        nights = _rolling_sum(self._midpoint_nights, window)
+        cos, sin = _rolling_sum(self._midpoint_cos, window), _rolling_sum(self._midpoint_sin, window)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            length = np.clip(np.hypot(cos, sin) / nights, 1e-12, 1.0)
+            spread = np.sqrt(-2 * np.log(length)) / (2 * np.pi) * DAY_MINUTES
+        return np.where(nights >= 2, spread, np.nan)
+
+    def block_means(self):
+        """Mean energy per day x time block (NaN where nothing was logged)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self._energy_sum / self._energy_count
+
+    def forecast(self, target=None):
+        """Return (date, predicted 1-5 energy per time block) for `target` (default: the day after the last slot).
+
+        Blocks never logged come back as NaN.
+        """
+        days = self.days()
+        if not len(days):
+            return None, np.full(len(self.blocks), np.nan)
+        target = np.datetime64(target, "D") if target is not None else days[-1] + 1
+        debt = self.sleep_debt()
+
+        # Weighted least squares: one baseline per block plus a shared slope on the debt
+        slots, blocks = np.nonzero(self._energy_count)
+        y = self.block_means()[slots, blocks]
+        age = (days[-1] - days[slots]) / np.timedelta64(1, "D")
+        weights = np.sqrt(self._energy_count[slots, blocks] * 0.5 ** (age / HALF_LIFE_DAYS))
+        x = np.zeros((len(y), len(self.blocks) + 1))
+        x[np.arange(len(y)), blocks] = 1.0
+        x[:, -1] = debt[slots]
+        coefficients = np.linalg.lstsq(x * weights[:, None], y * weights, rcond=None)[0] if len(y) else np.zeros(x.shape[1])
+
+        predicted = coefficients[:-1] + coefficients[-1] * self._debt_on(target, debt)
+        logged = self._energy_count.sum(axis=0) > 0
+        return target.astype(datetime.date), np.where(logged, np.clip(predicted, 1, 5), np.nan)
+
+    def _debt_on(self, target, debt):
+        """Debt going into `target`, assuming the nights until then match the recent average."""
+        nights = self._sleep_nights > 0
+        recent = self._sleep_hours[nights][-RECENT_NIGHTS:]
+        tonight = SLEEP_NEED - (recent.mean() if len(recent) else SLEEP_NEED)
+        ahead = int((target - self.days()[-1]) / np.timedelta64(1, "D"))
+        if ahead <= 0:
+            return debt[ahead - 1]
+        shortfall = np.where(nights, SLEEP_NEED - self._sleep_hours, 0.0)
+        window = np.concatenate([shortfall, np.full(ahead, tonight)])[-DEBT_WINDOW:]
+        return window.sum()
+
+    def start_hours(self):
+        """24-hour start of each time block, for plotting the forecast."""
+        hours = get_time_block_hours()
+        return [hours[block][0] for block in self.blocks]
+
+
+def _rolling_sum(values, window):
+    """Sum of each slot and the `window - 1` before it."""
+    sums = np.cumsum(np.asarray(values, dtype=np.float64))
+    sums[window:] = sums[window:] - sums[:-window]
+    return sums
@@ -0,0 +1,62 @@
+import os
+
+from github_api import GITHUB_REPO
+from sync import BATCH_WINDOW
+
+
+def _flag(value):
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+# Setting name -> (environment variable, parser); the names are also the Streamlit secrets keys
+SETTINGS = {
+    "github_pat": ("GITHUB_PAT", str),
+    "github_repo": ("GITHUB_REPO", str),
+    "sync_batch_window": ("SYNC_BATCH_WINDOW", float),
+    "metrics_enabled": ("METRICS_ENABLED", _flag),
+    "metrics_port": ("METRICS_PORT", int),    # Serve Prometheus text at http://127.0.0.1:<port>/metrics
+    "metrics_log": ("METRICS_LOG", str),      # Append one JSON line per timed span to this file
+    "scheduler_enabled": ("SCHEDULER_ENABLED", _flag),  # Run summaries, cache warm-up and compaction in the app
+}
+
+
+class Config:
+    """Settings shared by every page and session, read once per process."""
+
+    def __init__(
+        self,
+        github_pat=None,
+        github_repo=GITHUB_REPO,
+        sync_batch_window=BATCH_WINDOW,
+        metrics_enabled=False,
+        metrics_port=None,
+        metrics_log=None,
+        scheduler_enabled=True,
+    ):
+        self.github_pat = github_pat
+        self.github_repo = github_repo
+        self.sync_batch_window = sync_batch_window
+        self.metrics_enabled = metrics_enabled
+        self.metrics_port = metrics_port
+        self.metrics_log = metrics_log
+        self.scheduler_enabled = scheduler_enabled
+
+    @property
+    def sync_enabled(self):
+        """True when a GitHub token is configured."""
+        return bool(self.github_pat)
+
+
+def load_config(secrets=None, environ=os.environ):
+    """Build a Config from Streamlit secrets, falling back to environment variables."""
+    values = {}
+    for name, (variable, parse) in SETTINGS.items():
+        try:
+            value = secrets.get(name) if secrets is not None else None
+        except FileNotFoundError:  # No secrets.toml
+            value = None
+        if value is None:
+            value = environ.get(variable)
+        if value not in (None, ""):
+            values[name] = parse(value)
+    return Config(**values)
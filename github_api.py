@@ -0,0 +1,288 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+# GitHub Configuration
+GITHUB_REPO = "hawkarabdulhaq/energy"  # Your GitHub repository
+API_ROOT = "https://api.github.com"
+CACHE_TTL = 60  # Seconds a cached response is served without asking GitHub
+REQUEST_TIMEOUT = (5, 30)  # Connect and read timeouts in seconds
+POOL_SIZE = 10  # Keep-alive connections kept open to api.github.com
+
+
+def make_session(pool_size=POOL_SIZE):
+    """Create a requests session that reuses TLS connections across calls."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    return session
+
+
+SESSION = make_session()  # Shared by every GitHubContents in the process
+
+
+class GitHubError(Exception):
+    """Raised when the GitHub contents API returns an unexpected status."""
+
+    def __init__(self, path, status_code):
+        super().__init__(f"GitHub request for {path} failed: {status_code}")
+        self.path = path
+        self.status_code = status_code
+
+
+class ResponseCache:
+    """Process-wide cache of contents API responses keyed by path.
+
+    Fresh entries (younger than `ttl`) are served without a request. Stale
+    entries are revalidated with `If-None-Match`, and a 304 reuses the cached
+    body without counting against the rate limit.
+    """
+
+    def __init__(self, ttl=CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}  # path -> (fetched_at, etag, status_code, body)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "invalidations": 0}
+
+    def get(self, path):
+        with self._lock:
+            return self._entries.get(path)
+
+    def put(self, path, etag, status_code, body):
+        with self._lock:
+            self._entries[path] = (time.monotonic(), etag, status_code, body)
+
+    def touch(self, path):
+        """Mark a revalidated entry as fresh again."""
+        with self._lock:
+            if path in self._entries:
+                _, etag, status_code, body = self._entries[path]
+                self._entries[path] = (time.monotonic(), etag, status_code, body)
+
+    def is_fresh(self, entry):
+        return time.monotonic() - entry[0] < self.ttl
+
+    def count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def invalidate(self, path):
+        """Drop a file, its directory listing and the latest commits of its parents after a write."""
+        with self._lock:
+            self.stats["invalidations"] += 1
+            self._entries.pop(path, None)
+            self._entries.pop(os.path.dirname(path), None)
+            for key in [key for key in self._entries if key.startswith("commits:")]:
+                if path == key[8:] or path.startswith(key[8:].rstrip("/") + "/"):
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats)
+
+
+CACHE = ResponseCache()
+
+
+def cache_stats():
+    """Return hit/miss counters of the shared response cache."""
+    return CACHE.snapshot()
+
+
+class Contents:
+    """File access shared by GitHub and its local stand-in; subclasses implement the byte-level calls."""
+
+    def read_bytes(self, path):
+        """Return (raw, sha) for a file, or (None, None) if it does not exist."""
+        raise NotImplementedError
+
+    def write_bytes(self, path, raw, message, sha=None):
+        """Create or replace a file and return the new blob SHA."""
+        raise NotImplementedError
+
+    def list_dir(self, path):
+        """Return {name: sha} for the files in a directory (empty if it does not exist)."""
+        raise NotImplementedError
+
+    def delete(self, path, sha, message):
+        """Delete a file."""
+        raise NotImplementedError
+
+    def latest_commit(self, path):
+        """Return the SHA of the latest commit touching `path`, or None if the backend cannot tell."""
+        return None
+
+    def read_json(self, path):
+        """Return (data, sha) for a JSON file, or (None, None) if it does not exist."""
+        raw, sha = self.read_bytes(path)
+        if raw is None:
+            return None, None
+        return (json.loads(raw.decode("utf-8")) if raw.strip() else []), sha
+
+    def write_json(self, path, data, message, sha=None):
+        """Create or replace a JSON file and return the new blob SHA."""
+        return self.write_bytes(path, json.dumps(data).encode("utf-8"), message, sha=sha)
+
+
+class GitHubContents(Contents):
+    """Files in the GitHub repository, accessed through the contents API."""
+
+    def __init__(self, token, repo=GITHUB_REPO, cache=CACHE, session=SESSION):
+        self.repo = repo
+        self.cache = cache
+        self.session = session
+        self.headers = {
+            "Authorization": f"token {token}",
+            "Accept": "application/vnd.github.v3+json",
+        }
+
+    def _url(self, path):
+        return f"{API_ROOT}/repos/{self.repo}/contents/{path}"
+
+    def _get(self, path, url=None, params=None):
+        """GET a contents path (or another API `url` cached under `path`) through the shared cache.
+
+        Returns (status_code, body).
+        """
+        cached = self.cache.get(path)
+        if cached and self.cache.is_fresh(cached):
+            self.cache.count("hits")
+            metrics.count("github_cache_total", result="hit")
+            return cached[2], cached[3]
+        headers = dict(self.headers)
+        if cached and cached[1]:
+            headers["If-None-Match"] = cached[1]
+        with metrics.span("github_request", method="GET"):
+            response = self.session.get(url or self._url(path), headers=headers, params=params, timeout=REQUEST_TIMEOUT)
+        _record(response, "GET")
+        if response.status_code == 304:
+            self.cache.count("revalidated")
+            metrics.count("github_cache_total", result="revalidated")
+            self.cache.touch(path)
+            return cached[2], cached[3]
+        self.cache.count("misses")
+        metrics.count("github_cache_total", result="miss")
+        if response.status_code not in [200, 404]:
+            raise GitHubError(path, response.status_code)
+        body = response.json() if response.status_code == 200 else None
+        self.cache.put(path, response.headers.get("ETag"), response.status_code, body)
+        return response.status_code, body
+
+    def read_bytes(self, path):
+        status_code, body = self._get(path)
+        if status_code == 404:
+            return None, None
+        return base64.b64decode(body.get("content", "")), body.get("sha")
+
+    def write_bytes(self, path, raw, message, sha=None):
+        payload = {
+            "message": message,
+            "content": base64.b64encode(raw).decode("utf-8"),
+        }
+        if sha:
+            payload["sha"] = sha  # Include SHA if the file exists
+        with metrics.span("github_request", method="PUT"):
+            response = self.session.put(self._url(path), headers=self.headers, json=payload, timeout=REQUEST_TIMEOUT)
+        _record(response, "PUT")
+        self.cache.invalidate(path)
+        if response.status_code not in [200, 201]:
+            raise GitHubError(path, response.status_code)
+        return response.json().get("content", {}).get("sha")
+
+    def list_dir(self, path):
+        status_code, body = self._get(path)
+        if status_code == 404:
+            return {}
+        return {item["name"]: item["sha"] for item in body if item.get("type") == "file"}
+
+    def delete(self, path, sha, message):
+        with metrics.span("github_request", method="DELETE"):
+            response = self.session.delete(
+                self._url(path), headers=self.headers, json={"message": message, "sha": sha}, timeout=REQUEST_TIMEOUT
+            )
+        _record(response, "DELETE")
+        self.cache.invalidate(path)
+        if response.status_code not in [200, 404]:
+            raise GitHubError(path, response.status_code)
+
+    def latest_commit(self, path):
+        # One small request (a 304 while nothing changed) instead of re-reading every file under `path`
+        status_code, body = self._get(
+            f"commits:{path}", url=f"{API_ROOT}/repos/{self.repo}/commits", params={"path": path, "per_page": 1}
+        )
+        if status_code == 404 or not body:
+            return None
+        return body[0]["sha"]
+
+
+class LocalContents(Contents):
+    """Local stand-in for GitHubContents backed by a directory on disk."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _file(self, path):
+        return os.path.join(self.root, path)
+
+    def read_bytes(self, path):
+        try:
+            with open(self._file(path), "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return None, None
+        return raw, _blob_sha(raw)
+
+    def write_bytes(self, path, raw, message, sha=None):
+        _, current = self.read_bytes(path)
+        if current is not None and sha != current:
+            raise GitHubError(path, 409)  # Same conflict GitHub reports for a stale SHA
+        os.makedirs(os.path.dirname(self._file(path)) or ".", exist_ok=True)
+        with open(self._file(path), "wb") as f:
+            f.write(raw)
+        return _blob_sha(raw)
+
+    def list_dir(self, path):
+        try:
+            names = os.listdir(self._file(path))
+        except FileNotFoundError:
+            return {}
+        files = {}
+        for name in names:
+            if os.path.isfile(self._file(os.path.join(path, name))):
+                files[name] = self.read_bytes(os.path.join(path, name))[1]
+        return files
+
+    def delete(self, path, sha, message):
+        try:
+            os.remove(self._file(path))
+        except FileNotFoundError:
+            pass
+
+
+def _record(response, method):
+    """Count an API call, the bytes it moved and the rate limit GitHub reports as remaining."""
+    metrics.count("github_api_requests_total", method=method, status=response.status_code)
+    metrics.count("github_api_bytes_total", len(response.content or b""), direction="received")
+    body = getattr(response.request, "body", None)
+    if body:
+        metrics.count("github_api_bytes_total", len(body), direction="sent")
+    remaining = response.headers.get("X-RateLimit-Remaining")
+    if remaining is not None:
+        metrics.gauge("github_rate_limit_remaining", int(remaining))
+
+
+def _blob_sha(raw):
+    """Compute the git blob SHA GitHub reports for a file's contents."""
+    return hashlib.sha1(b"blob %d\0" % len(raw) + raw).hexdigest()
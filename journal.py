@@ -0,0 +1,349 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from github_api import GitHubError
+from storage import ENTRY_ID, with_ids
+
+# Fold the journal into the snapshot once this many segments have accumulated
+COMPACT_EVERY = 50
+FETCH_WORKERS = 8  # Segments fetched in parallel over the pooled connection
+MAX_MERGE_ATTEMPTS = 5  # Manifest rewrites retried after another writer got there first
+CONFLICT_STATUSES = (409, 422)  # Stale or missing SHA
+CHUNK_ENTRIES = 5000  # Entries per chunk; compressed, a chunk stays far below the contents API's 1 MB limit
+MANIFEST = "manifest.json"
+UNDATED = "undated"  # Chunk key for entries without a timestamp (tasks)
+
+_MONTH = re.compile(r"\d{4}-\d{2}")
+
+logger = logging.getLogger(__name__)
+
+
+def journal_dir(snapshot_path):
+    """Directory holding the JSON Lines segments for a snapshot file."""
+    name = os.path.splitext(os.path.basename(snapshot_path))[0]
+    return f"{os.path.dirname(snapshot_path)}/journal/{name}"
+
+
+def encode_segment(entries):
+    """Serialize entries as JSON Lines."""
+    return "".join(json.dumps(entry) + "\n" for entry in entries).encode("utf-8")
+
+
+def merge_entries(base, incoming):
+    """Append entries from `incoming` whose ID is not already in `base`, keeping order.
+
+    Entries from before IDs existed get theirs from their occurrence in their
+    own file (see storage.with_ids), so repeats within a file all survive.
+    """
+    merged = []
+    seen = set()
+    for entry in with_ids(base) + with_ids(incoming):
+        if entry[ENTRY_ID] not in seen:
+            seen.add(entry[ENTRY_ID])
+            merged.append(entry)
+    return merged
+
+
+def decode_segment(raw):
+    """Parse a JSON Lines segment, skipping blank lines."""
+    return [json.loads(line) for line in raw.decode("utf-8").splitlines() if line.strip()]
+
+
+def chunk_dir(snapshot_path):
+    """Directory holding the compressed chunks and manifest for a snapshot file."""
+    name = os.path.splitext(os.path.basename(snapshot_path))[0]
+    return f"{os.path.dirname(snapshot_path)}/chunks/{name}"
+
+
+def chunk_key(entry):
+    """Month an entry is filed under ("2024-12"), or UNDATED."""
+    month = str(entry.get("Timestamp") or "")[:7]
+    return month if _MONTH.fullmatch(month) else UNDATED
+
+
+def encode_chunk(entries):
+    """Gzipped JSON Lines; mtime is fixed so equal entries always give equal bytes."""
+    return gzip.compress(encode_segment(entries), mtime=0)
+
+
+def decode_chunk(raw):
+    return decode_segment(gzip.decompress(raw))
+
+
+def _in_range(entry, start, end):
+    timestamp = entry.get("Timestamp")
+    if not timestamp:
+        return start is None and end is None
+    return (start is None or str(timestamp) >= str(start)) and (end is None or str(timestamp) < str(end))
+
+
+class ChunkedSnapshot:
+    """A dataset stored as gzipped JSON Lines chunks of at most CHUNK_ENTRIES entries, one month per chunk.
+
+    `manifest.json` lists every chunk with its entry count and timestamp
+    range, so readers fetch only the chunks covering the dates they need.
+    Chunk names include a hash of their bytes: folding new entries in
+    rewrites only the latest chunk of each affected month, and a chunk whose
+    contents did not change is never uploaded again. The manifest is the
+    single point of truth and is replaced with optimistic concurrency.
+    """
+
+    def __init__(self, contents, snapshot_path, chunk_entries=CHUNK_ENTRIES):
+        self.contents = contents
+        self.dir = chunk_dir(snapshot_path)
+        self.manifest_path = f"{self.dir}/{MANIFEST}"
+        self.chunk_entries = chunk_entries
+
+    def read_manifest(self):
+        """Return (manifest, sha); an empty manifest if none has been written yet."""
+        manifest, sha = self.contents.read_json(self.manifest_path)
+        return manifest or {"version": 1, "chunks": []}, sha
+
+    def load(self, start=None, end=None):
+        """Return the entries in [start, end) (all entries without a range), fetching only the chunks needed."""
+        for attempt in range(2):
+            manifest, _ = self.read_manifest()
+            chunks = [chunk for chunk in manifest["chunks"] if self._overlaps(chunk, start, end)]
+            raws = self.fetch([chunk["name"] for chunk in chunks])
+            if all(raw is not None for raw in raws) or attempt:
+                break
+            # A compaction replaced chunks after we read the manifest; read the new one
+        # Entries from before IDs existed are numbered per chunk file, as the migration numbers them
+        entries = [entry for raw in raws if raw is not None for entry in with_ids(decode_chunk(raw))]
+        if start is None and end is None:
+            return entries
+        return [entry for entry in entries if _in_range(entry, start, end)]
+
+    def _overlaps(self, chunk, start, end):
+        if start is None and end is None:
+            return True
+        if chunk["start"] is None:
+            return False
+        return (start is None or chunk["end"] >= str(start)) and (end is None or chunk["start"] < str(end))
+
+    def fetch(self, names):
+        """Download chunk files by name, in parallel; missing chunks come back as None."""
+        if not names:
+            return []
+        with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(names))) as pool:
+            return list(pool.map(lambda name: self.contents.read_bytes(f"{self.dir}/{name}")[0], names))
+
+    def fold(self, entries):
+        """Merge entries into the chunks, uploading only new chunk files.
+
+        Returns the manifest records of chunks that were replaced; the caller
+        deletes them once nothing references them.
+        """
+        by_key = {}
+        for entry in entries:
+            by_key.setdefault(chunk_key(entry), []).append(entry)
+        for attempt in range(MAX_MERGE_ATTEMPTS):
+            manifest, sha = self.read_manifest()
+            chunks = list(manifest["chunks"])
+            replaced, written = [], []
+            for key, new in sorted(by_key.items()):
+                last = next((chunk for chunk in reversed(chunks) if chunk["key"] == key), None)
+                raw = self.fetch([last["name"]])[0] if last else None
+                base = decode_chunk(raw) if raw else []
+                # Only the latest chunk of a month is rewritten; readers de-duplicate across chunks by ID
+                merged = merge_entries(base, new)
+                if len(merged) == len(base):
+                    continue
+                if last:
+                    chunks.remove(last)
+                    replaced.append(last)
+                for i in range(0, len(merged), self.chunk_entries):
+                    record = self._write_chunk(key, merged[i:i + self.chunk_entries])
+                    written.append(record)
+                    chunks.append(record)
+            if not written:
+                return []
+            chunks.sort(key=lambda chunk: chunk["key"])  # Stable, so a month's chunks stay in write order
+            try:
+                self.contents.write_json(
+                    self.manifest_path,
+                    {"version": 1, "chunks": chunks},
+                    f"Update {os.path.basename(self.dir)} manifest - {sum(c['count'] for c in chunks)} entries",
+                    sha=sha,
+                )
+                # A full chunk merged with nothing new is written again under the same name; it is still live
+                live = {chunk["name"] for chunk in chunks}
+                return [record for record in replaced if record["name"] not in live]
+            except GitHubError as e:
+                if e.status_code not in CONFLICT_STATUSES or attempt == MAX_MERGE_ATTEMPTS - 1:
+                    raise
+                # Chunks written for the lost attempt stay: another writer's manifest may use the same bytes
+                logger.info("Manifest %s changed remotely, merging and retrying", self.manifest_path)
+
+    def rewrite(self, transform):
+        """Replace every chunk whose entries `transform` changes (e.g. a schema migration).
+
+        `transform(entries)` gets each chunk's entries, in manifest order, and returns the new list.
+
+        Returns the manifest records of the replaced chunks, for `delete_chunks`.
+        """
+        manifest, sha = self.read_manifest()
+        chunks, replaced = [], []
+        for chunk, raw in zip(manifest["chunks"], self.fetch([chunk["name"] for chunk in manifest["chunks"]])):
+            entries = decode_chunk(raw) if raw is not None else []
+            upgraded = transform(entries)
+            if raw is None or upgraded == entries:
+                chunks.append(chunk)
+                continue
+            chunks.append(self._write_chunk(chunk["key"], upgraded))
+            replaced.append(chunk)
+        if replaced:
+            # Against the SHA read above: a concurrent compaction makes this fail rather than lose entries
+            self.contents.write_json(
+                self.manifest_path,
+                {"version": 1, "chunks": chunks},
+                f"Rewrite {len(replaced)} {os.path.basename(self.dir)} chunks",
+                sha=sha,
+            )
+        return replaced
+
+    def _write_chunk(self, key, entries):
+        raw = encode_chunk(entries)
+        name = f"{key}-{hashlib.sha1(raw).hexdigest()[:12]}.jsonl.gz"
+        try:
+            sha = self.contents.write_bytes(f"{self.dir}/{name}", raw, f"Add chunk {name} ({len(entries)} entries)")
+        except GitHubError as e:
+            if e.status_code not in CONFLICT_STATUSES:
+                raise
+            sha = self.contents.read_bytes(f"{self.dir}/{name}")[1]  # Same bytes already uploaded
+        timestamps = sorted(str(entry["Timestamp"]) for entry in entries if entry.get("Timestamp"))
+        return {
+            "name": name,
+            "key": key,
+            "sha": sha,
+            "count": len(entries),
+            "start": timestamps[0] if timestamps else None,
+            "end": timestamps[-1] if timestamps else None,
+        }
+
+    def delete_chunks(self, records):
+        for record in records:
+            self.contents.delete(f"{self.dir}/{record['name']}", record["sha"], f"Remove replaced chunk {record['name']}")
+
+
+class Journal:
+    """Append-only log of a dataset: a chunked snapshot plus JSON Lines segments written since.
+
+    Each append creates one new segment file, so its cost depends only on the
+    entries being added. `compact` folds the segments into the chunks. A
+    single-file JSON snapshot from before chunking is still read, and is
+    folded in and removed by the next compaction.
+    """
+
+    def __init__(self, contents, snapshot_path, compact_every=COMPACT_EVERY):
+        self.contents = contents
+        self.snapshot_path = snapshot_path
+        self.segment_dir = journal_dir(snapshot_path)
+        self.chunks = ChunkedSnapshot(contents, snapshot_path)
+        self.compact_every = compact_every
+        self._pending_segments = None  # Segment count, read lazily from the remote
+
+    def append(self, entries):
+        """Write entries as a new segment and compact if the journal has grown too long."""
+        if not entries:
+            return
+        # Time-ordered, collision-free names so segments replay in write order
+        name = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.jsonl"
+        self.contents.write_bytes(
+            f"{self.segment_dir}/{name}",
+            encode_segment(entries),
+            f"Append {len(entries)} entries to {os.path.basename(self.snapshot_path)}",
+        )
+        try:
+            if self._pending_segments is None:
+                self._pending_segments = len(self.contents.list_dir(self.segment_dir))
+            else:
+                self._pending_segments += 1
+            if self._pending_segments >= self.compact_every:
+                with metrics.span("journal_compact"):
+                    self.compact()
+        except Exception:
+            # The segment is already committed; compaction is retried on the next append
+            logger.exception("Failed to compact %s", self.snapshot_path)
+
+    def load(self, start=None, end=None):
+        """Rebuild the dataset (or its entries in [start, end)) from the snapshot plus every segment after it."""
+        with metrics.span("journal_load"):
+            legacy, _ = self.contents.read_json(self.snapshot_path)
+            data = merge_entries(legacy or [], self.chunks.load(start, end))
+            segments = self.contents.list_dir(self.segment_dir)
+            # A segment replayed after a crash, or already folded in by a concurrent compaction, is dropped here
+            data = merge_entries(data, self._read_segments(sorted(segments)))
+            if start is None and end is None:
+                return data
+            return [entry for entry in data if _in_range(entry, start, end)]
+
+    def load_since(self, cursor=None):
+        """Return (entries, cursor) with only what was added since `cursor` was returned.
+
+        The cursor records which snapshot, chunks and segments have been read,
+        so a later call fetches just the new chunk and segment files (all of
+        them when `cursor` is None). Chunks rewritten by a compaction count as
+        new, and their entries come back again; callers merge by entry ID.
+        """
+        cursor = cursor or {"legacy": None, "chunks": [], "segments": []}
+        with metrics.span("journal_load_since"):
+            legacy, legacy_sha = self.contents.read_json(self.snapshot_path)
+            entries = (legacy or []) if legacy_sha != cursor["legacy"] else []
+            manifest, _ = self.chunks.read_manifest()
+            seen_chunks = set(cursor["chunks"])
+            new_chunks = [chunk["name"] for chunk in manifest["chunks"] if chunk["name"] not in seen_chunks]
+            raws = self.chunks.fetch(new_chunks)
+            entries = merge_entries(entries, [entry for raw in raws if raw is not None for entry in with_ids(decode_chunk(raw))])
+            segments = sorted(self.contents.list_dir(self.segment_dir))
+            seen_segments = set(cursor["segments"])
+            entries = merge_entries(entries, self._read_segments([name for name in segments if name not in seen_segments]))
+        # Chunks that vanished between the manifest read and the fetch are retried next time
+        fetched = [name for name, raw in zip(new_chunks, raws) if raw is not None]
+        return entries, {
+            "legacy": legacy_sha,
+            "chunks": [chunk["name"] for chunk in manifest["chunks"] if chunk["name"] in seen_chunks] + fetched,
+            "segments": segments,
+        }
+
+    def _read_segments(self, names):
+        if not names:
+            return []
+        with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(names))) as pool:
+            results = pool.map(lambda name: self.contents.read_bytes(f"{self.segment_dir}/{name}")[0], names)
+            entries = []
+            for raw in results:  # map keeps segment order
+                if raw is not None:
+                    entries.extend(with_ids(decode_segment(raw)))
+        return entries
+
+    def compact(self):
+        """Fold the current segments (and any pre-chunking snapshot) into the chunks and delete them.
+
+        The manifest is written against the SHA it was read at. If another
+        writer replaced it in between, the chunks are re-read, merged by
+        entry ID and the write retried, up to MAX_MERGE_ATTEMPTS times.
+        """
+        segments = self.contents.list_dir(self.segment_dir)
+        tail = self._read_segments(sorted(segments))
+        legacy, legacy_sha = self.contents.read_json(self.snapshot_path)
+        replaced = self.chunks.fold((legacy or []) + tail)
+        # Only delete what was folded in; segments appended meanwhile stay for the next pass
+        self.chunks.delete_chunks(replaced)
+        if legacy_sha:
+            try:
+                self.contents.delete(self.snapshot_path, legacy_sha, f"Remove {self.snapshot_path}, now chunked")
+            except GitHubError:
+                # Changed by an older writer meanwhile; it is folded in again next time
+                logger.warning("Could not remove %s after chunking it", self.snapshot_path)
+        for name, segment_sha in segments.items():
+            self.contents.delete(f"{self.segment_dir}/{name}", segment_sha, f"Remove compacted segment {name}")
+        self._pending_segments = 0
@@ -1,23 +1,25 @@
 import streamlit as st
-import datetime
 from activity import get_activity_types  # Import activity types from activity.py
+from schema import now_fields, upgrade_energy
+from storage import ENTRY_ID, new_entry_id
+from vocabulary import get_energy_levels, get_time_blocks
 
 
 # Helper Functions
-def save_log_to_github(log_entry, log_data, save_to_github):
-    """Save a single log entry to GitHub."""
+def save_log_entry(log_entry, log_data, save_entry):
+    """Save a single log entry to storage."""
     log_data.append(log_entry)
-    save_to_github(log_data)  # Use GitHub integration for saving
+    save_entry(log_entry)  # Single-row insert; GitHub sync happens in the background
     return log_data
 
 
-def log_energy_page(log_data, save_to_github):
+def log_energy_page(log_data, save_entry):
     """Log Energy page logic."""
     st.header("Log Your Energy Levels")
 
     # Step 1: Time Block Selection
     st.subheader("1️⃣ Select Time Block")
-    time_blocks = ["6–8 AM", "8–10 AM", "10–12 PM", "12–2 PM", "2–4 PM", "4–6 PM", "6–8 PM"]
+    time_blocks = get_time_blocks()
 
     # Display buttons for time block selection
     time_block_cols = st.columns(len(time_blocks))
@@ -31,13 +33,7 @@ def log_energy_page(log_data, save_to_github):
 
     # Step 2: Energy Level Selection with Descriptive Buttons
     st.subheader("2️⃣ How do you feel?")
-    energy_levels = [
-        "Exhausted 😴",  # Low energy, feeling drained
-        "Fatigued 😓",   # Slightly higher than exhausted
-        "Balanced 😐",   # Neutral energy, steady state
-        "Energized 🚀",  # Positive, ready to work
-        "Recharged 🌟"   # Fully refreshed and motivated
-    ]
+    energy_levels = get_energy_levels()
 
     cols = st.columns(len(energy_levels))
     for i, level in enumerate(energy_levels):
@@ -70,13 +66,15 @@ def log_energy_page(log_data, save_to_github):
             st.session_state.get("selected_energy_level") and
             st.session_state.get("selected_activity")
         ):
-            new_entry = {
+            # Hours, energy score and epoch are stored next to the labels, so reads need no parsing
+            new_entry = upgrade_energy({
                 "Time Block": st.session_state["selected_block"],
                 "Energy Level": st.session_state["selected_energy_level"],
                 "Activity Type": st.session_state["selected_activity"],
-                "Timestamp": str(datetime.datetime.now()),
-            }
-            save_log_to_github(new_entry, log_data, save_to_github)
+                **now_fields(),
+                ENTRY_ID: new_entry_id(),
+            })
+            save_log_entry(new_entry, log_data, save_entry)
             st.success("🚀 Entry saved successfully!")
             # Reset selections
             st.session_state["selected_block"] = None
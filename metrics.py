@@ -0,0 +1,182 @@
+"""Lightweight timing spans, counters, gauges and latency histograms.
+
+Collection is off until `configure(enabled=True)`; while off, every call is a
+cheap no-op. Metrics can be exported as Prometheus text over a local HTTP
+endpoint and/or as one JSON line per finished span in a log file.
+"""
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds, roughly the Prometheus client defaults
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger(__name__)
+
+
+class Registry:
+    """Thread-safe store of metric samples keyed by name and label set."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.enabled = False
+        self.buckets = buckets
+        self._counters = {}  # (name, labels) -> value
+        self._gauges = {}
+        self._histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        self._span_log = None
+
+    def count(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def gauge(self, name, value, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[(name, _labels(labels))] = value
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += 1  # +Inf, i.e. the total count
+            histogram[-1] += seconds
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Time the enclosed block into the `<name>_seconds` histogram (and the span log, if set)."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe(f"{name}_seconds", seconds, **labels)
+            if status == "error":
+                self.count(f"{name}_errors_total", **labels)
+            if self._span_log is not None:
+                self._span_log.info(json.dumps(
+                    {"ts": time.time(), "span": name, "labels": labels, "seconds": round(seconds, 6), "status": status}
+                ))
+
+    def log_spans(self, path):
+        """Append one JSON line per finished span to `path`."""
+        span_log = logging.getLogger(f"{__name__}.spans")
+        span_log.propagate = False
+        span_log.setLevel(logging.INFO)
+        handler = logging.FileHandler(path, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        span_log.addHandler(handler)
+        self._span_log = span_log
+
+    def snapshot(self):
+        """Return all samples as plain dicts, for tests and benchmarks."""
+        with self._lock:
+            return {
+                "counters": {_sample_name(name, labels): value for (name, labels), value in self._counters.items()},
+                "gauges": {_sample_name(name, labels): value for (name, labels), value in self._gauges.items()},
+                "histograms": {
+                    _sample_name(name, labels): {"count": h[-2], "sum": h[-1]}
+                    for (name, labels), h in self._histograms.items()
+                },
+            }
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for kind, samples in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted({name for name, _ in samples}):
+                    lines.append(f"# TYPE {name} {kind}")
+                    for (sample, labels), value in sorted(samples.items()):
+                        if sample == name:
+                            lines.append(f"{_sample_name(name, labels)} {value}")
+            for name in sorted({name for name, _ in self._histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (sample, labels), histogram in sorted(self._histograms.items()):
+                    if sample != name:
+                        continue
+                    for bound, count in zip(self.buckets + ("+Inf",), histogram):
+                        lines.append(f"{_sample_name(name + '_bucket', labels + (('le', str(bound)),))} {count}")
+                    lines.append(f"{_sample_name(name + '_sum', labels)} {histogram[-1]}")
+                    lines.append(f"{_sample_name(name + '_count', labels)} {histogram[-2]}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serve `render()` at http://host:port/metrics from a daemon thread; return the server."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes are not worth a log line each
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-endpoint", daemon=True).start()
+        logger.info("Serving metrics on http://%s:%d/metrics", host, server.server_port)
+        return server
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+
+def _labels(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _sample_name(name, labels):
+    if not labels:
+        return name
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return name + "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+REGISTRY = Registry()  # Shared by the whole process
+
+# Module-level shortcuts for the shared registry
+count = REGISTRY.count
+gauge = REGISTRY.gauge
+observe = REGISTRY.observe
+span = REGISTRY.span
+snapshot = REGISTRY.snapshot
+
+
+def configure(enabled=True, port=None, log_path=None):
+    """Turn collection on or off and start the configured exporters; returns the HTTP server, if any."""
+    REGISTRY.enabled = enabled
+    if not enabled:
+        return None
+    if log_path:
+        REGISTRY.log_spans(log_path)
+    return REGISTRY.serve(port) if port else None
@@ -0,0 +1,84 @@
+"""One-shot upgrade of stored entries to the current entry schema (see schema.py).
+
+Rewrites the JSON snapshots, chunks and journal segments of every user,
+locally or in the GitHub repository, and upgrades each user's local
+SQLite store. Entries already current are left alone, so running it again
+is a no-op.
+
+Usage:
+    python migrate.py            # Files under the working directory
+    python migrate.py --github   # Files in the configured GitHub repository
+"""
+import argparse
+import os
+
+from config import load_config
+from github_api import GitHubContents, LocalContents
+from journal import Journal, decode_segment, encode_segment
+from storage import UPGRADES, SQLiteStorage, with_ids
+from sync import REMOTE_PATHS, remote_paths
+from users import list_users, user_db_path
+
+
+def upgrade(kind, entries):
+    # Entries from before IDs existed get the ID readers derive for them, so replicas still match them
+    return [UPGRADES[kind](entry) for entry in with_ids(entries)]
+
+
+def migrate_journal(contents, kind, snapshot_path):
+    """Upgrade one dataset's files in place; return how many files were rewritten.
+
+    Repeated legacy entries are numbered per file, as Journal.load numbers
+    them, so the IDs written here are the ones readers derive.
+    """
+    journal = Journal(contents, snapshot_path)
+    rewritten = 0
+    legacy, sha = contents.read_json(snapshot_path)
+    if legacy:
+        upgraded = upgrade(kind, legacy)
+        if upgraded != legacy:
+            contents.write_json(snapshot_path, upgraded, f"Upgrade {snapshot_path} entries", sha=sha)
+            rewritten += 1
+    replaced = journal.chunks.rewrite(lambda entries: upgrade(kind, entries))
+    journal.chunks.delete_chunks(replaced)
+    rewritten += len(replaced)
+    for name, segment_sha in sorted(contents.list_dir(journal.segment_dir).items()):
+        path = f"{journal.segment_dir}/{name}"
+        raw, _ = contents.read_bytes(path)
+        if raw is None:
+            continue  # Compacted meanwhile
+        entries = decode_segment(raw)
+        upgraded = upgrade(kind, entries)
+        if upgraded != entries:
+            contents.write_bytes(path, encode_segment(upgraded), f"Upgrade segment {name}", sha=segment_sha)
+            rewritten += 1
+    return rewritten
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Upgrade stored entries to the current entry schema.")
+    parser.add_argument("--github", action="store_true", help="Migrate the files in the configured GitHub repository")
+    args = parser.parse_args(argv)
+
+    config = load_config()
+    if args.github:
+        if not config.sync_enabled:
+            parser.error("--github needs GITHUB_PAT")
+        contents = GitHubContents(config.github_pat, config.github_repo)
+    else:
+        contents = LocalContents(".")
+
+    snapshots = [(kind, path) for kind, path in REMOTE_PATHS.items()]
+    for user_id in list_users():
+        snapshots += list(remote_paths(user_id).items())
+        if os.path.exists(os.path.dirname(user_db_path(user_id))):
+            SQLiteStorage(user_db_path(user_id)).close()  # Opening a store upgrades its rows
+            print(f"Upgraded the local store of user {user_id}")
+    for kind, path in snapshots:
+        rewritten = migrate_journal(contents, kind, path)
+        if rewritten:
+            print(f"Upgraded {rewritten} files of {path}")
+
+
+if __name__ == "__main__":
+    main()
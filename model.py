@@ -0,0 +1,429 @@
+import datetime
+import itertools
+import warnings
+
+import numpy as np
+
+import metrics
+from activity import get_activity_types
+from schema import (
+    END_HOUR,
+    ENERGY_CODE,
+    EPOCH,
+    HIDDEN,
+    START_HOUR,
+    START_MINUTE,
+    UTC_OFFSET,
+    VERSION,
+    WAKE_MINUTE,
+)
+from storage import ENERGY, ENTRY_ID, SLEEP, TASKS
+from vocabulary import (
+    get_energy_levels,
+    get_sleep_start_times,
+    get_task_lengths,
+    get_task_types,
+    get_time_blocks,
+    get_wake_up_times,
+)
+
+# Column kinds
+CATEGORY = "category"  # int16 codes into a label list, -1 when missing
+FLOAT = "float"        # float64, NaN when missing
+INT = "int"            # whole numbers held as float64 so NaN can mark them missing
+DATETIME = "datetime"  # datetime64[us], NaT when missing
+ID = "id"              # fixed-width ASCII bytes, empty when missing
+
+ID_WIDTH = 32  # uuid4().hex
+
+_log_ids = itertools.count()  # Distinguishes log instances in cache keys
+
+
+def get_activity_list():
+    """Flatten the activity categories into one ordered list of activity names."""
+    return [activity for activities in get_activity_types().values() for activity in activities]
+
+
+class ColumnarLog:
+    """Append-only, column-oriented store for the entries of one dataset.
+
+    Each display key in FIELDS is kept as a NumPy array: labels from a fixed
+    vocabulary become small integer codes and timestamps are parsed once into
+    datetime64. Labels outside the vocabulary are added as new categories, and
+    keys outside FIELDS are kept per row so entries round-trip unchanged.
+    """
+
+    __slots__ = ("_size", "_columns", "_categories", "_lookup", "_extras", "_date_index", "uid", "version")
+
+    FIELDS = {}  # display key -> (column kind, vocabulary for CATEGORY columns)
+    DATE_FIELD = None  # DATETIME key the per-date index is built on
+
+    def __init__(self, capacity=64):
+        self._size = 0
+        self._columns = {key: _empty(kind, capacity) for key, (kind, _) in self.FIELDS.items()}
+        self._categories = {
+            key: list(vocabulary) for key, (kind, vocabulary) in self.FIELDS.items() if kind == CATEGORY
+        }
+        self._lookup = {key: {label: code for code, label in enumerate(labels)} for key, labels in self._categories.items()}
+        self._extras = {}  # row -> keys not covered by FIELDS
+        self._date_index = None  # date -> rows on that date, built on first use
+        self.uid = next(_log_ids)
+        self.version = 0  # Bumped on every append so derived views know when to rebuild
+
+    @classmethod
+    def from_entries(cls, entries):
+        """Build a log from a list of entry dicts."""
+        entries = list(entries)
+        columns = {key: [entry.get(key) for entry in entries] for key in cls.FIELDS}
+        extras = [{k: v for k, v in entry.items() if k not in cls.FIELDS} for entry in entries]
+        return cls.from_columns(columns, extras)
+
+    @classmethod
+    def from_columns(cls, columns, extras=None):
+        """Build a log from one list of values per display key, converting each column in bulk."""
+        size = len(next(iter(columns.values()), []))
+        log = cls(capacity=max(size, 64))
+        for key, (kind, _) in cls.FIELDS.items():
+            values = columns.get(key, [None] * size)
+            if kind == CATEGORY:
+                log._columns[key][:size] = [-1 if value is None else log._code(key, value) for value in values]
+            elif kind in (FLOAT, INT):
+                log._columns[key][:size] = _parse_floats(values)
+            elif kind == DATETIME:
+                log._columns[key][:size] = _local_times(columns, values)
+            else:
+                log._columns[key][:size] = [_encode_id(value) for value in values]
+        log._extras = {row: extra for row, extra in enumerate(extras or []) if extra}
+        if ENTRY_ID in cls.FIELDS:
+            # IDs that do not fit the fixed-width column are kept verbatim with the row's extras
+            for row, value in enumerate(columns.get(ENTRY_ID, [])):
+                if value and not _encode_id(value):
+                    log._extras.setdefault(row, {})[ENTRY_ID] = value
+        log._size = size
+        return log
+
+    def cache_key(self):
+        """Identify this log's current contents for memoizing derived data."""
+        return (type(self).__name__, self.uid, self.version)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return (self[row] for row in range(self._size))
+
+    def __getitem__(self, row):
+        """Return entry `row` as the display dict the pages work with."""
+        if not 0 <= row < self._size:
+            raise IndexError(row)
+        entry = {}
+        for key, (kind, _) in self.FIELDS.items():
+            value = self._columns[key][row]
+            if kind == CATEGORY:
+                if value >= 0:
+                    entry[key] = self._categories[key][value]
+            elif kind == FLOAT:
+                if not np.isnan(value):
+                    entry[key] = float(value)
+            elif kind == INT:
+                if not np.isnan(value):
+                    entry[key] = int(value)
+            elif kind == DATETIME:
+                if not np.isnat(value):
+                    entry[key] = str(value.astype(datetime.datetime))
+            elif value:
+                entry[key] = value.decode("ascii")
+        entry.update(self._extras.get(row, {}))
+        return entry
+
+    def append(self, entry):
+        """Add one entry in amortized O(1)."""
+        if self._size == len(next(iter(self._columns.values()))):
+            self._grow()
+        row = self._size
+        for key, (kind, _) in self.FIELDS.items():
+            value = entry.get(key)
+            if kind == CATEGORY:
+                self._columns[key][row] = -1 if value is None else self._code(key, value)
+            elif kind in (FLOAT, INT):
+                self._columns[key][row] = np.nan if value is None else float(value)
+            elif kind == DATETIME:
+                self._columns[key][row] = _local_times({EPOCH: [entry.get(EPOCH)], UTC_OFFSET: [entry.get(UTC_OFFSET)]}, [value])[0]
+            else:
+                self._columns[key][row] = _encode_id(value)
+        extra = {k: v for k, v in entry.items() if k not in self.FIELDS}
+        if entry.get(ENTRY_ID) and ENTRY_ID in self.FIELDS and not _encode_id(entry[ENTRY_ID]):
+            extra[ENTRY_ID] = entry[ENTRY_ID]
+        if extra:
+            self._extras[row] = extra
+        self._size += 1
+        self.version += 1
+        if self._date_index is not None:
+            day = self._columns[self.DATE_FIELD][row]
+            if not np.isnat(day):
+                self._date_index.setdefault(_to_date(day), []).append(row)
+
+    def copy(self):
+        """Return an independent copy; appends to either log do not show up in the other."""
+        log = type(self)(capacity=1)
+        log._columns = {key: column.copy() for key, column in self._columns.items()}
+        log._categories = {key: list(labels) for key, labels in self._categories.items()}
+        log._lookup = {key: dict(codes) for key, codes in self._lookup.items()}
+        log._extras = dict(self._extras)
+        log._size = self._size
+        return log
+
+    def entry_ids(self):
+        """Return the set of entry IDs in the log."""
+        known = {value.decode("ascii") for value in self._columns[ENTRY_ID][: self._size] if value}
+        known.update(extra[ENTRY_ID] for extra in self._extras.values() if ENTRY_ID in extra)
+        return known
+
+    def extend_new(self, entries, known=None):
+        """Append the entries whose IDs are not in the log (or in `known`, kept up to date); return how many."""
+        known = self.entry_ids() if known is None else known
+        added = 0
+        for entry in entries:
+            if entry.get(ENTRY_ID) not in known:
+                self.append(entry)
+                known.add(entry.get(ENTRY_ID))
+                added += 1
+        return added
+
+    def with_new(self, entries, known=None):
+        """Return (log, added): a copy with the entries whose IDs are not in the log appended.
+
+        This log is left as it is, for readers on other threads; without new
+        entries it is returned itself. `known` is updated like in extend_new.
+        """
+        known = self.entry_ids() if known is None else known
+        if all(entry.get(ENTRY_ID) in known for entry in entries):
+            return self, 0
+        log = self.copy()
+        return log, log.extend_new(entries, known)
+
+    def _code(self, key, label):
+        code = self._lookup[key].get(label)
+        if code is None:
+            code = self._lookup[key][label] = len(self._categories[key])
+            self._categories[key].append(label)
+        return code
+
+    def _grow(self):
+        for key, column in self._columns.items():
+            grown = _empty(self.FIELDS[key][0], max(64, 2 * len(column)))
+            grown[: len(column)] = column
+            self._columns[key] = grown
+
+    def column(self, key):
+        """Return the raw array for a display key, trimmed to the stored entries."""
+        return self._columns[key][: self._size]
+
+    def categories(self, key):
+        """Return the labels behind a CATEGORY column's codes."""
+        return list(self._categories[key])
+
+    def _index(self):
+        """Return the date -> rows index, building it with one sort on first use."""
+        if self._date_index is None:
+            days = self.column(self.DATE_FIELD).astype("datetime64[D]")
+            valid = np.flatnonzero(~np.isnat(days))
+            order = valid[np.argsort(days[valid], kind="stable")]
+            unique, starts = np.unique(days[order], return_index=True)
+            bounds = list(starts[1:]) + [len(order)]
+            self._date_index = {
+                day: order[start:end].tolist() for day, start, end in zip(unique.astype(object), starts, bounds)
+            }
+        return self._date_index
+
+    def dates(self):
+        """Return the dates that have entries, oldest first."""
+        return sorted(self._index())
+
+    def rows_on(self, date):
+        """Return the rows logged on `date`, in insertion order."""
+        return np.array(self._index().get(date, []), dtype=np.int64)
+
+    def to_frame(self, rows=None):
+        """Build a DataFrame with categorical label columns and parsed timestamps.
+
+        Pass `rows` to materialize only those entries (e.g. from `rows_on`).
+        """
+        import pandas as pd  # Deferred: only the pages that show tables need pandas
+
+        data = {}
+        for key, (kind, _) in self.FIELDS.items():
+            if key in HIDDEN:
+                continue
+            column = self.column(key)
+            if rows is not None:
+                column = column[rows]
+            if kind == CATEGORY:
+                data[key] = pd.Categorical.from_codes(column, categories=self._categories[key])
+            elif kind == ID:
+                data[key] = column.astype(str)
+            else:
+                data[key] = column
+        frame = pd.DataFrame(data, index=rows)
+        self._add_derived(frame, rows)
+        return frame
+
+    def day_frame(self, date):
+        """DataFrame of the entries logged on `date`, without scanning the other days."""
+        return self.to_frame(self.rows_on(date))
+
+    def _add_derived(self, frame, rows):
+        """Hook for subclasses to add numeric columns derived from the codes."""
+
+
+class EnergyLog(ColumnarLog):
+    """Energy entries: time block, energy level and activity as codes, plus timestamps."""
+
+    __slots__ = ()
+    DATE_FIELD = "Timestamp"
+
+    FIELDS = {
+        "Time Block": (CATEGORY, get_time_blocks()),
+        "Energy Level": (CATEGORY, get_energy_levels()),
+        "Activity Type": (CATEGORY, get_activity_list()),
+        "Timestamp": (DATETIME, None),
+        ENTRY_ID: (ID, None),
+        EPOCH: (FLOAT, None),
+        UTC_OFFSET: (INT, None),
+        START_HOUR: (INT, None),
+        END_HOUR: (INT, None),
+        ENERGY_CODE: (INT, None),
+        VERSION: (INT, None),
+    }
+
+    def energy_scores(self, rows=None):
+        """Energy as 1-5 (NaN for labels outside the known scale), stored at write time."""
+        return self.column(ENERGY_CODE) if rows is None else self.column(ENERGY_CODE)[rows]
+
+    def start_hours(self, rows=None):
+        """24-hour start of each entry's time block (NaN for unknown blocks)."""
+        return self.column(START_HOUR) if rows is None else self.column(START_HOUR)[rows]
+
+    def _add_derived(self, frame, rows):
+        frame["Energy Numeric"] = self.energy_scores(rows)  # Energy Code, under the name the charts use
+
+
+class SleepLog(ColumnarLog):
+    """Sleep entries: bedtime and wake-up as codes, duration and timestamp as numbers."""
+
+    __slots__ = ()
+    DATE_FIELD = "Timestamp"
+
+    FIELDS = {
+        "Sleep Start": (CATEGORY, get_sleep_start_times()),
+        "Wake Up": (CATEGORY, get_wake_up_times()),
+        "Duration (hrs)": (FLOAT, None),
+        "Timestamp": (DATETIME, None),
+        ENTRY_ID: (ID, None),
+        EPOCH: (FLOAT, None),
+        UTC_OFFSET: (INT, None),
+        START_MINUTE: (INT, None),
+        WAKE_MINUTE: (INT, None),
+        VERSION: (INT, None),
+    }
+
+
+class TaskLog(ColumnarLog):
+    """Task entries: task type and length as codes."""
+
+    __slots__ = ()
+
+    FIELDS = {
+        "Task Type": (CATEGORY, get_task_types()),
+        "Task Length": (CATEGORY, get_task_lengths()),
+        ENTRY_ID: (ID, None),
+        VERSION: (INT, None),
+    }
+
+
+LOG_TYPES = {ENERGY: EnergyLog, SLEEP: SleepLog, TASKS: TaskLog}
+
+
+def load_log(storage, kind, start=None, end=None):
+    """Load a dataset (optionally one date range of it) from storage straight into its columnar log."""
+    columns, extras = storage.load_columns(kind, start, end)
+    with metrics.span("log_build", kind=kind):
+        return LOG_TYPES[kind].from_columns(columns, extras)
+
+
+def _empty(kind, capacity):
+    if kind == CATEGORY:
+        return np.full(capacity, -1, dtype=np.int16)
+    if kind in (FLOAT, INT):
+        return np.full(capacity, np.nan, dtype=np.float64)
+    if kind == DATETIME:
+        return np.full(capacity, np.datetime64("NaT"), dtype="datetime64[us]")
+    return np.zeros(capacity, dtype=f"S{ID_WIDTH}")
+
+
+def _to_date(day):
+    """Convert a datetime64 value to a datetime.date."""
+    return datetime.date.fromisoformat(str(np.datetime64(day, "D")))
+
+
+def _encode_id(value):
+    """Encode an ID for the fixed-width column; empty if missing or too long to fit."""
+    if not value:
+        return b""
+    try:
+        encoded = value.encode("ascii")
+    except UnicodeEncodeError:
+        return b""
+    return encoded if len(encoded) <= ID_WIDTH else b""
+
+
+def _parse_floats(values):
+    """Convert values to float64 in bulk; unparseable or missing values become NaN."""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([_parse_float(value) for value in values], dtype=np.float64)
+
+
+def _parse_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _local_times(columns, timestamps):
+    """Local datetime64 values from the numeric Epoch and UTC Offset columns.
+
+    Only rows written before those fields existed fall back to parsing the Timestamp strings.
+    """
+    epochs = _parse_floats(columns.get(EPOCH) or [None] * len(timestamps))
+    offsets = _parse_floats(columns.get(UTC_OFFSET) or [None] * len(timestamps))
+    seconds = epochs + offsets * 60
+    known = ~np.isnan(seconds)
+    result = np.full(len(timestamps), np.datetime64("NaT"), dtype="datetime64[us]")
+    result[known] = np.rint(seconds[known] * 1e6).astype(np.int64).astype("datetime64[us]")
+    if not known.all():
+        missing = np.flatnonzero(~known)
+        result[missing] = _parse_timestamps([timestamps[row] for row in missing])
+    return result
+
+
+def _parse_timestamps(values):
+    """Parse ISO timestamp strings in bulk; unparseable or missing values become NaT."""
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")  # NumPy only warns on timezone offsets; convert those below
+            return np.array(values, dtype="datetime64[us]")
+    except (TypeError, ValueError, DeprecationWarning, UserWarning):
+        return np.array([_parse_timestamp(value) for value in values], dtype="datetime64[us]")
+
+
+def _parse_timestamp(value):
+    try:
+        parsed = datetime.datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        return np.datetime64("NaT")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)  # Stored timestamps are local time
+    return np.datetime64(parsed, "us")
@@ -0,0 +1,36 @@
+import math
+import streamlit as st
+from model import LOG_TYPES
+
+PAGE_SIZES = [10, 25, 50, 100]
+ALL = "All"
+
+
+def record_page(storage, kind, key, filter_keys=()):
+    """Render filter and page controls for a dataset and return the visible window.
+
+    Returns (entries, offset, total): only the selected page is read from
+    storage, newest first, so long histories never reach the browser whole.
+    """
+    filters = {}
+    if filter_keys:
+        cols = st.columns(len(filter_keys))
+        for col, filter_key in zip(cols, filter_keys):
+            options = [ALL] + list(LOG_TYPES[kind].FIELDS[filter_key][1])
+            choice = col.selectbox(filter_key, options, key=f"{key}_filter_{filter_key}")
+            if choice != ALL:
+                filters[filter_key] = choice
+
+    size_col, page_col = st.columns(2)
+    page_size = size_col.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+    _, total = storage.load_page(kind, limit=0, filters=filters)  # Count only
+    pages = max(1, math.ceil(total / page_size))
+    # Filters or page size may have shrunk the page count since the last rerun
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    page = page_col.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+    st.caption(f"Page {page} of {pages} · {total} records, newest first")
+
+    offset = (page - 1) * page_size
+    entries, total = storage.load_page(kind, offset=offset, limit=page_size, filters=filters)
+    return entries, offset, total
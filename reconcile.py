@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from journal import Journal, merge_entries
+from storage import entry_key
+from sync import MAX_BACKOFF, REMOTE_PATHS, remote_paths
+from users import DEFAULT_USER, user_dir
+
+RECONCILE_INTERVAL = 60.0  # Seconds between pulls while GitHub is reachable
+
+logger = logging.getLogger(__name__)
+
+
+def remote_journals(contents, user_id, kind):
+    """Journals holding one of a user's datasets (the default user also owns the pre-partitioning files)."""
+    journals = [Journal(contents, remote_paths(user_id)[kind])]
+    if user_id == DEFAULT_USER:
+        journals.append(Journal(contents, REMOTE_PATHS[kind]))
+    return journals
+
+
+class Reconciler:
+    """Keeps a user's local store and their data on GitHub converged.
+
+    Pages only ever read the local store. Each pass pulls what changed on
+    GitHub and imports entries the local store has not seen, then queues
+    local entries GitHub is missing (e.g. saved while no token was
+    configured, or lost from the sync queue) on the write-behind `sync`.
+    Both directions merge by entry ID, so an outage can delay a pass but
+    never drop or overwrite entries. Failed passes are retried with
+    exponential backoff.
+
+    Pulls are incremental: the latest commit touching the user's files is
+    checked first (one request, a 304 while nothing changed), and when it
+    moved only chunk and segment files not read before are fetched.
+    """
+
+    def __init__(self, storage, contents, user_id, sync=None, interval=RECONCILE_INTERVAL, max_backoff=MAX_BACKOFF):
+        self.storage = storage
+        self.contents = contents
+        self.user_id = user_id
+        self.sync = sync
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._last_success = None
+        self._last_error = None
+        self._commits = None  # Latest commits seen on the user's paths, None before the first pull
+        self._cursors = {}  # (kind, journal index) -> Journal.load_since cursor
+        self._remote_ids = {kind: set() for kind in REMOTE_PATHS}  # Entry IDs known to be on GitHub
+        self._thread = threading.Thread(target=self._run, name=f"reconcile-{user_id}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _paths(self):
+        paths = [user_dir(self.user_id)]
+        if self.user_id == DEFAULT_USER:
+            paths += list(REMOTE_PATHS.values())
+        return paths
+
+    def _pull(self, kind):
+        """Fetch the entries added to one dataset since the last pull; return (entries, new cursors)."""
+        entries, cursors = [], {}
+        for index, journal in enumerate(remote_journals(self.contents, self.user_id, kind)):
+            new, cursors[(kind, index)] = journal.load_since(self._cursors.get((kind, index)))
+            entries = merge_entries(entries, new)
+        return entries, cursors
+
+    def reconcile(self):
+        """Run one pull + push pass over every dataset; return {kind: (pulled, pushed)}.
+
+        A dataset whose pull fails is skipped and the error raised once the
+        others are done; its cursors stay put, so the next pass fetches the
+        same files again.
+        """
+        counts = {}
+        failure = None
+        with metrics.span("reconcile"):
+            # Snapshot local state before pulling: entries pushed meanwhile then show up in the pull
+            local = {kind: self.storage.entry_ids(kind) for kind in REMOTE_PATHS} if self.sync else {}
+            queued = {kind: self.sync.queued_ids(self.user_id, kind) for kind in REMOTE_PATHS} if self.sync else {}
+            commits = [self.contents.latest_commit(path) for path in self._paths()]
+            changed = None in commits or commits != self._commits
+            if changed:
+                # Fetch all datasets at once so a pass costs about one round-trip
+                with ThreadPoolExecutor(max_workers=len(REMOTE_PATHS)) as pool:
+                    pulls = {kind: pool.submit(self._pull, kind) for kind in REMOTE_PATHS}
+            for kind in REMOTE_PATHS:
+                remote, cursors = [], {}
+                if changed:
+                    try:
+                        remote, cursors = pulls[kind].result()
+                    except Exception as e:
+                        logger.warning("Failed to pull %s for user %s: %s", kind, self.user_id, e)
+                        failure = failure or e
+                        continue
+                pulled = self.storage.import_remote(kind, remote)
+                # Advance only once the entries are committed locally
+                self._cursors.update(cursors)
+                self._remote_ids[kind].update(entry_key(entry) for entry in remote)
+                pushed = 0
+                if self.sync is not None:
+                    missing = local[kind] - self._remote_ids[kind] - queued[kind]
+                    if missing:
+                        entries = [
+                            entry for batch in self.storage.iter_batches(kind)
+                            for entry in batch if entry_key(entry) in missing
+                        ]
+                        self.sync.enqueue(kind, entries, self.user_id)
+                        pushed = len(entries)
+                metrics.count("reconcile_entries_total", pulled, kind=kind, direction="pulled")
+                metrics.count("reconcile_entries_total", pushed, kind=kind, direction="pushed")
+                counts[kind] = (pulled, pushed)
+        if failure is not None:
+            raise failure  # Commits stay unrecorded, so the next pass pulls again
+        with self._lock:
+            self._commits = commits
+            self._failures = 0
+            self._last_error = None
+            self._last_success = time.time()
+        return counts
+
+    def status(self):
+        """Return a snapshot of the reconciler state for display."""
+        with self._lock:
+            return {
+                "failures": self._failures,
+                "last_success": self._last_success,
+                "last_error": self._last_error,
+            }
+
+    def _run(self):
+        while True:
+            try:
+                counts = self.reconcile()
+                if any(pulled or pushed for pulled, pushed in counts.values()):
+                    logger.info("Reconciled user %s with GitHub: %s", self.user_id, counts)
+                delay = self.interval
+            except Exception as e:
+                logger.exception("Failed to reconcile user %s with GitHub", self.user_id)
+                with self._lock:
+                    self._failures += 1
+                    self._last_error = str(e)
+                    delay = min(self.max_backoff, 2 ** self._failures)
+            time.sleep(delay)
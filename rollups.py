@@ -0,0 +1,135 @@
+import datetime
+
+from vocabulary import get_energy_mapping
+
+# Periods and dimensions kept in the rollup table
+DAY = "day"
+WEEK = "week"
+ALL = "all"              # Totals for the whole period
+TIME_BLOCK = "time_block"
+ACTIVITY = "activity"
+
+CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS rollups (
+    period TEXT NOT NULL,          -- 'day' or 'week'
+    bucket TEXT NOT NULL,          -- '2024-12-05' or '2024-W49'
+    dimension TEXT NOT NULL,       -- 'all', 'time_block' or 'activity'
+    value TEXT NOT NULL,           -- time block / activity, '' for 'all'
+    entries INTEGER NOT NULL DEFAULT 0,
+    energy_sum REAL NOT NULL DEFAULT 0,
+    energy_entries INTEGER NOT NULL DEFAULT 0,
+    sleep_hours REAL NOT NULL DEFAULT 0,
+    sleep_entries INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (period, bucket, dimension, value)
+)
+"""
+
+UPSERT_SQL = """
+INSERT INTO rollups (period, bucket, dimension, value, entries, energy_sum, energy_entries, sleep_hours, sleep_entries)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (period, bucket, dimension, value) DO UPDATE SET
+    entries = entries + excluded.entries,
+    energy_sum = energy_sum + excluded.energy_sum,
+    energy_entries = energy_entries + excluded.energy_entries,
+    sleep_hours = sleep_hours + excluded.sleep_hours,
+    sleep_entries = sleep_entries + excluded.sleep_entries
+"""
+
+
+SUMMARIES_SQL = """
+CREATE TABLE IF NOT EXISTS summaries (
+    period TEXT NOT NULL,          -- 'day' or 'week'
+    bucket TEXT NOT NULL,          -- as in rollups
+    data TEXT NOT NULL,            -- JSON from period_summary
+    computed_at REAL NOT NULL,
+    PRIMARY KEY (period, bucket)
+)
+"""
+
+
+def buckets(timestamp):
+    """Return {period: bucket} for a timestamp string, or None if it cannot be parsed."""
+    try:
+        day = datetime.datetime.fromisoformat(str(timestamp)).date()
+    except (TypeError, ValueError):
+        return None
+    year, week, _ = day.isocalendar()
+    return {DAY: day.isoformat(), WEEK: f"{year}-W{week:02d}"}
+
+
+def _add(totals, key, values):
+    current = totals.setdefault(key, [0, 0.0, 0, 0.0, 0])
+    for i, value in enumerate(values):
+        current[i] += value
+
+
+def energy_deltas(entries):
+    """Aggregate energy entries into rollup increments keyed by (period, bucket, dimension, value).
+
+    Each increment is [entries, energy_sum, energy_entries, sleep_hours, sleep_entries].
+    """
+    energy_mapping = get_energy_mapping()
+    totals = {}
+    for entry in entries:
+        periods = buckets(entry.get("Timestamp"))
+        if periods is None:
+            continue
+        score = energy_mapping.get(entry.get("Energy Level"))
+        values = [1, score or 0.0, 1 if score else 0, 0.0, 0]
+        for period, bucket in periods.items():
+            _add(totals, (period, bucket, ALL, ""), values)
+            _add(totals, (period, bucket, TIME_BLOCK, entry.get("Time Block") or ""), values)
+            _add(totals, (period, bucket, ACTIVITY, entry.get("Activity Type") or ""), values)
+    return totals
+
+
+def sleep_deltas(entries):
+    """Aggregate sleep entries into rollup increments, like energy_deltas."""
+    totals = {}
+    for entry in entries:
+        periods = buckets(entry.get("Timestamp"))
+        if periods is None:
+            continue
+        hours = entry.get("Duration (hrs)")
+        values = [0, 0.0, 0, float(hours or 0.0), 1 if hours is not None else 0]
+        for period, bucket in periods.items():
+            _add(totals, (period, bucket, ALL, ""), values)
+    return totals
+
+
+def apply(conn, totals):
+    """Add rollup increments; call inside the transaction that stores the entries."""
+    rows = [key + tuple(values) for key, values in totals.items()]
+    if rows:
+        conn.executemany(UPSERT_SQL, rows)
+
+
+def summarize(row):
+    """Turn a rollup row into the summary dict dashboards read."""
+    period, bucket, dimension, value, entries, energy_sum, energy_entries, sleep_hours, sleep_entries = row
+    return {
+        "period": period,
+        "bucket": bucket,
+        "dimension": dimension,
+        "value": value,
+        "entries": entries,
+        "mean_energy": energy_sum / energy_entries if energy_entries else None,
+        "sleep_hours": sleep_hours,
+        "sleep_entries": sleep_entries,
+    }
+
+
+def period_summary(totals, by_block, by_activity):
+    """Digest of one day or week from its rollup summaries (dimension 'all', 'time_block', 'activity')."""
+    blocks = [row for row in by_block if row["mean_energy"] is not None]
+    activities = [row for row in by_activity if row["mean_energy"] is not None]
+    energy = lambda row: row["mean_energy"]
+    total = totals[0] if totals else None
+    return {
+        "entries": total["entries"] if total else 0,
+        "mean_energy": total["mean_energy"] if total else None,
+        "sleep_hours": total["sleep_hours"] if total else 0.0,
+        "best_time_block": max(blocks, key=energy)["value"] if blocks else None,
+        "worst_time_block": min(blocks, key=energy)["value"] if blocks else None,
+        "top_activity": max(activities, key=energy)["value"] if activities else None,
+    }
@@ -0,0 +1,242 @@
+"""Background jobs that take expensive work off the page render path.
+
+Per user:
+    daily_summary    digest of yesterday from the rollups (see rollups.period_summary)
+    weekly_summary   digest of last ISO week
+    compact          VACUUM and planner statistics for the local store, off-peak only
+    warm_view        build the View page's first screen into its caches, hourly, for users a session
+                     has open (inside the app only)
+
+Every run is recorded in a small SQLite job table keyed by (job, run key),
+e.g. ("daily_summary:1", "2024-12-05#42"). A run is claimed there before it
+starts, so each key runs once even with several scheduler processes, and
+a failed run is retried up to MAX_ATTEMPTS times. Summary keys end in the
+number of entries rolled up into the period, so entries that arrive late
+(sync, reconcile, bulk import) make the summary run again. Records older
+than RETENTION are pruned.
+
+Usage:
+    python scheduler.py           # Run due jobs every TICK seconds
+    python scheduler.py --once    # Run what is due now and exit
+"""
+import argparse
+import datetime
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+import rollups
+from storage import SQLiteStorage
+from users import list_users, user_db_path
+
+JOBS_DB_PATH = "database/jobs.db"
+TICK = 60.0                 # Seconds between checks for due jobs
+MAX_WORKERS = 2             # Jobs running at once; pages share the CPU and the storage locks
+LEASE = 30 * 60.0           # A run still marked running after this long is presumed dead
+MAX_ATTEMPTS = 3
+OFF_PEAK_HOURS = range(2, 5)  # Local hours in which compaction may run
+RETENTION = 14 * 24 * 3600.0  # Seconds job records are kept; longer than any key stays due
+
+logger = logging.getLogger(__name__)
+
+CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS jobs (
+    name TEXT NOT NULL,
+    run_key TEXT NOT NULL,
+    status TEXT NOT NULL,          -- 'running', 'done' or 'failed'
+    attempts INTEGER NOT NULL DEFAULT 0,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT,
+    PRIMARY KEY (name, run_key)
+)
+"""
+
+
+class JobStore:
+    """Job run records shared by every scheduler process through one SQLite file."""
+
+    def __init__(self, path=JOBS_DB_PATH, lease=LEASE):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lease = lease
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(CREATE_SQL)
+
+    def claim(self, name, run_key):
+        """Mark a run as started; False if it is done, running elsewhere or out of attempts."""
+        now = time.time()
+        with self._lock, self._conn:
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (name, run_key, status, attempts, started_at) VALUES (?, ?, 'running', 1, ?)",
+                (name, run_key, now),
+            ).rowcount
+            if inserted:
+                return True
+            # A single UPDATE, so two processes cannot both take over the same run
+            return bool(self._conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, error = NULL "
+                "WHERE name = ? AND run_key = ? AND attempts < ? "
+                "AND (status = 'failed' OR (status = 'running' AND started_at < ?))",
+                (now, name, run_key, MAX_ATTEMPTS, now - self.lease),
+            ).rowcount)
+
+    def finish(self, name, run_key, error=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE name = ? AND run_key = ?",
+                ("failed" if error else "done", time.time(), error, name, run_key),
+            )
+
+    def prune(self, max_age=RETENTION):
+        """Delete records of runs started more than `max_age` seconds ago; return how many."""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE status != 'running' AND started_at < ?", (time.time() - max_age,)
+            ).rowcount
+
+    def recent(self, limit=20):
+        """Return the latest runs as dicts, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, run_key, status, attempts, started_at, finished_at, error FROM jobs "
+                "ORDER BY started_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        keys = ["name", "run_key", "status", "attempts", "started_at", "finished_at", "error"]
+        return [dict(zip(keys, row)) for row in rows]
+
+
+# Jobs
+def summarize(storage, period, bucket):
+    """Compute and store the digest of one day or week."""
+    rows = {
+        dimension: storage.load_rollups(period, dimension, start=bucket, end=bucket)
+        for dimension in (rollups.ALL, rollups.TIME_BLOCK, rollups.ACTIVITY)
+    }
+    storage.save_summary(
+        period, bucket, rollups.period_summary(rows[rollups.ALL], rows[rollups.TIME_BLOCK], rows[rollups.ACTIVITY])
+    )
+
+
+def revision(storage, period, bucket):
+    """Entries rolled up into a day or week so far; a late entry changes it."""
+    rows = storage.load_rollups(period, rollups.ALL, start=bucket, end=bucket)
+    return sum(row["entries"] + row["sleep_entries"] for row in rows)
+
+
+def _day(moment):
+    return (moment.date() - datetime.timedelta(days=1)).isoformat()
+
+
+def _week(moment):
+    year, week, _ = (moment.date() - datetime.timedelta(days=7)).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class Scheduler:
+    """Runs each user's due jobs on a small thread pool.
+
+    `open_storage(user_id)` returns the user's store; inside the app it is
+    the same cached store the pages use. `warm(user_id)`, if given, fills
+    the View page caches, which only exist in the app process.
+    """
+
+    def __init__(self, open_storage, jobs=None, users=list_users, warm=None, max_workers=MAX_WORKERS, tick=TICK):
+        self.open_storage = open_storage
+        self.jobs = jobs or JobStore()
+        self.users = users
+        self.warm = warm
+        self.tick = tick
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def due(self, now=None):
+        """Return (name, run key, function) for every job due at `now` (local time)."""
+        now = now or datetime.datetime.now()
+        runs = []
+        day, week = _day(now), _week(now)
+        for user_id in self.users():
+            storage = self.open_storage(user_id)
+            runs.append((f"daily_summary:{user_id}", f"{day}#{revision(storage, rollups.DAY, day)}",
+                         lambda storage=storage: summarize(storage, rollups.DAY, day)))
+            runs.append((f"weekly_summary:{user_id}", f"{week}#{revision(storage, rollups.WEEK, week)}",
+                         lambda storage=storage: summarize(storage, rollups.WEEK, week)))
+            if now.hour in OFF_PEAK_HOURS:
+                runs.append((f"compact:{user_id}", now.date().isoformat(), storage.compact))
+            if self.warm is not None:
+                hour = now.replace(minute=0, second=0, microsecond=0)  # Once an hour
+                runs.append((f"warm_view:{user_id}", hour.isoformat(timespec="minutes"),
+                             lambda user_id=user_id: self.warm(user_id)))
+        return runs
+
+    def run_pending(self, now=None):
+        """Start every due job not yet run for its key; return their futures."""
+        self.jobs.prune()
+        futures = []
+        for name, run_key, job in self.due(now):
+            if self.jobs.claim(name, run_key):
+                futures.append(self._pool.submit(self._execute, name, run_key, job))
+        return futures
+
+    def _execute(self, name, run_key, job):
+        try:
+            with metrics.span("job", job=name.split(":")[0]):
+                job()
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", name, run_key)
+            self.jobs.finish(name, run_key, error=str(e) or type(e).__name__)
+        else:
+            self.jobs.finish(name, run_key)
+
+    def _run(self):
+        while True:
+            time.sleep(self.tick)  # First pass one tick after start, off the app's cold-start path
+            try:
+                self.run_pending()
+            except Exception:
+                logger.exception("Failed to schedule jobs")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run summaries and storage compaction in the background.")
+    parser.add_argument("--once", action="store_true", help="Run the jobs due now and exit")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    stores = {}
+    lock = threading.Lock()
+
+    def open_storage(user_id):
+        with lock:
+            if user_id not in stores:
+                stores[user_id] = SQLiteStorage(user_db_path(user_id))
+            return stores[user_id]
+
+    scheduler = Scheduler(open_storage)
+    if args.once:
+        for future in scheduler.run_pending():
+            future.result()
+        for run in scheduler.jobs.recent():
+            print(f"{run['name']} {run['run_key']}: {run['status']}" + (f" ({run['error']})" if run["error"] else ""))
+        return
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Versioned entry schema: numeric fields stored next to the display labels at write time.
+
+Version 1 entries carry only labels ("10–12 PM", "Energized 🚀") and a
+local timestamp string, so every read had to parse them. Version 2 adds:
+
+    Epoch          seconds since 1970-01-01 UTC
+    UTC Offset     minutes east of UTC on the device that logged the entry
+    Start Hour     24-hour start of the energy entry's time block
+    End Hour       24-hour end of the time block
+    Energy Code    energy level as a 1-5 score
+    Start Minute   bedtime as minutes after midnight (sleep)
+    Wake Minute    wake-up time as minutes after midnight (sleep)
+
+`upgrade_*` bring an entry of any older version up to SCHEMA_VERSION and
+leave current entries untouched; the storage layer applies them to every
+write, and `migrate.py` applies them to existing files.
+"""
+import datetime
+
+from vocabulary import get_energy_mapping, get_time_block_hours
+
+SCHEMA_VERSION = 2
+
+VERSION = "Schema"
+EPOCH = "Epoch"
+UTC_OFFSET = "UTC Offset"
+START_HOUR = "Start Hour"
+END_HOUR = "End Hour"
+ENERGY_CODE = "Energy Code"
+START_MINUTE = "Start Minute"
+WAKE_MINUTE = "Wake Minute"
+
+# Numeric fields the tables leave out: the labels and Timestamp next to them say the same thing
+HIDDEN = {VERSION, EPOCH, UTC_OFFSET, END_HOUR, ENERGY_CODE, START_MINUTE, WAKE_MINUTE}
+
+
+def now_fields(moment=None):
+    """Timestamp fields for an entry logged at `moment` (default: now), as the pages store them."""
+    moment = (moment or datetime.datetime.now()).astimezone()
+    return {
+        "Timestamp": str(moment.replace(tzinfo=None)),  # Local wall-clock time, as displayed
+        EPOCH: round(moment.timestamp(), 6),
+        UTC_OFFSET: int(moment.utcoffset().total_seconds() // 60),
+    }
+
+
+def clock_minutes(value):
+    """Minutes after midnight for an "HH:MM" string, or None if it does not parse."""
+    try:
+        hours, minutes = str(value).split(":")
+        return int(hours) * 60 + int(minutes)
+    except (TypeError, ValueError):
+        return None
+
+
+def sleep_hours(start_minute, wake_minute):
+    """Hours between a bedtime and a wake-up time, wrapping past midnight."""
+    return round((wake_minute - start_minute) % (24 * 60) / 60, 2)
+
+
+def _timestamp_fields(entry):
+    """Epoch and offset for an entry's Timestamp; naive timestamps are local time on this machine."""
+    try:
+        parsed = datetime.datetime.fromisoformat(str(entry.get("Timestamp")))
+    except ValueError:
+        return {}
+    parsed = parsed.astimezone()
+    return {EPOCH: round(parsed.timestamp(), 6), UTC_OFFSET: int(parsed.utcoffset().total_seconds() // 60)}
+
+
+def _upgraded(entry, fields):
+    upgraded = dict(entry)
+    for key, value in fields.items():
+        if value is not None:
+            upgraded.setdefault(key, value)  # Fields already present (e.g. set by the page) win
+    upgraded[VERSION] = SCHEMA_VERSION
+    return upgraded
+
+
+def upgrade_energy(entry):
+    if entry.get(VERSION) == SCHEMA_VERSION:
+        return entry
+    start, end = get_time_block_hours().get(entry.get("Time Block"), (None, None))
+    fields = {START_HOUR: start, END_HOUR: end, ENERGY_CODE: get_energy_mapping().get(entry.get("Energy Level"))}
+    if entry.get("Timestamp"):
+        fields.update(_timestamp_fields(entry))
+    return _upgraded(entry, fields)
+
+
+def upgrade_sleep(entry):
+    if entry.get(VERSION) == SCHEMA_VERSION:
+        return entry
+    start, wake = clock_minutes(entry.get("Sleep Start")), clock_minutes(entry.get("Wake Up"))
+    fields = {START_MINUTE: start, WAKE_MINUTE: wake}
+    if start is not None and wake is not None:
+        fields["Duration (hrs)"] = sleep_hours(start, wake)
+    if entry.get("Timestamp"):
+        fields.update(_timestamp_fields(entry))
+    return _upgraded(entry, fields)
+
+
+def upgrade_task(entry):
+    if entry.get(VERSION) == SCHEMA_VERSION:
+        return entry
+    return _upgraded(entry, {})
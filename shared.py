@@ -0,0 +1,213 @@
+"""Datasets shared by every Streamlit session in the process, with a light view per session.
+
+Each user's energy, sleep and task logs are loaded once and kept current
+from the storage listener (saves from any session) and the reconciler's
+imports, and reloaded when another process (e.g. bulk.py) writes to the
+store. Sessions no longer hold private copies: a SessionView reads the
+shared log and only keeps entries its session appended that the shared
+log does not have yet. While it has such entries it reads a private copy,
+so one session's unsaved entries never leak into another's.
+
+The shared log is never changed in place: new entries go into a copy that
+replaces it (with a new uid, so caches keyed on it rebuild), and readers
+on other threads keep the log they were handed.
+
+Views count as references on their dataset. Sessions idle for longer than
+`idle_timeout` are released, and a dataset nobody references is dropped,
+so memory follows the number of active users rather than sessions.
+"""
+import threading
+import time
+
+import metrics
+from model import load_log
+from storage import entry_key
+
+IDLE_TIMEOUT = 30 * 60.0  # Seconds without a rerun before a session's views are released
+COLLECT_INTERVAL = 60.0   # Seconds between idle-session sweeps
+
+
+class SharedDataset:
+    """One user's dataset, loaded on first use and replaced by an extended copy as entries are saved or pulled."""
+
+    def __init__(self, storage, kind):
+        self.storage = storage
+        self.kind = kind
+        self.refs = 0
+        self.log = None
+        self._ids = set()
+        self._version = None
+        self._data_version = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        # Versions are read first: writes racing the load are applied again by the next refresh
+        self._version = self.storage.remote_version(self.kind)
+        self._data_version = self.storage.data_version()
+        self.log = load_log(self.storage, self.kind)
+        self._ids = self.log.entry_ids()
+
+    def contains(self, entry):
+        return entry_key(entry) in self._ids
+
+    def add(self, entries):
+        """Append entries the log does not have yet (by ID); return how many were added."""
+        with self._lock:
+            if self.log is None:
+                return 0  # Not loaded yet; the load reads them from the store
+            return self._extend(entries)
+
+    def _extend(self, entries):
+        # Call with the lock held; the log is published before the IDs, so contains() never runs ahead of it
+        ids = set(self._ids)
+        log, added = self.log.with_new(entries, ids)
+        self.log, self._ids = log, ids
+        return added
+
+    def refresh(self):
+        """Load on first use, then apply what was written since the last call.
+
+        Entries the reconciler imported are appended; a write from another
+        process (bulk import, migration) makes the log reload.
+        """
+        if (self.log is not None and self.storage.remote_version(self.kind) == self._version
+                and self.storage.data_version() == self._data_version):
+            return
+        with self._lock:
+            # Readers keep the log they hold; new reads get the reloaded one
+            if self.log is None or self.storage.data_version() != self._data_version:
+                self._load()
+                return
+            version = self.storage.remote_version(self.kind)
+            if version == self._version:
+                return
+            pulled = self.storage.imported_since(self.kind, self._version)
+            self._version = version
+            if pulled is None:
+                self._load()
+            else:
+                self._extend(pulled)
+
+
+class SessionView:
+    """A session's read view of a SharedDataset plus the entries the session appended itself.
+
+    Supports everything pages do with a log: reads are forwarded to the
+    shared log, and `append` stays local until the shared log has the entry.
+    """
+
+    def __init__(self, dataset):
+        self._dataset = dataset
+        self._pending = []
+        self._private = None  # Copy of the shared log with the pending entries, built on demand
+
+    def append(self, entry):
+        self._pending.append(entry)
+        self._private = None
+
+    def _log(self):
+        if self._pending:
+            self._pending = [entry for entry in self._pending if not self._dataset.contains(entry)]
+            if not self._pending:
+                self._private = None
+        if not self._pending:
+            return self._dataset.log
+        if self._private is None:
+            self._private = self._dataset.log.copy()
+            for entry in self._pending:
+                self._private.append(entry)
+        return self._private
+
+    def __getattr__(self, name):
+        return getattr(self._log(), name)
+
+    def __len__(self):
+        return len(self._log())
+
+    def __iter__(self):
+        return iter(self._log())
+
+    def __getitem__(self, row):
+        return self._log()[row]
+
+
+class DatasetRegistry:
+    """Hands out SessionViews of the process-wide datasets and evicts idle sessions."""
+
+    def __init__(self, idle_timeout=IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._datasets = {}  # (user_id, kind) -> SharedDataset
+        self._sessions = {}  # session ID -> {"seen": time, "views": {(user_id, kind): SessionView}}
+        self._listening = set()  # ids of storages whose writes are applied to the datasets
+        self._lock = threading.Lock()
+        self._last_collect = time.monotonic()
+
+    def view(self, session_id, user_id, storage, kind):
+        """Return the session's view of a user's dataset, loading the dataset on first use."""
+        self.collect()
+        key = (user_id, kind)
+        with self._lock:
+            session = self._sessions.setdefault(session_id, {"seen": 0.0, "views": {}})
+            session["seen"] = time.monotonic()
+            view = session["views"].get(key)
+            if view is None:
+                if id(storage) not in self._listening:
+                    storage.add_listener(lambda kind, entries: self._written(user_id, kind, entries))
+                    self._listening.add(id(storage))
+                dataset = self._datasets.get(key)
+                if dataset is None:
+                    dataset = self._datasets[key] = SharedDataset(storage, kind)
+                dataset.refs += 1
+                view = session["views"][key] = SessionView(dataset)
+            self._gauges()
+        # Loads outside the registry lock; concurrent first visits share one load under the dataset's lock
+        view._dataset.refresh()
+        return view
+
+    def loaded(self, user_id, kind):
+        """Return a dataset's shared log, brought up to date, if some session has it loaded; else None."""
+        with self._lock:
+            dataset = self._datasets.get((user_id, kind))
+        if dataset is None or dataset.log is None:
+            return None
+        dataset.refresh()
+        return dataset.log
+
+    def _written(self, user_id, kind, entries):
+        dataset = self._datasets.get((user_id, kind))
+        if dataset is not None:
+            dataset.add(entries)
+
+    def release(self, session_id):
+        """Drop a session's views (e.g. when it switches users), and any dataset left unreferenced."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            for key in (session or {"views": {}})["views"]:
+                dataset = self._datasets[key]
+                dataset.refs -= 1
+                if dataset.refs == 0:
+                    del self._datasets[key]
+            self._gauges()
+
+    def collect(self, now=None):
+        """Release sessions idle for longer than `idle_timeout`, at most once per COLLECT_INTERVAL."""
+        now = time.monotonic() if now is None else now
+        if now - self._last_collect < COLLECT_INTERVAL:
+            return
+        self._last_collect = now
+        with self._lock:
+            idle = [sid for sid, session in self._sessions.items() if now - session["seen"] > self.idle_timeout]
+        for session_id in idle:
+            self.release(session_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "datasets": len(self._datasets),
+                "entries": sum(len(dataset.log) for dataset in self._datasets.values() if dataset.log is not None),
+            }
+
+    def _gauges(self):
+        metrics.gauge("shared_sessions", len(self._sessions))
+        metrics.gauge("shared_datasets", len(self._datasets))
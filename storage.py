@@ -0,0 +1,557 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+
+import metrics
+import rollups
+from schema import (
+    END_HOUR,
+    ENERGY_CODE,
+    EPOCH,
+    SCHEMA_VERSION,
+    START_HOUR,
+    START_MINUTE,
+    UTC_OFFSET,
+    VERSION,
+    WAKE_MINUTE,
+    upgrade_energy,
+    upgrade_sleep,
+    upgrade_task,
+)
+
+# Dataset kinds shared by the pages
+ENERGY = "energy"
+SLEEP = "sleep"
+TASKS = "tasks"
+
+ENTRY_ID = "ID"  # Stable identifier used to merge concurrent writers
+
+# Table layout per dataset: display key -> column name
+SCHEMAS = {
+    ENERGY: {
+        "table": "energy_logs",
+        "columns": {
+            "Time Block": "time_block",
+            "Energy Level": "energy_level",
+            "Activity Type": "activity_type",
+            "Timestamp": "timestamp",
+            ENTRY_ID: "entry_id",
+            EPOCH: "epoch",
+            UTC_OFFSET: "utc_offset",
+            START_HOUR: "start_hour",
+            END_HOUR: "end_hour",
+            ENERGY_CODE: "energy_code",
+            VERSION: "schema_version",
+        },
+        "types": {
+            "epoch": "REAL",
+            "utc_offset": "INTEGER",
+            "start_hour": "INTEGER",
+            "end_hour": "INTEGER",
+            "energy_code": "INTEGER",
+            "schema_version": "INTEGER",
+        },
+        "indexes": ["timestamp", "activity_type"],
+    },
+    SLEEP: {
+        "table": "sleep_logs",
+        "columns": {
+            "Sleep Start": "sleep_start",
+            "Wake Up": "wake_up",
+            "Duration (hrs)": "duration_hrs",
+            "Timestamp": "timestamp",
+            ENTRY_ID: "entry_id",
+            EPOCH: "epoch",
+            UTC_OFFSET: "utc_offset",
+            START_MINUTE: "start_minute",
+            WAKE_MINUTE: "wake_minute",
+            VERSION: "schema_version",
+        },
+        "types": {
+            "duration_hrs": "REAL",
+            "epoch": "REAL",
+            "utc_offset": "INTEGER",
+            "start_minute": "INTEGER",
+            "wake_minute": "INTEGER",
+            "schema_version": "INTEGER",
+        },
+        "indexes": ["timestamp"],
+    },
+    TASKS: {
+        "table": "tasks",
+        "columns": {
+            "Task Type": "task_type",
+            "Task Length": "task_length",
+            ENTRY_ID: "entry_id",
+            VERSION: "schema_version",
+        },
+        "types": {"schema_version": "INTEGER"},
+        "indexes": ["task_type"],
+    },
+}
+
+# Brings an entry of any schema version up to the current one; applied to every write
+UPGRADES = {
+    ENERGY: upgrade_energy,
+    SLEEP: upgrade_sleep,
+    TASKS: upgrade_task,
+}
+
+# Datasets summarized in the rollup table
+ROLLUP_DELTAS = {
+    ENERGY: rollups.energy_deltas,
+    SLEEP: rollups.sleep_deltas,
+}
+
+DEFAULT_DB_PATH = "database/energy.db"
+IMPORT_HISTORY = 32  # Recent remote imports kept per dataset for updating cached logs in place
+
+
+def new_entry_id():
+    """Return a fresh identifier for a new entry."""
+    return uuid.uuid4().hex
+
+
+def content_key(entry):
+    """Hash of an entry's content, the ID of entries saved before IDs existed."""
+    return hashlib.sha1(json.dumps(entry, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def entry_key(entry):
+    """Identify an entry for de-duplication; entries saved before IDs existed fall back to a content hash."""
+    if entry.get(ENTRY_ID):
+        return entry[ENTRY_ID]
+    return content_key(entry)
+
+
+def with_ids(entries, seen=None):
+    """Return the entries with an ID each, giving entries saved before IDs existed their content key.
+
+    The same content can legitimately repeat in one source (a task logged
+    three times has no timestamp to tell the copies apart), so the n-th
+    occurrence gets "-n" appended; the first keeps the bare hash earlier
+    versions stored. Pass the same `seen` dict to keep counting across the
+    batches or files of one source.
+    """
+    seen = {} if seen is None else seen
+    keyed = []
+    for entry in entries:
+        if entry.get(ENTRY_ID):
+            keyed.append(entry)
+            continue
+        key = content_key(entry)
+        seen[key] = seen.get(key, 0) + 1
+        keyed.append(dict(entry, **{ENTRY_ID: key if seen[key] == 1 else f"{key}-{seen[key]}"}))
+    return keyed
+
+
+class Storage:
+    """Storage interface shared by the Energy, Sleep and Task pages."""
+
+    def __init__(self):
+        self._listeners = []
+        self._remote_versions = {}  # kind -> number of imports that added remote entries
+        self._imports = {}  # kind -> deque of (version, entries added by that import)
+
+    def add_listener(self, callback):
+        """Call `callback(kind, entries)` after every successful write."""
+        self._listeners.append(callback)
+
+    def _notify(self, kind, entries):
+        for callback in self._listeners:
+            callback(kind, entries)
+
+    def load(self, kind, start=None, end=None):
+        """Return the entries of a dataset, oldest first.
+
+        `start`/`end` (dates, end exclusive) restrict timestamped datasets to a date range.
+        """
+        raise NotImplementedError
+
+    def load_columns(self, kind, start=None, end=None):
+        """Return ({display key: [values]}, [extra keys per row]) for a dataset, oldest first."""
+        entries = self.load(kind, start, end)
+        keys = list(SCHEMAS[kind]["columns"])
+        data = {key: [entry.get(key) for entry in entries] for key in keys}
+        extras = [{k: v for k, v in entry.items() if k not in keys} for entry in entries]
+        return data, extras
+
+    def count(self, kind):
+        """Return the number of entries in a dataset."""
+        raise NotImplementedError
+
+    def entry_ids(self, kind):
+        """Return the set of entry IDs stored for a dataset."""
+        return {entry_key(entry) for entry in self.load(kind)}
+
+    def import_remote(self, kind, entries):
+        """Store entries pulled from another replica without notifying listeners; return how many were new.
+
+        Entries saved before IDs existed are stored under their content key
+        (numbered by occurrence, see with_ids), so pulling the same entries
+        again is a no-op.
+        """
+        raise NotImplementedError
+
+    def remote_version(self, kind):
+        """Counter that changes whenever `import_remote` adds entries, for invalidating cached logs."""
+        return self._remote_versions.get(kind, 0)
+
+    def data_version(self):
+        """Value that changes whenever another process or connection writes to the store."""
+        return None
+
+    def imported_since(self, kind, version):
+        """Return the entries remote imports added after `version`, or None if they are no longer kept."""
+        current = self._remote_versions.get(kind, 0)
+        imports = list(self._imports.get(kind, ()))
+        if version == current:
+            return []
+        if not imports or version is None or not imports[0][0] - 1 <= version < current:
+            return None
+        return [entry for number, entries in imports if number > version for entry in entries]
+
+    def _record_import(self, kind, entries):
+        version = self._remote_versions[kind] = self._remote_versions.get(kind, 0) + 1
+        self._imports.setdefault(kind, deque(maxlen=IMPORT_HISTORY)).append((version, entries))
+
+    def load_page(self, kind, offset=0, limit=25, filters=None, start=None, end=None):
+        """Return (entries, total): one window of a dataset, newest first.
+
+        `filters` maps display keys to required values; `total` counts all matching entries.
+        """
+        entries = [
+            entry for entry in self.load(kind, start, end)
+            if all(entry.get(key) == value for key, value in (filters or {}).items())
+        ]
+        entries.reverse()
+        return entries[offset:offset + limit], len(entries)
+
+    def append(self, kind, entry):
+        """Store a single entry."""
+        self.append_many(kind, [entry])
+
+    def append_many(self, kind, entries):
+        """Store several entries in one transaction; return how many were new."""
+        raise NotImplementedError
+
+    def iter_batches(self, kind, batch_size=1000):
+        """Yield a dataset's entries in lists of at most `batch_size`, oldest first."""
+        entries = self.load(kind)
+        for i in range(0, len(entries), batch_size):
+            yield entries[i:i + batch_size]
+
+    def load_rollups(self, period, dimension=rollups.ALL, start=None, end=None):
+        """Return precomputed summaries for `period` buckets in [start, end], oldest first."""
+        raise NotImplementedError
+
+    def save_summary(self, period, bucket, summary):
+        """Store the digest of one day or week (see rollups.period_summary), replacing any earlier one."""
+        raise NotImplementedError
+
+    def load_summary(self, period, bucket):
+        """Return the stored digest of one day or week, or None if it has not been computed."""
+        raise NotImplementedError
+
+    def compact(self):
+        """Reclaim space and refresh query statistics; slow, so scheduled off-peak."""
+
+    def close(self):
+        pass
+
+
+class SQLiteStorage(Storage):
+    """Storage backed by a local SQLite database with one table per dataset."""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        super().__init__()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # One connection shared by all Streamlit sessions, serialized by a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._lock, self._conn:
+            has_rollups = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rollups'"
+            ).fetchone()
+            self._conn.execute(rollups.CREATE_SQL)
+            self._conn.execute(rollups.SUMMARIES_SQL)
+            for schema in SCHEMAS.values():
+                table = schema["table"]
+                types = schema.get("types", {})
+                columns = ", ".join(
+                    f"{column} {types.get(column, 'TEXT')}" for column in schema["columns"].values()
+                )
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} "
+                    f"(id INTEGER PRIMARY KEY AUTOINCREMENT, {columns}, extra TEXT)"
+                )
+                # Add columns introduced after the table was first created
+                existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+                for column in schema["columns"].values():
+                    if column not in existing:
+                        self._conn.execute(
+                            f"ALTER TABLE {table} ADD COLUMN {column} {types.get(column, 'TEXT')}"
+                        )
+                self._conn.execute(
+                    f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_entry_id ON {table} (entry_id)"
+                )
+                for column in schema["indexes"]:
+                    self._conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column})"
+                    )
+            for kind in SCHEMAS:
+                self._backfill_ids(kind)
+                self._upgrade_rows(kind)
+            if not has_rollups:
+                # Databases created before rollups existed get them computed once
+                self._rebuild_rollups()
+
+    def _select(self, kind, start, end):
+        """Fetch rows in insertion order, using the timestamp index for date ranges."""
+        schema = SCHEMAS[kind]
+        columns = ", ".join(schema["columns"].values())
+        where, params = _where(kind, start, end)
+        with metrics.span("storage_read", kind=kind), self._lock:
+            return self._conn.execute(
+                f"SELECT {columns}, extra FROM {schema['table']}{where} ORDER BY id", params
+            ).fetchall()
+
+    def load(self, kind, start=None, end=None):
+        keys = list(SCHEMAS[kind]["columns"])
+        return [_row_to_entry(keys, row) for row in self._select(kind, start, end)]
+
+    def load_columns(self, kind, start=None, end=None):
+        """Return ({display key: [values]}, [extra keys per row]) without building entry dicts."""
+        schema = SCHEMAS[kind]
+        rows = self._select(kind, start, end)
+        values = list(zip(*rows)) if rows else [()] * (len(schema["columns"]) + 1)
+        data = {key: list(column) for key, column in zip(schema["columns"], values)}
+        extras = [json.loads(extra) if extra else {} for extra in values[-1]]
+        return data, extras
+
+    def data_version(self):
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def count(self, kind):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {SCHEMAS[kind]['table']}").fetchone()[0]
+
+    def load_page(self, kind, offset=0, limit=25, filters=None, start=None, end=None):
+        # Only the requested window is read and decoded, however long the history is
+        schema = SCHEMAS[kind]
+        keys = list(schema["columns"])
+        columns = ", ".join(schema["columns"].values())
+        where, params = _where(kind, start, end, filters)
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM {schema['table']}{where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT {columns}, extra FROM {schema['table']}{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        return [_row_to_entry(keys, row) for row in rows], total
+
+    def _backfill_ids(self, kind):
+        """Give rows stored before IDs existed their content key, so remote copies match them.
+
+        Repeated rows are numbered by occurrence like with_ids does, so none of them is lost.
+        """
+        schema = SCHEMAS[kind]
+        keys = list(schema["columns"])
+        columns = ", ".join(schema["columns"].values())
+        rows = self._conn.execute(
+            f"SELECT id, {columns}, extra FROM {schema['table']} WHERE entry_id IS NULL ORDER BY id"
+        ).fetchall()
+        if not rows:
+            return
+        taken = {row[0] for row in self._conn.execute(f"SELECT entry_id FROM {schema['table']} WHERE entry_id IS NOT NULL")}
+        updates = []
+        for row in rows:
+            key = content_key(_row_to_entry(keys, row[1:]))
+            candidate, n = key, 1
+            while candidate in taken:
+                n += 1
+                candidate = f"{key}-{n}"
+            taken.add(candidate)
+            updates.append((candidate, row[0]))
+        self._conn.executemany(f"UPDATE {schema['table']} SET entry_id = ? WHERE id = ?", updates)
+
+    def _upgrade_rows(self, kind):
+        """Migrate rows written under an older entry schema in place (a no-op once all are current)."""
+        schema = SCHEMAS[kind]
+        keys = list(schema["columns"])
+        columns = list(schema["columns"].values())
+        rows = self._conn.execute(
+            f"SELECT id, {', '.join(columns)}, extra FROM {schema['table']} "
+            "WHERE schema_version IS NULL OR schema_version < ?",
+            (SCHEMA_VERSION,),
+        ).fetchall()
+        assignments = ", ".join(f"{column} = ?" for column in columns + ["extra"])
+        self._conn.executemany(
+            f"UPDATE {schema['table']} SET {assignments} WHERE id = ?",
+            [_entry_to_row(kind, UPGRADES[kind](_row_to_entry(keys, row[1:]))) + [row[0]] for row in rows],
+        )
+
+    def entry_ids(self, kind):
+        schema = SCHEMAS[kind]
+        with self._lock:
+            rows = self._conn.execute(f"SELECT entry_id FROM {schema['table']} WHERE entry_id IS NOT NULL")
+            return {row[0] for row in rows}
+
+    def _insert(self, kind, entries):
+        """Insert entries and their rollup increments; call with the lock held inside a transaction.
+
+        Entries are upgraded to the current schema first; entries without an ID
+        get their content key (see with_ids), as rows stored before IDs existed did. Returns
+        the entries actually stored (ones whose ID already exists are skipped).
+        """
+        entries = [UPGRADES[kind](entry) for entry in with_ids(entries)]
+        sql = _insert_sql(kind)
+        inserted = [entry for entry in entries if self._conn.execute(sql, _entry_to_row(kind, entry)).rowcount]
+        if kind in ROLLUP_DELTAS:
+            rollups.apply(self._conn, ROLLUP_DELTAS[kind](inserted))
+        return inserted
+
+    def append_many(self, kind, entries):
+        if not entries:
+            return 0
+        with metrics.span("storage_write", kind=kind), self._lock, self._conn:  # Commits on success, rolls back on error
+            inserted = self._insert(kind, entries)
+        metrics.count("storage_entries_written_total", len(inserted), kind=kind)
+        if inserted:
+            self._notify(kind, inserted)
+        return len(inserted)
+
+    def iter_batches(self, kind, batch_size=1000):
+        # Keyset pagination: each batch is a short indexed query, so writers are never blocked for long
+        schema = SCHEMAS[kind]
+        keys = list(schema["columns"])
+        columns = ", ".join(schema["columns"].values())
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT id, {columns}, extra FROM {schema['table']} WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield [_row_to_entry(keys, row[1:]) for row in rows]
+
+    def import_remote(self, kind, entries):
+        with metrics.span("storage_import", kind=kind), self._lock, self._conn:
+            inserted = self._insert(kind, entries)
+            if inserted:
+                self._record_import(kind, inserted)
+        return len(inserted)
+
+    def load_rollups(self, period, dimension=rollups.ALL, start=None, end=None):
+        clauses, params = ["period = ?", "dimension = ?"], [period, dimension]
+        if start is not None:
+            clauses.append("bucket >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("bucket <= ?")
+            params.append(end)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT period, bucket, dimension, value, entries, energy_sum, energy_entries, sleep_hours, "
+                f"sleep_entries FROM rollups WHERE {' AND '.join(clauses)} ORDER BY bucket, value",
+                params,
+            ).fetchall()
+        return [rollups.summarize(row) for row in rows]
+
+    def save_summary(self, period, bucket, summary):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (period, bucket, data, computed_at) VALUES (?, ?, ?, ?)",
+                (period, bucket, json.dumps(summary), time.time()),
+            )
+
+    def load_summary(self, period, bucket):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM summaries WHERE period = ? AND bucket = ?", (period, bucket)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def compact(self):
+        with metrics.span("storage_compact"), self._lock:
+            self._conn.execute("PRAGMA optimize")
+            self._conn.execute("VACUUM")  # Rewrites the file; pages wait on the lock meanwhile
+
+    def rebuild_rollups(self):
+        """Recompute all rollups from the raw logs."""
+        with self._lock, self._conn:
+            self._rebuild_rollups()
+
+    def _rebuild_rollups(self):
+        self._conn.execute("DELETE FROM rollups")
+        for kind, deltas in ROLLUP_DELTAS.items():
+            keys = list(SCHEMAS[kind]["columns"])
+            columns = ", ".join(SCHEMAS[kind]["columns"].values())
+            rows = self._conn.execute(f"SELECT {columns}, extra FROM {SCHEMAS[kind]['table']}")
+            rollups.apply(self._conn, deltas(_row_to_entry(keys, row) for row in rows))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _where(kind, start=None, end=None, filters=None):
+    """Build a WHERE clause selecting timestamps in [start, end) and display-key equality filters."""
+    columns = SCHEMAS[kind]["columns"]
+    clauses, params = [], []
+    if (start is not None or end is not None) and "timestamp" not in columns.values():
+        raise ValueError(f"{kind} entries have no timestamp to filter by")
+    # ISO timestamps sort lexically, so a date prefix bounds the range on the index
+    if start is not None:
+        clauses.append("timestamp >= ?")
+        params.append(str(start))
+    if end is not None:
+        clauses.append("timestamp < ?")
+        params.append(str(end))
+    for key, value in (filters or {}).items():
+        if key not in columns:
+            raise ValueError(f"{kind} entries have no {key!r} to filter by")
+        clauses.append(f"{columns[key]} = ?")
+        params.append(value)
+    if not clauses:
+        return "", []
+    return " WHERE " + " AND ".join(clauses), params
+
+
+def _insert_sql(kind):
+    # Entries already stored under the same ID are skipped, so replays are idempotent
+    schema = SCHEMAS[kind]
+    columns = list(schema["columns"].values()) + ["extra"]
+    return (
+        f"INSERT OR IGNORE INTO {schema['table']} ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' for _ in columns)})"
+    )
+
+
+def _entry_to_row(kind, entry):
+    """Split an entry dict into column values plus a JSON blob of unknown keys."""
+    columns = SCHEMAS[kind]["columns"]
+    values = [entry.get(key) for key in columns]
+    extra = {key: value for key, value in entry.items() if key not in columns}
+    return values + [json.dumps(extra) if extra else None]
+
+
+def _row_to_entry(keys, row):
+    """Rebuild the entry dict the pages work with from a table row."""
+    entry = {key: value for key, value in zip(keys, row[:-1]) if value is not None}
+    if row[-1]:
+        entry.update(json.loads(row[-1]))
+    return entry
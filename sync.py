@@ -0,0 +1,177 @@
+import json
+import logging
+import os
+import threading
+import time
+
+import metrics
+from journal import Journal
+from storage import ENERGY, SLEEP, TASKS, entry_key
+from users import DEFAULT_USER, user_dir
+
+# Where each dataset lived in the GitHub repository before per-user partitioning
+REMOTE_PATHS = {
+    ENERGY: "database/energy_logs.json",
+    SLEEP: "database/sleep.json",
+    TASKS: "database/task.json",
+}
+
+
+def remote_paths(user_id):
+    """Where each of a user's datasets lives in the GitHub repository."""
+    return {kind: f"{user_dir(user_id)}/{os.path.basename(path)}" for kind, path in REMOTE_PATHS.items()}
+
+QUEUE_PATH = "database/sync_queue.jsonl"  # Pending entries survive restarts here
+BATCH_WINDOW = 2.0  # Seconds to wait for more saves before committing a batch
+MAX_BACKOFF = 300.0  # Upper bound for the retry delay after failed pushes
+
+logger = logging.getLogger(__name__)
+
+
+class GitHubSync:
+    """Write-behind queue that pushes entries written to local storage to GitHub.
+
+    Saves from every page and user land in one process-wide queue. A background
+    thread waits `batch_window` seconds for more saves, commits each user's
+    pending entries per dataset as a single journal segment, and retries failed pushes with
+    exponential backoff. The queue is mirrored to `queue_path` so a restart
+    picks up where the previous process stopped.
+    """
+
+    def __init__(self, contents, queue_path=QUEUE_PATH, batch_window=BATCH_WINDOW, max_backoff=MAX_BACKOFF):
+        self.contents = contents
+        self._journals = {}  # (user, kind) -> Journal, created on first push
+        self.queue_path = queue_path
+        self.batch_window = batch_window
+        self.max_backoff = max_backoff
+        self._pending = {}  # (user, kind) -> entries waiting for upload
+        self._in_flight = {}  # Batches currently being pushed, still persisted until confirmed
+        self._cond = threading.Condition()
+        self._failures = 0
+        self._last_success = None
+        self._last_error = None
+        self._next_retry = None
+        self._restore()
+        self._thread = threading.Thread(target=self._run, name="github-sync", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def listener(self, user_id):
+        """Return a storage listener that queues a user's new entries."""
+        return lambda kind, entries: self.enqueue(kind, entries, user_id)
+
+    def enqueue(self, kind, entries, user_id=DEFAULT_USER):
+        """Schedule new entries for upload without blocking the page."""
+        with self._cond:
+            self._pending.setdefault((user_id, kind), []).extend(entries)
+            self._persist()
+            self._cond.notify()
+
+    def queued_ids(self, user_id, kind):
+        """Return the IDs of a user's entries that are queued or being pushed."""
+        key = (user_id, kind)
+        with self._cond:
+            return {entry_key(entry) for entry in self._pending.get(key, []) + self._in_flight.get(key, [])}
+
+    def status(self):
+        """Return a snapshot of the queue state for display."""
+        with self._cond:
+            return {
+                "pending": sum(len(entries) for entries in self._pending.values())
+                + sum(len(entries) for entries in self._in_flight.values()),
+                "failures": self._failures,
+                "last_success": self._last_success,
+                "last_error": self._last_error,
+                "next_retry": self._next_retry,
+            }
+
+    def flush(self, timeout=None):
+        """Block until the queue is empty; return False if `timeout` expires first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._in_flight or any(self._pending.values()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not any(self._pending.values()):
+                    self._cond.wait()
+            time.sleep(self.batch_window)  # Let concurrent saves coalesce into one commit
+            with self._cond:
+                keys = [key for key, entries in self._pending.items() if entries]
+            for key in keys:
+                self._push_pending(key)
+            with self._cond:
+                delay = self._next_retry - time.time() if self._next_retry else 0
+            if delay > 0:
+                time.sleep(delay)
+
+    def _journal(self, key):
+        if key not in self._journals:
+            user_id, kind = key
+            self._journals[key] = Journal(self.contents, remote_paths(user_id)[kind])
+        return self._journals[key]
+
+    def _push_pending(self, key):
+        with self._cond:
+            batch = self._pending.get(key)
+            if not batch:
+                return
+            self._pending[key] = []
+            self._in_flight[key] = batch
+        try:
+            with metrics.span("sync_push", kind=key[1]):
+                self._journal(key).append(batch)
+        except Exception as e:
+            metrics.count("sync_entries_total", len(batch), kind=key[1], result="retried")
+            logger.exception("Failed to sync %d %s entries for user %s to GitHub", len(batch), key[1], key[0])
+            with self._cond:
+                # Put the batch back in front of anything queued meanwhile
+                self._pending[key] = batch + self._pending[key]
+                del self._in_flight[key]
+                self._failures += 1
+                self._last_error = str(e)
+                self._next_retry = time.time() + min(self.max_backoff, 2 ** self._failures)
+            return
+        metrics.count("sync_entries_total", len(batch), kind=key[1], result="pushed")
+        with self._cond:
+            del self._in_flight[key]
+            self._failures = 0
+            self._last_error = None
+            self._next_retry = None
+            self._last_success = time.time()
+            self._persist()
+            self._cond.notify_all()
+
+    def _persist(self):
+        """Mirror the pending entries to disk; called with the lock held."""
+        lines = [
+            json.dumps({"user": user_id, "kind": kind, "entry": entry})
+            for queued in (self._in_flight, self._pending)
+            for (user_id, kind), entries in queued.items()
+            for entry in entries
+        ]
+        os.makedirs(os.path.dirname(self.queue_path) or ".", exist_ok=True)
+        tmp_path = f"{self.queue_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+        os.replace(tmp_path, self.queue_path)
+
+    def _restore(self):
+        """Reload entries a previous process queued but never pushed."""
+        try:
+            with open(self.queue_path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        item = json.loads(line)
+                        key = (item.get("user", DEFAULT_USER), item["kind"])
+                        self._pending.setdefault(key, []).append(item["entry"])
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,62 @@
+import datetime
+import math
+
+import pytest
+
+from analytics import energy_distribution, energy_heatmap, sleep_energy_correlation
+from model import load_log
+from storage import ENERGY, SLEEP, SQLiteStorage
+from vocabulary import get_energy_levels
+
+LEVELS = dict(enumerate(get_energy_levels(), start=1))
+
+
+def energy(i, day, score, block="8–10 AM", activity="Reading"):
+    return {"ID": f"e{i}", "Time Block": block, "Energy Level": LEVELS[score], "Activity Type": activity,
+            "Timestamp": f"2024-12-{day:02d} 09:00:00"}
+
+
+def sleep(i, day, hours):
+    return {"ID": f"s{i}", "Sleep Start": "23:00", "Wake Up": "07:00", "Duration (hrs)": hours,
+            "Timestamp": f"2024-12-{day:02d} 07:30:00"}
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "logs.db"))
+    # Dec 2 2024 was a Monday
+    storage.append_many(ENERGY, [
+        energy(0, 2, 2),
+        energy(1, 2, 4),
+        energy(2, 3, 5, block="2–4 PM", activity="Coding"),
+        energy(3, 4, 3, activity="Coding"),
+        energy(4, 9, 1),
+    ])
+    storage.append_many(SLEEP, [sleep(0, 2, 6.0), sleep(1, 3, 9.0), sleep(2, 4, 7.0), sleep(3, 9, 5.0)])
+    return storage
+
+
+def test_heatmap_means_per_weekday_and_block(storage):
+    heatmap = energy_heatmap(load_log(storage, ENERGY))
+    assert heatmap.loc["Monday", "8–10 AM"] == pytest.approx((2 + 4 + 1) / 3)
+    assert heatmap.loc["Tuesday", "2–4 PM"] == 5
+    assert math.isnan(heatmap.loc["Sunday", "8–10 AM"])
+    ranged = energy_heatmap(load_log(storage, ENERGY), end=datetime.date(2024, 12, 3))
+    assert ranged.loc["Monday", "8–10 AM"] == 3
+
+
+def test_distribution_by_activity(storage):
+    frame = energy_distribution(load_log(storage, ENERGY))
+    assert list(frame.index) == ["Coding", "Reading"]  # Highest mean energy first
+    assert frame.loc["Reading", "Entries"] == 3
+    assert frame.loc["Reading", LEVELS[2]] == pytest.approx(1 / 3)
+    assert frame.loc["Coding", "Mean Energy"] == 4
+
+
+def test_sleep_energy_correlation(storage):
+    frame, r = sleep_energy_correlation(load_log(storage, ENERGY), load_log(storage, SLEEP))
+    assert frame["Mean Energy"].tolist() == [3, 5, 3, 1]
+    assert frame["Sleep (hrs)"].tolist() == [6, 9, 7, 5]
+    assert r == pytest.approx(0.9, abs=0.1)
+    _, r = sleep_energy_correlation(load_log(storage, ENERGY), load_log(storage, SLEEP), end=datetime.date(2024, 12, 3))
+    assert math.isnan(r)  # Fewer than three days
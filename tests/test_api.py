@@ -0,0 +1,140 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+from api import Api, UserIndex, handle_connection
+from config import Config
+from storage import ENERGY, SLEEP, SQLiteStorage
+from users import DEFAULT_USER, user_db_path
+
+
+def energy(i, day, block="8–10 AM", activity="Reading", level="Balanced 😐"):
+    return {"ID": f"e{i}", "Time Block": block, "Energy Level": level, "Activity Type": activity,
+            "Timestamp": f"2024-12-{day:02d} 09:{i:02d}:00"}
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Users and their stores live under database/ in the working directory
+    storage = SQLiteStorage(user_db_path(DEFAULT_USER))
+    storage.append_many(ENERGY, [
+        energy(0, 1, level="Fatigued 😓"),
+        energy(1, 2, block="2–4 PM", activity="Coding", level="Recharged 🌟"),
+        energy(2, 9, activity="Coding"),
+    ])
+    storage.append(SLEEP, {"ID": "s0", "Sleep Start": "23:00", "Wake Up": "07:00", "Timestamp": "2024-12-02 07:30:00"})
+    storage.close()
+    return Api(Config())
+
+
+def get(api, target, **kwargs):
+    status, headers, body = api.respond(target, **kwargs)
+    if headers.get("Content-Encoding") == "gzip":
+        body = gzip.decompress(body)
+    return status, headers, json.loads(body) if body else None
+
+
+def test_users(api):
+    assert get(api, "/users")[2] == [DEFAULT_USER]
+
+
+def test_entries_newest_first_with_filters(api):
+    status, _, data = get(api, f"/users/{DEFAULT_USER}/energy")
+    assert status == 200 and data["total"] == 3
+    assert [entry["ID"] for entry in data["entries"]] == ["e2", "e1", "e0"]
+
+    data = get(api, f"/users/{DEFAULT_USER}/energy?activity=Coding&limit=1&offset=1")[2]
+    assert data["total"] == 2 and [entry["ID"] for entry in data["entries"]] == ["e1"]
+    data = get(api, f"/users/{DEFAULT_USER}/energy?start=2024-12-02&end=2024-12-02")[2]
+    assert [entry["ID"] for entry in data["entries"]] == ["e1"]
+
+
+def test_summaries(api):
+    data = get(api, f"/users/{DEFAULT_USER}/energy/summary?by=week")[2]
+    assert data["groups"] == [
+        {"week": "2024-W48", "entries": 1, "mean_energy": 2.0},
+        {"week": "2024-W49", "entries": 1, "mean_energy": 5.0},
+        {"week": "2024-W50", "entries": 1, "mean_energy": 3.0},
+    ]
+    data = get(api, f"/users/{DEFAULT_USER}/energy/summary?by=time_block")[2]
+    assert [(group["time_block"], group["entries"]) for group in data["groups"]] == [("8–10 AM", 2), ("2–4 PM", 1)]
+    data = get(api, f"/users/{DEFAULT_USER}/sleep/summary")[2]
+    assert data["groups"] == [{"day": "2024-12-02", "entries": 1, "sleep_hours": 8.0}]
+
+
+@pytest.mark.parametrize("target, status", [
+    ("/nope", 404),
+    ("/users/9/energy", 404),
+    (f"/users/{DEFAULT_USER}/moods", 404),
+    (f"/users/{DEFAULT_USER}/tasks/summary", 404),
+    (f"/users/{DEFAULT_USER}/energy?start=yesterday", 400),
+    (f"/users/{DEFAULT_USER}/energy?limit=-1", 400),
+    (f"/users/{DEFAULT_USER}/energy?color=red", 400),
+    (f"/users/{DEFAULT_USER}/energy/summary?by=activity_type", 400),
+])
+def test_errors(api, target, status):
+    assert get(api, target)[0] == status
+
+
+def test_etag_and_gzip(api):
+    target = f"/users/{DEFAULT_USER}/energy?limit=1000"
+    status, headers, data = get(api, target, accept_gzip=True)
+    assert status == 200 and headers["ETag"]
+    assert get(api, target, if_none_match=headers["ETag"])[0] == 304
+
+
+def test_writes_from_the_app_show_up(api):
+    target = f"/users/{DEFAULT_USER}/energy"
+    assert get(api, target)[2]["total"] == 3
+    SQLiteStorage(user_db_path(DEFAULT_USER)).append(ENERGY, energy(3, 10))
+    assert get(api, target)[2]["total"] == 4
+
+
+def test_pulled_entries_replace_the_log(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "energy.db"))
+    storage.append(ENERGY, energy(0, 1))
+    index = UserIndex(storage)
+    held = index.log(ENERGY)  # e.g. a request still running on another thread
+    storage.import_remote(ENERGY, [energy(1, 2)])
+    assert len(index.log(ENERGY)) == 2
+    assert len(held) == 1
+
+
+class Writer:
+    def __init__(self):
+        self.data = b""
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def serve_once(api, request):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(request)
+        reader.feed_eof()
+        writer = Writer()
+        await handle_connection(api, reader, writer)
+        return writer.data
+    return asyncio.run(run())
+
+
+def test_malformed_request_line_is_a_400():
+    response = serve_once(None, b"GARBAGE\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 400 ")
+    assert json.loads(response.split(b"\r\n\r\n", 1)[1]) == {"error": "Malformed request line"}
+
+
+def test_unexpected_errors_are_a_500(api, monkeypatch):
+    monkeypatch.setattr(api, "respond", lambda *args: 1 / 0)
+    response = serve_once(api, b"GET /users HTTP/1.1\r\nConnection: close\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 500 ")
+    assert json.loads(response.split(b"\r\n\r\n", 1)[1]) == {"error": "Internal server error"}
@@ -0,0 +1,64 @@
+import io
+import json
+
+import pytest
+
+from bulk import import_records, read_records, validate
+from storage import ENERGY, SLEEP, TASKS, SQLiteStorage
+
+
+def record(minute=0, **fields):
+    return {"Time Block": "8–10 AM", "Energy Level": "4", "Activity Type": "Reading",
+            "Timestamp": f"2024-12-01T09:{minute:02d}:00", **fields}
+
+
+def jsonl(*lines):
+    return io.BytesIO("".join(line + "\n" for line in lines).encode("utf-8"))
+
+
+@pytest.fixture
+def storage():
+    return SQLiteStorage(":memory:")
+
+
+def test_validate_normalizes_fields():
+    entry = validate(ENERGY, {"time_block": "8-10 am", "energy level": "4", "Activity Type": "reading",
+                              "Timestamp": "2024-12-01T09:00:00"})
+    assert entry["Time Block"] == "8–10 AM"
+    assert entry["Activity Type"] == "Reading"
+    assert entry["Timestamp"] == "2024-12-01 09:00:00"
+    assert validate(SLEEP, {"Sleep Start": "23:30", "Wake Up": "7:00", "Timestamp": "2024-12-02"})["Duration (hrs)"] == 7.5
+
+
+@pytest.mark.parametrize("kind, fields, message", [
+    (ENERGY, record(**{"Time Block": "noon"}), "Time Block"),
+    (ENERGY, record(Timestamp="yesterday"), "Timestamp"),
+    (SLEEP, {"Sleep Start": "25:00", "Wake Up": "07:00", "Timestamp": "2024-12-02"}, "Sleep Start"),
+    (TASKS, {"Task Type": "Coding"}, "Task Length"),
+])
+def test_validate_rejects_unusable_records(kind, fields, message):
+    with pytest.raises(ValueError, match=message):
+        validate(kind, fields)
+
+
+def test_duplicates_are_skipped_in_the_file_and_on_reimport(storage):
+    records = [record(0, ID="a"), record(1, ID="a"), record(2)]
+    report = import_records(storage, ENERGY, records, batch_size=2)
+    assert (report.read, report.imported, report.duplicates) == (3, 2, 1)
+    report = import_records(storage, ENERGY, records)
+    assert (report.imported, report.duplicates) == (0, 3)
+
+
+def test_reimporting_a_legacy_snapshot_is_a_no_op(storage):
+    legacy = [record(0), record(0), record(1)]  # The first two are a legitimate repeat
+    assert storage.import_remote(ENERGY, legacy) == 3
+    report = import_records(storage, ENERGY, read_records(io.BytesIO(json.dumps(legacy).encode()), "json"))
+    assert (report.imported, report.duplicates) == (0, 3)
+    assert storage.count(ENERGY) == 3
+
+
+def test_malformed_jsonl_lines_count_as_invalid(storage):
+    lines = [json.dumps(record(0)), '{"Time Block": ', "[1, 2]", json.dumps(record(1))]
+    report = import_records(storage, ENERGY, read_records(jsonl(*lines), "jsonl"))
+    assert (report.read, report.imported, report.invalid) == (4, 2, 2)
+    assert [message.split(":")[0] for message in report.errors] == ["Record 2", "Record 3"]
@@ -0,0 +1,70 @@
+import threading
+
+import numpy as np
+import pytest
+
+from circadian import SLEEP_NEED, CircadianModel
+from model import EnergyLog, SleepLog
+from schema import upgrade_energy, upgrade_sleep
+
+
+def energy(day, block="8–10 AM", level="Balanced 😐"):
+    return upgrade_energy({"Time Block": block, "Energy Level": level, "Activity Type": "Reading",
+                           "Timestamp": f"2024-12-{day:02d} 09:00:00"})
+
+
+def sleep(day, start="23:00", wake="07:00"):
+    return upgrade_sleep({"Sleep Start": start, "Wake Up": wake, "Timestamp": f"2024-12-{day:02d} 07:30:00"})
+
+
+def test_incremental_update_matches_full_build():
+    energies = [energy(day) for day in range(1, 21)]
+    sleeps = [sleep(day, wake="05:00" if day % 3 else "07:00") for day in range(1, 21)]
+    energy_log, sleep_log = EnergyLog.from_entries(energies[:10]), SleepLog.from_entries(sleeps[:10])
+    model = CircadianModel().update(energy_log, sleep_log)
+    for entry in energies[10:]:
+        energy_log.append(entry)
+    for entry in sleeps[10:]:
+        sleep_log.append(entry)
+    model.update(energy_log, sleep_log)
+
+    full = CircadianModel().update(EnergyLog.from_entries(energies), SleepLog.from_entries(sleeps))
+    np.testing.assert_allclose(model.sleep_debt(), full.sleep_debt())
+    np.testing.assert_allclose(model.forecast()[1], full.forecast()[1])
+
+
+def test_sleep_debt_and_regularity():
+    sleep_log = SleepLog.from_entries([sleep(1, "23:00", "05:00"), sleep(2, "23:00", "05:00")])
+    model = CircadianModel().update(EnergyLog.from_entries([]), sleep_log)
+    assert model.sleep_debt()[-1] == 2 * (SLEEP_NEED - 6)
+    assert model.midpoint_regularity()[-1] < 1  # Same midpoint both nights
+
+
+def test_forecast_covers_logged_blocks_only():
+    model = CircadianModel().update(EnergyLog.from_entries([energy(1), energy(2)]), SleepLog.from_entries([]))
+    date, predicted = model.forecast()
+    assert str(date) == "2024-12-03"
+    assert predicted[model.blocks.index("8–10 AM")] == pytest.approx(3)
+    assert np.isnan(predicted[model.blocks.index("6–8 PM")])
+
+
+def test_summary_is_consistent_under_concurrent_updates():
+    model = CircadianModel()
+    logs = [(EnergyLog.from_entries([energy(day) for day in range(1, n)]), SleepLog.from_entries([sleep(1)]))
+            for n in (5, 25)]
+    errors = []
+
+    def work(pair):
+        try:
+            for _ in range(50):
+                date, predicted, debt, spread = model.summary(*pair)
+                assert len(debt) == len(spread) == (date - pair[0].dates()[0]).days
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(logs[i % 2],)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
@@ -0,0 +1,60 @@
+import json
+import logging
+
+import pytest
+
+from metrics import Registry
+
+
+@pytest.fixture
+def registry():
+    registry = Registry(buckets=(0.1, 1.0))
+    registry.enabled = True
+    return registry
+
+
+def test_disabled_registry_records_nothing():
+    registry = Registry()
+    registry.count("saves_total")
+    with registry.span("load"):
+        pass
+    assert registry.render() == "\n"
+
+
+def test_render_prometheus_text(registry):
+    registry.count("saves_total", kind="energy")
+    registry.count("saves_total", 2, kind="energy")
+    registry.gauge("sessions", 3)
+    registry.observe("load_seconds", 0.05, kind='say "hi"')
+    registry.observe("load_seconds", 0.5, kind='say "hi"')
+    assert registry.render().splitlines() == [
+        "# TYPE saves_total counter",
+        'saves_total{kind="energy"} 3',
+        "# TYPE sessions gauge",
+        "sessions 3",
+        "# TYPE load_seconds histogram",
+        'load_seconds_bucket{kind="say \\"hi\\"",le="0.1"} 1',
+        'load_seconds_bucket{kind="say \\"hi\\"",le="1.0"} 2',
+        'load_seconds_bucket{kind="say \\"hi\\"",le="+Inf"} 2',
+        'load_seconds_sum{kind="say \\"hi\\""} 0.55',
+        'load_seconds_count{kind="say \\"hi\\""} 2',
+    ]
+
+
+def test_spans_time_blocks_and_count_errors(registry, tmp_path):
+    path = tmp_path / "spans.jsonl"
+    registry.log_spans(str(path))
+    with registry.span("save", kind="sleep"):
+        pass
+    with pytest.raises(KeyError):
+        with registry.span("save", kind="sleep"):
+            raise KeyError
+    snapshot = registry.snapshot()
+    assert snapshot["histograms"]['save_seconds{kind="sleep"}']["count"] == 2
+    assert snapshot["counters"] == {'save_errors_total{kind="sleep"}': 1}
+    span_log = logging.getLogger("metrics.spans")
+    for handler in span_log.handlers[:]:
+        span_log.removeHandler(handler)
+        handler.close()
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(line["span"], line["status"]) for line in lines] == [("save", "ok"), ("save", "error")]
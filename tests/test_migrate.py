@@ -0,0 +1,57 @@
+from github_api import LocalContents
+from journal import Journal
+from migrate import main, migrate_journal
+from schema import SCHEMA_VERSION, START_HOUR, VERSION
+from storage import ENERGY, TASKS
+from sync import REMOTE_PATHS
+
+
+def v1_entry(i, day):
+    return {"ID": f"e{i}", "Time Block": "8–10 AM", "Energy Level": "Balanced 😐",
+            "Activity Type": "Reading", "Timestamp": f"2024-{day} 09:00:00"}
+
+
+def seed(contents):
+    path = REMOTE_PATHS[ENERGY]
+    journal = Journal(contents, path, compact_every=1000)
+    contents.write_json(path, [v1_entry(0, "10-01")], "legacy snapshot")
+    journal.chunks.fold([v1_entry(1, "11-01"), v1_entry(2, "12-01")])
+    journal.append([v1_entry(3, "12-02")])
+    return journal
+
+
+def test_migration_upgrades_every_file_once(tmp_path):
+    contents = LocalContents(str(tmp_path))
+    journal = seed(contents)
+
+    assert migrate_journal(contents, ENERGY, REMOTE_PATHS[ENERGY]) == 4  # Snapshot, two chunks, one segment
+    entries = journal.load()
+    assert [entry["ID"] for entry in entries] == ["e0", "e1", "e2", "e3"]
+    assert all(entry[VERSION] == SCHEMA_VERSION and entry[START_HOUR] == 8 for entry in entries)
+
+    assert migrate_journal(contents, ENERGY, REMOTE_PATHS[ENERGY]) == 0
+    assert journal.load() == entries
+
+
+def test_cli_is_idempotent(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    journal = seed(LocalContents("."))
+    main([])
+    assert "Upgraded 4 files" in capsys.readouterr().out
+    main([])
+    assert "Upgraded" not in capsys.readouterr().out
+    assert len(journal.load()) == 4
+
+
+def test_migration_keeps_repeated_legacy_entries(tmp_path):
+    contents = LocalContents(str(tmp_path))
+    path = REMOTE_PATHS[TASKS]
+    journal = Journal(contents, path, compact_every=1000)
+    task = {"Task Type": "Coding", "Task Length": "Few Hours Task"}
+    contents.write_json(path, [task, task, task, dict(task, **{"Task Type": "Email"})], "legacy snapshot")
+    journal.append([task, task])
+    ids = [entry["ID"] for entry in journal.load()]
+
+    assert migrate_journal(contents, TASKS, path) == 2
+    assert [entry["ID"] for entry in journal.load()] == ids
+    assert len(set(ids)) == 4  # The segment repeats the snapshot's first two tasks
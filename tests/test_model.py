@@ -0,0 +1,66 @@
+import datetime
+
+import numpy as np
+
+from model import EnergyLog, TaskLog, load_log
+from storage import ENERGY, SQLiteStorage
+
+
+def energy(i, day=1, level="Balanced 😐", activity="Reading"):
+    return {"ID": f"e{i}", "Time Block": "8–10 AM", "Energy Level": level, "Activity Type": activity,
+            "Timestamp": f"2024-12-{day:02d} 09:{i:02d}:00"}
+
+
+def test_entries_round_trip():
+    entries = [energy(0), energy(1, activity="Juggling", level="Off the charts"), {"Timestamp": "2024-12-02 10:00:00"}]
+    log = EnergyLog.from_entries(entries)
+    assert list(log) == entries  # Labels outside the vocabulary become new categories
+    appended = EnergyLog()
+    for entry in entries:
+        appended.append(entry)
+    assert list(appended) == entries
+    assert "Juggling" in appended.categories("Activity Type")
+
+
+def test_ids_longer_than_the_column_are_kept():
+    task = {"ID": "legacy-" + "0" * 40 + "-2", "Task Type": "Coding", "Task Length": "Few Hours Task"}
+    log = TaskLog.from_entries([task])
+    log.append(dict(task, ID="x" * 50))
+    assert [entry["ID"] for entry in log] == [task["ID"], "x" * 50]
+    assert log.entry_ids() == {task["ID"], "x" * 50}
+
+
+def test_copies_and_appends_are_independent():
+    log = EnergyLog.from_entries([energy(0)])
+    key = log.cache_key()
+    copy = log.copy()
+    copy.append(energy(1, activity="Juggling"))
+    assert len(log) == 1 and "Juggling" not in log.categories("Activity Type")
+    assert copy.cache_key() != key
+    log.append(energy(2))
+    assert log.cache_key() != key
+
+
+def test_extend_new_skips_known_ids():
+    log = EnergyLog.from_entries([energy(0)])
+    assert log.extend_new([energy(0), energy(1), energy(1)]) == 1
+    assert [entry["ID"] for entry in log] == ["e0", "e1"]
+
+
+def test_columns_from_storage(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "energy.db"))
+    storage.append_many(ENERGY, [energy(0, level="Fatigued 😓"), energy(1, level="Recharged 🌟")])
+    log = load_log(storage, ENERGY)
+    assert log.column("Timestamp").dtype == np.dtype("datetime64[us]")
+    assert log.energy_scores().tolist() == [2.0, 5.0]
+
+
+def test_date_index_follows_appends():
+    log = EnergyLog.from_entries([energy(0, day=2), energy(1, day=1), {"ID": "undated"}])
+    assert log.dates() == [datetime.date(2024, 12, 1), datetime.date(2024, 12, 2)]
+    log.append(energy(2, day=2))
+    log.append(energy(3, day=3))
+    assert log.dates() == [datetime.date(2024, 12, d) for d in (1, 2, 3)]
+    assert log.rows_on(datetime.date(2024, 12, 2)).tolist() == [0, 3]
+    assert log.rows_on(datetime.date(2024, 12, 5)).tolist() == []
+    assert log.to_frame(log.rows_on(datetime.date(2024, 12, 3)))["ID"].tolist() == ["e3"]
@@ -0,0 +1,96 @@
+import pytest
+
+from github_api import LocalContents
+from journal import Journal
+from reconcile import Reconciler
+from storage import ENERGY, SLEEP, SQLiteStorage
+from sync import GitHubSync, remote_paths
+
+USER = "alice"
+
+
+class FlakyContents(LocalContents):
+    """LocalContents whose directory listings fail for paths containing `failing`."""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.failing = None
+
+    def list_dir(self, path):
+        if self.failing and self.failing in path:
+            raise OSError(f"listing {path} failed")
+        return super().list_dir(path)
+
+
+def energy(i):
+    return {"ID": f"e{i}", "Time Block": "8–10 AM", "Energy Level": "Balanced 😐",
+            "Activity Type": "Reading", "Timestamp": f"2024-12-0{i + 1} 09:00:00"}
+
+
+def sleep(i):
+    return {"ID": f"s{i}", "Sleep Start": "23:00", "Wake Up": "07:00", "Timestamp": f"2024-12-0{i + 1} 07:30:00"}
+
+
+@pytest.fixture
+def contents(tmp_path):
+    contents = FlakyContents(str(tmp_path / "remote"))
+    Journal(contents, remote_paths(USER)[ENERGY]).append([energy(0), energy(1)])
+    Journal(contents, remote_paths(USER)[SLEEP]).append([sleep(0)])
+    return contents
+
+
+@pytest.fixture
+def storage():
+    return SQLiteStorage(":memory:")
+
+
+def test_pull_imports_new_entries_only(contents, storage):
+    reconciler = Reconciler(storage, contents, USER)
+    counts = reconciler.reconcile()
+    assert counts[ENERGY] == (2, 0) and counts[SLEEP] == (1, 0)
+
+    Journal(contents, remote_paths(USER)[ENERGY]).append([energy(2)])
+    counts = reconciler.reconcile()
+    assert counts[ENERGY] == (1, 0) and counts[SLEEP] == (0, 0)
+    assert storage.count(ENERGY) == 3
+
+
+def test_failed_pull_keeps_cursor(contents, storage):
+    reconciler = Reconciler(storage, contents, USER)
+    contents.failing = "sleep"
+    with pytest.raises(OSError):
+        reconciler.reconcile()
+    assert storage.count(ENERGY) == 2  # The kinds that did pull are imported
+    assert storage.count(SLEEP) == 0
+
+    contents.failing = None
+    reconciler.reconcile()
+    assert storage.count(SLEEP) == 1
+    assert storage.count(ENERGY) == 2
+
+
+def test_failed_import_keeps_cursor(contents, storage, monkeypatch):
+    reconciler = Reconciler(storage, contents, USER)
+    original = storage.import_remote
+
+    def failing_import(kind, entries):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(storage, "import_remote", failing_import)
+    with pytest.raises(RuntimeError):
+        reconciler.reconcile()
+    monkeypatch.setattr(storage, "import_remote", original)
+
+    reconciler.reconcile()
+    assert storage.count(ENERGY) == 2 and storage.count(SLEEP) == 1
+
+
+def test_local_entries_missing_remotely_are_queued(contents, storage, tmp_path):
+    sync = GitHubSync(contents, queue_path=str(tmp_path / "sync_queue.jsonl"))
+    storage.append(ENERGY, energy(5))  # Saved while GitHub was not configured
+    counts = Reconciler(storage, contents, USER, sync).reconcile()
+    assert counts[ENERGY] == (2, 1)
+    assert sync.queued_ids(USER, ENERGY) == {"e5"}
+
+    # Already queued: not queued again on the next pass
+    assert Reconciler(storage, contents, USER, sync).reconcile()[ENERGY] == (0, 0)
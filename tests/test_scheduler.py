@@ -0,0 +1,73 @@
+import datetime
+
+import rollups
+from scheduler import MAX_ATTEMPTS, JobStore, Scheduler
+from storage import ENERGY, SQLiteStorage
+
+NOW = datetime.datetime(2024, 12, 6, 10, 30)
+
+
+def energy(i, day="2024-12-05"):
+    return {"ID": f"e{i}", "Time Block": "8–10 AM", "Energy Level": "Balanced 😐",
+            "Activity Type": "Reading", "Timestamp": f"{day} 09:{i:02d}:00"}
+
+
+def run(scheduler, now=NOW):
+    for future in scheduler.run_pending(now):
+        future.result()
+
+
+def make_scheduler(storage):
+    return Scheduler(lambda user_id: storage, jobs=JobStore(":memory:"), users=lambda: ["u"])
+
+
+def test_claim_once_and_retry_failures():
+    jobs = JobStore(":memory:")
+    assert jobs.claim("job", "key")
+    assert not jobs.claim("job", "key")  # Still running
+    jobs.finish("job", "key", error="boom")
+    for _ in range(MAX_ATTEMPTS - 1):
+        assert jobs.claim("job", "key")
+        jobs.finish("job", "key", error="boom")
+    assert not jobs.claim("job", "key")
+    assert jobs.recent()[0]["attempts"] == MAX_ATTEMPTS
+
+
+def test_prune_keeps_recent_and_running_records():
+    jobs = JobStore(":memory:")
+    jobs.claim("old", "key")
+    jobs.finish("old", "key")
+    jobs.claim("running", "key")
+    assert jobs.prune(max_age=-1) == 1
+    assert [run["name"] for run in jobs.recent()] == ["running"]
+    assert jobs.prune() == 0
+
+
+def test_daily_summary_runs_again_after_late_entries():
+    storage = SQLiteStorage(":memory:")
+    storage.append_many(ENERGY, [energy(0), energy(1)])
+    scheduler = make_scheduler(storage)
+
+    run(scheduler)
+    assert storage.load_summary(rollups.DAY, "2024-12-05")["entries"] == 2
+    assert scheduler.run_pending(NOW) == []  # Nothing new: no rerun
+
+    storage.append(ENERGY, energy(2))  # Arrives late, e.g. through reconcile
+    run(scheduler)
+    assert storage.load_summary(rollups.DAY, "2024-12-05")["entries"] == 3
+
+
+def test_compaction_only_off_peak():
+    scheduler = make_scheduler(SQLiteStorage(":memory:"))
+    names = lambda now: {name.split(":")[0] for name, _, _ in scheduler.due(now)}
+    assert "compact" not in names(NOW)
+    assert "compact" in names(NOW.replace(hour=3))
+
+
+def test_failed_job_is_recorded():
+    storage = SQLiteStorage(":memory:")
+    scheduler = make_scheduler(storage)
+    storage.compact = lambda: (_ for _ in ()).throw(RuntimeError("locked"))
+    run(scheduler, NOW.replace(hour=3))
+    failed = [run for run in scheduler.jobs.recent() if run["status"] == "failed"]
+    assert [run["error"] for run in failed] == ["locked"]
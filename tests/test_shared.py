@@ -0,0 +1,71 @@
+import datetime
+
+from shared import DatasetRegistry
+from storage import ENERGY, SQLiteStorage
+
+
+def energy(i):
+    return {"ID": f"e{i}", "Time Block": "8–10 AM", "Energy Level": "Balanced 😐",
+            "Activity Type": "Reading", "Timestamp": f"2024-12-0{i + 1} 09:00:00"}
+
+
+def test_views_share_one_log_and_see_saves(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "energy.db"))
+    storage.append(ENERGY, energy(0))
+    registry = DatasetRegistry()
+    first = registry.view("a", "u", storage, ENERGY)
+    second = registry.view("b", "u", storage, ENERGY)
+    assert first._log() is second._log()
+
+    storage.append(ENERGY, energy(1))
+    assert len(registry.view("b", "u", storage, ENERGY)) == 2
+
+
+def test_unsaved_entries_stay_in_their_session(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "energy.db"))
+    registry = DatasetRegistry()
+    first = registry.view("a", "u", storage, ENERGY)
+    first.append(energy(0))
+    assert len(first) == 1
+    assert len(registry.view("b", "u", storage, ENERGY)) == 0
+
+
+def test_writes_from_another_process_are_loaded(tmp_path):
+    path = str(tmp_path / "energy.db")
+    storage = SQLiteStorage(path)
+    storage.append(ENERGY, energy(0))
+    registry = DatasetRegistry()
+    assert len(registry.view("a", "u", storage, ENERGY)) == 1
+
+    SQLiteStorage(path).append(ENERGY, energy(1))  # e.g. bulk.py, on its own connection
+    assert len(registry.view("a", "u", storage, ENERGY)) == 2
+    assert len(registry.view("b", "u", storage, ENERGY)) == 2
+
+
+def test_release_drops_unreferenced_datasets(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "energy.db"))
+    registry = DatasetRegistry()
+    registry.view("a", "u", storage, ENERGY)
+    registry.release("a")
+    assert registry.stats()["datasets"] == 0
+
+
+def test_loaded_only_returns_datasets_a_session_holds(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "energy.db"))
+    registry = DatasetRegistry()
+    assert registry.loaded("u", ENERGY) is None
+    view = registry.view("a", "u", storage, ENERGY)
+    assert registry.loaded("u", ENERGY) is view._log()
+
+
+def test_saves_replace_the_shared_log_instead_of_changing_it(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "energy.db"))
+    storage.append(ENERGY, energy(0))
+    registry = DatasetRegistry()
+    held = registry.view("a", "u", storage, ENERGY)._log()  # e.g. a page rendering on another thread
+    key = held.cache_key()
+
+    storage.append(ENERGY, energy(1))
+    current = registry.view("b", "u", storage, ENERGY)._log()
+    assert (len(held), held.cache_key(), held.dates()) == (1, key, [datetime.date(2024, 12, 1)])
+    assert len(current) == 2 and current.uid != held.uid
@@ -0,0 +1,112 @@
+import pytest
+
+import rollups
+from schema import SCHEMA_VERSION, VERSION
+from storage import ENERGY, SLEEP, TASKS, SQLiteStorage
+
+
+def energy(i, day=1, level="Balanced 😐", activity="Reading"):
+    return {"ID": f"e{i}", "Time Block": "8–10 AM", "Energy Level": level, "Activity Type": activity,
+            "Timestamp": f"2024-12-{day:02d} 09:{i:02d}:00"}
+
+
+@pytest.fixture
+def storage():
+    return SQLiteStorage(":memory:")
+
+
+def test_entries_are_deduplicated_by_id(storage):
+    assert storage.append_many(ENERGY, [energy(0), energy(1)]) == 2
+    assert storage.append_many(ENERGY, [energy(1), energy(2)]) == 1
+    assert storage.import_remote(ENERGY, [energy(0), energy(3)]) == 1
+    assert storage.count(ENERGY) == 4
+    assert storage.entry_ids(ENERGY) == {"e0", "e1", "e2", "e3"}
+
+
+def test_entries_without_ids_get_one(storage):
+    storage.append(TASKS, {"Task Type": "Coding", "Task Length": "Few Hours Task"})
+    [task] = storage.load(TASKS)
+    assert task["ID"]
+
+
+def test_writes_notify_listeners_but_imports_do_not(storage):
+    seen = []
+    storage.add_listener(lambda kind, entries: seen.extend(entry["ID"] for entry in entries))
+    storage.append(ENERGY, energy(0))
+    storage.append(ENERGY, energy(0))  # Duplicate: nothing new to announce
+    storage.import_remote(ENERGY, [energy(1)])
+    assert seen == ["e0"]
+    assert [entry["ID"] for entry in storage.imported_since(ENERGY, 0)] == ["e1"]
+
+
+def test_entries_are_stored_under_the_current_schema(storage):
+    storage.append(ENERGY, energy(0))
+    [stored] = storage.load(ENERGY)
+    assert stored[VERSION] == SCHEMA_VERSION
+
+
+def test_rollups_follow_writes(storage):
+    storage.append_many(ENERGY, [energy(0, level="Balanced 😐"), energy(1, level="Recharged 🌟")])
+    storage.append(SLEEP, {"ID": "s0", "Sleep Start": "23:00", "Wake Up": "07:00", "Timestamp": "2024-12-01 07:30:00"})
+    storage.append(ENERGY, energy(0))  # Duplicates are not counted twice
+
+    [day] = storage.load_rollups(rollups.DAY, start="2024-12-01", end="2024-12-01")
+    assert day["entries"] == 2
+    assert day["mean_energy"] == pytest.approx(4.0)
+    assert day["sleep_hours"] == pytest.approx(8.0)
+    [week] = storage.load_rollups(rollups.WEEK)
+    assert week["bucket"] == "2024-W48" and week["entries"] == 2
+
+    by_activity = storage.load_rollups(rollups.DAY, rollups.ACTIVITY)
+    assert [(row["value"], row["entries"]) for row in by_activity] == [("Reading", 2)]
+
+
+def test_rebuilt_rollups_match_incremental_ones(storage):
+    storage.append_many(ENERGY, [energy(i, day=1 + i % 3) for i in range(9)])
+    before = storage.load_rollups(rollups.DAY, rollups.TIME_BLOCK)
+    storage.rebuild_rollups()
+    assert storage.load_rollups(rollups.DAY, rollups.TIME_BLOCK) == before
+
+
+def test_pages_are_newest_first_with_filters_and_ranges(storage):
+    storage.append_many(ENERGY, [energy(i, day=1 + i, activity="Coding" if i % 2 else "Reading") for i in range(7)])
+
+    entries, total = storage.load_page(ENERGY, offset=0, limit=3)
+    assert total == 7 and [e["ID"] for e in entries] == ["e6", "e5", "e4"]
+    entries, _ = storage.load_page(ENERGY, offset=6, limit=3)
+    assert [e["ID"] for e in entries] == ["e0"]
+
+    entries, total = storage.load_page(ENERGY, filters={"Activity Type": "Coding"})
+    assert total == 3 and [e["ID"] for e in entries] == ["e5", "e3", "e1"]
+    entries, total = storage.load_page(ENERGY, start="2024-12-03", end="2024-12-05")
+    assert total == 2 and [e["ID"] for e in entries] == ["e3", "e2"]
+
+    with pytest.raises(ValueError):
+        storage.load_page(TASKS, start="2024-12-01")
+
+
+def test_batches_cover_every_entry_once(storage):
+    storage.append_many(ENERGY, [energy(i, day=1 + i % 28) for i in range(25)])
+    batches = list(storage.iter_batches(ENERGY, batch_size=10))
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert len({entry["ID"] for batch in batches for entry in batch}) == 25
+
+
+def test_repeated_legacy_entries_are_all_kept(storage):
+    task, other = {"Task Type": "Coding", "Task Length": "Few Hours Task"}, {"Task Type": "Email", "Task Length": "Quick Task"}
+    assert storage.import_remote(TASKS, [task, task, task, other]) == 4
+    assert storage.import_remote(TASKS, [task, task, task, other]) == 0
+    assert len(storage.entry_ids(TASKS)) == 4
+
+
+def test_backfill_numbers_repeated_rows(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    task = {"ID": "t", "Task Type": "Coding", "Task Length": "Few Hours Task"}
+    storage = SQLiteStorage(path)
+    storage.append_many(TASKS, [task, dict(task, ID="u"), dict(task, ID="v")])
+    with storage._conn:
+        storage._conn.execute("UPDATE tasks SET entry_id = NULL")  # As stored before IDs existed
+    storage._conn.close()
+
+    key = min(SQLiteStorage(path).entry_ids(TASKS), key=len)
+    assert SQLiteStorage(path).entry_ids(TASKS) == {key, f"{key}-2", f"{key}-3"}
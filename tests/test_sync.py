@@ -0,0 +1,66 @@
+import json
+
+from github_api import LocalContents
+from journal import Journal
+from storage import ENERGY
+from sync import GitHubSync, remote_paths
+
+
+class FailingContents(LocalContents):
+    """LocalContents whose writes fail while `down` is set."""
+
+    down = False
+
+    def write_bytes(self, path, raw, message, sha=None):
+        if self.down:
+            raise OSError("GitHub unreachable")
+        return super().write_bytes(path, raw, message, sha=sha)
+
+
+def entry(i):
+    return {"ID": f"e{i}", "Time Block": "8–10 AM", "Energy Level": "Balanced 😐",
+            "Activity Type": "Reading", "Timestamp": f"2024-12-0{i + 1} 09:00:00"}
+
+
+def queued(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["entry"]["ID"] for line in f if line.strip()]
+
+
+def test_queue_survives_a_restart(tmp_path):
+    queue_path = str(tmp_path / "sync_queue.jsonl")
+    sync = GitHubSync(LocalContents(str(tmp_path / "remote")), queue_path=queue_path)
+    sync.enqueue(ENERGY, [entry(0), entry(1)], "u")
+    assert queued(queue_path) == ["e0", "e1"]
+
+    restarted = GitHubSync(LocalContents(str(tmp_path / "remote")), queue_path=queue_path)
+    assert restarted.queued_ids("u", ENERGY) == {"e0", "e1"}
+
+
+def test_failed_push_is_retried_in_order(tmp_path):
+    queue_path = str(tmp_path / "sync_queue.jsonl")
+    contents = FailingContents(str(tmp_path / "remote"))
+    sync = GitHubSync(contents, queue_path=queue_path)
+    sync.enqueue(ENERGY, [entry(0)], "u")
+
+    contents.down = True
+    sync._push_pending(("u", ENERGY))
+    status = sync.status()
+    assert status["failures"] == 1 and status["pending"] == 1 and status["next_retry"] is not None
+
+    sync.enqueue(ENERGY, [entry(1)], "u")
+    assert queued(queue_path) == ["e0", "e1"]  # The failed batch stays in front
+
+    contents.down = False
+    sync._push_pending(("u", ENERGY))
+    assert sync.status()["pending"] == 0 and sync.status()["failures"] == 0
+    assert queued(queue_path) == []
+    assert [e["ID"] for e in Journal(contents, remote_paths("u")[ENERGY]).load()] == ["e0", "e1"]
+
+
+def test_background_thread_pushes_and_flushes(tmp_path):
+    contents = LocalContents(str(tmp_path / "remote"))
+    sync = GitHubSync(contents, queue_path=str(tmp_path / "sync_queue.jsonl"), batch_window=0).start()
+    sync.enqueue(ENERGY, [entry(0)], "u")
+    assert sync.flush(timeout=10)
+    assert [e["ID"] for e in Journal(contents, remote_paths("u")[ENERGY]).load()] == ["e0"]
@@ -0,0 +1,50 @@
+import streamlit as st
+import tempfile
+from bulk import FORMATS, detect_format, export_entries, import_records, read_records
+from storage import ENERGY, SLEEP, TASKS
+
+DATASETS = {"Energy Logs": ENERGY, "Sleep Logs": SLEEP, "Tasks": TASKS}
+
+
+def import_export_page(storage):
+    """Bulk Import / Export page."""
+    st.title("📦 Import & Export")
+
+    # Import
+    st.subheader("1️⃣ Import from CSV or JSON Lines")
+    dataset = st.selectbox("Dataset", list(DATASETS), key="import_dataset")
+    uploaded = st.file_uploader("File", type=["csv", "jsonl", "ndjson", "json"], key="import_file")
+    if uploaded is not None and st.button("Import", key="run_import"):
+        kind = DATASETS[dataset]
+        status = st.empty()
+        report = import_records(
+            storage,
+            kind,
+            read_records(uploaded, detect_format(uploaded.name)),
+            progress=lambda r: status.write(f"⏳ {r.summary()}"),
+        )
+        status.empty()
+        st.success(f"✅ {report.summary()}")
+        for message in report.errors:
+            st.warning(message)
+
+    # Export
+    st.subheader("2️⃣ Export")
+    dataset = st.selectbox("Dataset", list(DATASETS), key="export_dataset")
+    fmt = st.radio("Format", FORMATS, horizontal=True, key="export_format")
+    st.caption("The download is built in memory; for very large datasets use `python bulk.py export`, which streams to disk.")
+    if st.button("Prepare Export", key="run_export"):
+        kind = DATASETS[dataset]
+        try:
+            # Written batch by batch, but the download button needs the whole file as bytes
+            with tempfile.TemporaryFile() as f:
+                count = export_entries(storage, kind, f, fmt)
+                f.seek(0)
+                st.download_button(
+                    f"⬇️ Download {count} entries",
+                    data=f.read(),
+                    file_name=f"{kind}.{fmt}",
+                    key="download_export",
+                )
+        except RuntimeError as e:
+            st.error(f"❌ {e}")
@@ -0,0 +1,40 @@
+import os
+import re
+
+USERS_DIR = "database/users"  # One <id>.txt per user, plus a data directory per user
+DEFAULT_USER = "1"            # Owner of the data logged before per-user partitioning
+LEGACY_DB_PATH = "database/energy.db"
+
+_USER_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def valid_user_id(user_id):
+    """True if `user_id` is safe to use in file paths."""
+    return bool(user_id) and _USER_ID.fullmatch(str(user_id)) is not None
+
+
+def list_users(users_dir=USERS_DIR):
+    """Return the IDs of the users registered in `users_dir`."""
+    try:
+        names = os.listdir(users_dir)
+    except FileNotFoundError:
+        return [DEFAULT_USER]
+    users = sorted(name[:-4] for name in names if name.endswith(".txt") and valid_user_id(name[:-4]))
+    return users or [DEFAULT_USER]
+
+
+def user_dir(user_id):
+    """Directory holding one user's data, locally and in the GitHub repository."""
+    if not valid_user_id(user_id):
+        raise ValueError(f"Invalid user ID: {user_id!r}")
+    return f"{USERS_DIR}/{user_id}"
+
+
+def user_db_path(user_id):
+    """Path of the user's own SQLite database, so writes for different users never share a lock."""
+    path = f"{user_dir(user_id)}/energy.db"
+    if user_id == DEFAULT_USER and not os.path.exists(path) and os.path.exists(LEGACY_DB_PATH):
+        # The single shared database predates partitioning; it belongs to the default user
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(LEGACY_DB_PATH, path)
+    return path
@@ -1,53 +1,30 @@
+import datetime
 import streamlit as st
-import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
+from analytics import energy_distribution, energy_heatmap, sleep_energy_correlation
+import metrics
+from cache import LRUCache
+from circadian import DEBT_WINDOW, CircadianModel
+from pagination import record_page
+from rollups import WEEK
+from schema import HIDDEN, START_MINUTE, WAKE_MINUTE
+from storage import ENTRY_ID, TASKS
 
-def view_logs_page(log_data, task_data, sleep_data):
-    """View Logs page with Plotly visualizations for Energy Levels, Activity Types, Task Weights, and Sleep Patterns."""
-    st.title("📊 Daily Energy Levels, Tasks, and Sleep Logs")
-
-    # Energy level mapping
-    energy_mapping = {
-        "Exhausted 😴": 1,
-        "Fatigued 😓": 2,
-        "Balanced 😐": 3,
-        "Energized 🚀": 4,
-        "Recharged 🌟": 5
-    }
-
-    # Convert data to DataFrames
-    energy_df = pd.DataFrame(log_data) if log_data else pd.DataFrame(columns=["Time Block", "Energy Level", "Activity Type", "Timestamp"])
-    task_df = pd.DataFrame(task_data) if task_data else pd.DataFrame(columns=["Task Type", "Task Length"])
-    sleep_df = pd.DataFrame(sleep_data) if sleep_data else pd.DataFrame(columns=["Sleep Start", "Wake Up", "Duration (hrs)", "Timestamp"])
-
-    # Ensure Timestamp column is datetime for energy and sleep logs
-    if not energy_df.empty:
-        energy_df["Timestamp"] = pd.to_datetime(energy_df["Timestamp"])
-    if not sleep_df.empty:
-        sleep_df["Timestamp"] = pd.to_datetime(sleep_df["Timestamp"])
-
-    # Filter energy logs by selected date
-    st.subheader("📅 Select a Date")
-    if not energy_df.empty:
-        available_dates = energy_df["Timestamp"].dt.date.unique()
-        selected_date = st.selectbox("Choose a date", available_dates, key="select_date")
+# Derived frames and figures, shared by all sessions and keyed on data version + date
+DAY_VIEW_CACHE = LRUCache(maxsize=64)
+TASK_FRAME_CACHE = LRUCache(maxsize=16)
+ANALYTICS_CACHE = LRUCache(maxsize=32)
+FORECAST_CACHE = LRUCache(maxsize=32)
+CIRCADIAN_MODELS = LRUCache(maxsize=32)  # (energy log uid, sleep log uid) -> model, updated in place as logs grow
+ANALYTICS_DAYS = 90  # Default Analytics range, ending at the last logged date
 
-        # Filter data for the selected date
-        day_energy_data = energy_df[energy_df["Timestamp"].dt.date == selected_date]
-        selected_sleep_data = sleep_df[sleep_df["Timestamp"].dt.date == selected_date]
-
-        if day_energy_data.empty:
-            st.info(f"No energy logs available for {selected_date}.")
-            return
-    else:
-        st.warning("⚠️ No energy logs available.")
-        return
 
-    # Map energy levels to numerical values and extract start hour
-    day_energy_data["Energy Numeric"] = day_energy_data["Energy Level"].map(energy_mapping)
-    day_energy_data["Start Hour"] = (
-        day_energy_data["Time Block"].str.split("–").str[0].str.split(" ").str[0].astype(int)
-    )
+def build_day_view(log_data, sleep_data, selected_date):
+    """Build the sorted energy frame, sleep frame and figure for one day."""
+    # Only the selected day's rows are materialized
+    day_energy_data = log_data.day_frame(selected_date).drop(columns=[ENTRY_ID])
+    selected_sleep_data = sleep_data.day_frame(selected_date).drop(columns=[ENTRY_ID])
 
     # Sort data by Start Hour (early to late)
     day_energy_data = day_energy_data.sort_values(by="Start Hour")
@@ -69,16 +46,26 @@ def view_logs_page(log_data, task_data, sleep_data):
                       "<b>Activity:</b> %{text}<extra></extra>"
     ))
 
-    # Add sleep data
-    if not selected_sleep_data.empty:
-        fig.add_trace(go.Scatter(
-            x=[8],  # Replace with a meaningful sleep timeline, if available
-            y=selected_sleep_data["Duration (hrs)"],
-            mode="markers",
-            name="Sleep Duration",
-            marker=dict(color="rgba(255,99,132,1)", size=12),
-            hovertemplate="<b>Duration:</b> %{y} hrs<extra></extra>"
-        ))
+    # Add last night's sleep as a span from bedtime to wake-up, bedtimes before midnight shown as negative hours
+    sleep_rows = sleep_data.rows_on(selected_date)
+    if len(sleep_rows):
+        start = sleep_data.column(START_MINUTE)[sleep_rows] / 60
+        wake = sleep_data.column(WAKE_MINUTE)[sleep_rows] / 60
+        duration = sleep_data.column("Duration (hrs)")[sleep_rows]
+        start = np.where(start > wake, start - 24, start)
+        for bedtime, wake_hour, hours in zip(start, wake, duration):
+            if np.isnan(bedtime) or np.isnan(wake_hour):
+                continue
+            fig.add_trace(go.Scatter(
+                x=[bedtime, wake_hour],
+                y=[hours, hours],
+                mode="lines+markers",
+                name="Sleep",
+                line=dict(color="rgba(255,99,132,1)", width=6),
+                marker=dict(size=8),
+                hovertemplate=f"<b>Slept:</b> {_clock(bedtime)}–{_clock(wake_hour)}<br>" +
+                              "<b>Duration:</b> %{y} hrs<extra></extra>"
+            ))
 
     # Customize layout
     fig.update_layout(
@@ -90,6 +77,257 @@ def view_logs_page(log_data, task_data, sleep_data):
         template="plotly_white"
     )
 
+    return day_energy_data, selected_sleep_data, fig
+
+
+def _clock(hour):
+    minutes = round(hour % 24 * 60)
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+
+def day_view(log_data, sleep_data, selected_date):
+    """Memoized build_day_view; reruns that do not change data or date reuse the result."""
+    key = (log_data.cache_key(), sleep_data.cache_key(), selected_date)
+    return DAY_VIEW_CACHE.get_or_compute(key, lambda: _timed("day", build_day_view, log_data, sleep_data, selected_date))
+
+
+def _timed(view, build, *args):
+    # Only cache misses reach here, so the histogram shows real frame and figure build costs
+    with metrics.span("view_build", view=view):
+        return build(*args)
+
+
+def task_frame(task_data):
+    """Memoized task table without the entry IDs."""
+    return TASK_FRAME_CACHE.get_or_compute(
+        task_data.cache_key(), lambda: task_data.to_frame().drop(columns=[ENTRY_ID])
+    )
+
+
+def analytics(log_data, sleep_data, start, end, group_by):
+    """Memoized build_analytics, shared by every session showing the same data and range."""
+    key = (log_data.cache_key(), sleep_data.cache_key(), start, end, group_by)
+    return ANALYTICS_CACHE.get_or_compute(
+        key, lambda: _timed("analytics", build_analytics, log_data, sleep_data, start, end, group_by)
+    )
+
+
+def forecast(log_data, sleep_data):
+    """Memoized build_forecast; the model underneath only folds in entries added since its last fit."""
+    key = (log_data.cache_key(), sleep_data.cache_key())
+    return FORECAST_CACHE.get_or_compute(key, lambda: _timed("forecast", build_forecast, log_data, sleep_data))
+
+
+def build_forecast(log_data, sleep_data):
+    """Return (date, figure, current sleep debt, sleep midpoint spread) for the next day's energy forecast."""
+    model = CIRCADIAN_MODELS.get_or_compute((log_data.uid, sleep_data.uid), CircadianModel)
+    date, predicted, debt, spread = model.summary(log_data, sleep_data)
+
+    fig = go.Figure(go.Scatter(
+        x=model.start_hours(),
+        y=predicted,
+        mode="lines+markers",
+        name="Predicted Energy",
+        line=dict(color="rgba(38,198,218,1)", width=2, dash="dash"),
+        text=model.blocks,
+        hovertemplate="<b>%{text}</b><br><b>Predicted Energy:</b> %{y:.1f}<extra></extra>"
+    ))
+    fig.update_layout(
+        title=f"Predicted Energy for {date}" if date else "Predicted Energy",
+        xaxis_title="Hour of the Day",
+        yaxis_title="Energy Level (1-5)",
+        xaxis=dict(tickmode="linear", dtick=1),
+        yaxis=dict(range=[1, 5]),
+        height=350,
+        template="plotly_white"
+    )
+    return date, fig, (debt[-1] if len(debt) else None), (spread[-1] if len(spread) else None)
+
+
+def default_range(dates):
+    """The Analytics date range shown before the user picks one: the last 90 days with entries."""
+    return max(dates[0], dates[-1] - datetime.timedelta(days=ANALYTICS_DAYS)), dates[-1]
+
+
+def warm_caches(log_data, task_data, sleep_data):
+    """Build what the View page shows first, so the next visit renders from the caches."""
+    dates = log_data.dates()
+    if dates:
+        day_view(log_data, sleep_data, dates[0])  # The date picker starts on the first date
+        analytics(log_data, sleep_data, *default_range(dates), "Activity Type")
+        forecast(log_data, sleep_data)
+    task_frame(task_data)
+
+
+def build_analytics(log_data, sleep_data, start, end, group_by):
+    """Build the multi-day analytics figures for a date range."""
+    heatmap = energy_heatmap(log_data, start, end)
+    heatmap_fig = go.Figure(go.Heatmap(
+        z=heatmap.values,
+        x=heatmap.columns,
+        y=heatmap.index,
+        zmin=1,
+        zmax=5,
+        colorscale="Teal",
+        hovertemplate="<b>%{y}, %{x}</b><br><b>Mean Energy:</b> %{z:.2f}<extra></extra>"
+    ))
+    heatmap_fig.update_layout(
+        title="Mean Energy by Weekday and Time Block",
+        yaxis=dict(autorange="reversed"),
+        height=400,
+        template="plotly_white"
+    )
+
+    distribution = energy_distribution(log_data, by=group_by, start=start, end=end)
+    levels = [column for column in distribution.columns if column not in ("Entries", "Mean Energy")]
+    distribution_fig = go.Figure([
+        go.Bar(
+            y=distribution.index,
+            x=distribution[level],
+            name=level,
+            orientation="h",
+            hovertemplate="<b>%{y}</b><br><b>Share:</b> %{x:.0%}<extra></extra>"
+        )
+        for level in levels
+    ])
+    distribution_fig.update_layout(
+        title=f"Energy Distribution per {group_by}",
+        barmode="stack",
+        xaxis=dict(tickformat=".0%"),
+        yaxis=dict(autorange="reversed"),
+        height=max(300, 28 * len(distribution) + 120),
+        template="plotly_white"
+    )
+
+    pairs, r = sleep_energy_correlation(log_data, sleep_data, start, end)
+    sleep_fig = go.Figure(go.Scatter(
+        x=pairs["Sleep (hrs)"],
+        y=pairs["Mean Energy"],
+        mode="markers",
+        marker=dict(color="rgba(255,99,132,1)", size=9),
+        text=pairs.index.strftime("%Y-%m-%d"),
+        hovertemplate="<b>%{text}</b><br><b>Sleep:</b> %{x} hrs<br><b>Mean Energy:</b> %{y:.2f}<extra></extra>"
+    ))
+    sleep_fig.update_layout(
+        title="Daily Mean Energy vs. Previous Night's Sleep",
+        xaxis_title="Sleep Duration (hrs)",
+        yaxis_title="Mean Energy (1-5)",
+        height=400,
+        template="plotly_white"
+    )
+    return heatmap_fig, distribution, distribution_fig, sleep_fig, r, len(pairs)
+
+
+def weekly_trends_figure(weekly):
+    """Weekly mean energy and total sleep from the precomputed rollups."""
+    weeks = [row["bucket"] for row in weekly]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=weeks,
+        y=[row["mean_energy"] for row in weekly],
+        mode="lines+markers",
+        name="Mean Energy",
+        line=dict(color="rgba(38,198,218,1)", width=2),
+        hovertemplate="<b>%{x}</b><br><b>Mean Energy:</b> %{y:.2f}<extra></extra>"
+    ))
+    fig.add_trace(go.Bar(
+        x=weeks,
+        y=[row["sleep_hours"] for row in weekly],
+        name="Sleep (hrs)",
+        yaxis="y2",
+        marker=dict(color="rgba(255,99,132,0.4)"),
+        hovertemplate="<b>%{x}</b><br><b>Sleep:</b> %{y:.1f} hrs<extra></extra>"
+    ))
+    fig.update_layout(
+        title="Weekly Trends",
+        yaxis=dict(title="Mean Energy (1-5)", range=[1, 5]),
+        yaxis2=dict(title="Sleep (hrs)", overlaying="y", side="right"),
+        height=400,
+        template="plotly_white"
+    )
+    return fig
+
+
+def analytics_view(log_data, sleep_data, storage=None):
+    """Analytics mode: heatmaps, distributions and sleep correlation over a date range."""
+    dates = log_data.dates()
+    if not dates:
+        st.warning("⚠️ No energy logs available.")
+        return
+    selected = st.date_input(
+        "Date range", value=default_range(dates), min_value=dates[0], max_value=dates[-1], key="analytics_range"
+    )
+    if not isinstance(selected, tuple) or len(selected) != 2:
+        st.info("Pick an end date to complete the range.")
+        return
+    start, end = selected
+    group_by = st.radio("Group energy distribution by", ["Activity Type", "Category"], horizontal=True)
+
+    heatmap_fig, distribution, distribution_fig, sleep_fig, r, days = analytics(
+        log_data, sleep_data, start, end, group_by
+    )
+
+    st.plotly_chart(heatmap_fig, use_container_width=True)
+    st.plotly_chart(distribution_fig, use_container_width=True)
+    st.dataframe(distribution[["Entries", "Mean Energy"]])
+    st.plotly_chart(sleep_fig, use_container_width=True)
+    if days >= 3:
+        st.write(f"📈 Correlation between sleep and next-day energy over {days} days: **r = {r:.2f}**")
+    else:
+        st.info("Log sleep and energy on at least three days in this range to see a correlation.")
+
+    # Fit on the full history, whatever the selected range
+    st.subheader("🔮 Tomorrow")
+    _, forecast_fig, debt, spread = forecast(log_data, sleep_data)
+    st.plotly_chart(forecast_fig, use_container_width=True)
+    notes = []
+    if debt is not None:
+        notes.append(f"sleep debt over the last {DEBT_WINDOW} nights: {debt:+.1f} hrs")
+    if spread is not None and not np.isnan(spread):
+        notes.append(f"sleep midpoint varied by ±{spread:.0f} min over the last week")
+    if notes:
+        st.caption("Based on your history; " + ", ".join(notes) + ".")
+
+    if storage is not None:
+        year, week, _ = (datetime.date.today() - datetime.timedelta(days=7)).isocalendar()
+        summary = storage.load_summary(WEEK, f"{year}-W{week:02d}")  # Computed by the scheduler
+        if summary and summary["mean_energy"] is not None:
+            st.caption(
+                f"Last week: mean energy {summary['mean_energy']:.2f} over {summary['entries']} entries, "
+                f"{summary['sleep_hours']:.1f} hrs of sleep logged; best time block {summary['best_time_block']}"
+            )
+        # Reads one summary row per week instead of re-aggregating raw entries
+        start_week, end_week = (f"{y}-W{w:02d}" for y, w, _ in (start.isocalendar(), end.isocalendar()))
+        weekly = storage.load_rollups(WEEK, start=start_week, end=end_week)
+        if weekly:
+            st.plotly_chart(weekly_trends_figure(weekly), use_container_width=True)
+
+
+def view_logs_page(log_data, task_data, sleep_data, storage=None):
+    """View Logs page with Plotly visualizations for Energy Levels, Activity Types, Task Weights, and Sleep Patterns."""
+    st.title("📊 Daily Energy Levels, Tasks, and Sleep Logs")
+
+    mode = st.radio("View", ["Daily", "Analytics"], horizontal=True, key="view_mode")
+    if mode == "Analytics":
+        analytics_view(log_data, sleep_data, storage)
+        return
+
+    # Filter energy logs by selected date
+    st.subheader("📅 Select a Date")
+    if len(log_data):
+        # The per-date index is built once per log and extended on append
+        available_dates = log_data.dates()
+        selected_date = st.selectbox("Choose a date", available_dates, key="select_date")
+
+        day_energy_data, selected_sleep_data, fig = day_view(log_data, sleep_data, selected_date)
+
+        if day_energy_data.empty:
+            st.info(f"No energy logs available for {selected_date}.")
+            return
+    else:
+        st.warning("⚠️ No energy logs available.")
+        return
+
     # Render Plotly chart
     st.plotly_chart(fig, use_container_width=True)
 
@@ -102,10 +340,14 @@ def view_logs_page(log_data, task_data, sleep_data):
 
     # Display Task Logs
     st.write("**Task Logs**")
-    if not task_df.empty:
-        st.dataframe(task_df)
-    else:
+    if not len(task_data):
         st.info("No task logs recorded.")
+    elif storage is not None:
+        # Only the visible page of the task history is sent to the browser
+        tasks, _, _ = record_page(storage, TASKS, "view_tasks", filter_keys=["Task Type"])
+        st.dataframe([{k: v for k, v in task.items() if k != ENTRY_ID and k not in HIDDEN} for task in tasks])
+    else:
+        st.dataframe(task_frame(task_data))
 
     # Display Sleep Logs
     st.write("**Sleep Logs**")
@@ -0,0 +1,70 @@
+# vocabulary.py
+
+def get_time_blocks():
+    """
+    Returns the time blocks an energy entry can be logged for, earliest first.
+    """
+    return ["6–8 AM", "8–10 AM", "10–12 PM", "12–2 PM", "2–4 PM", "4–6 PM", "6–8 PM"]
+
+
+def get_time_block_hours():
+    """
+    Returns a dictionary mapping each time block to its (start, end) hour on a 24-hour clock.
+    """
+    return {
+        "6–8 AM": (6, 8),
+        "8–10 AM": (8, 10),
+        "10–12 PM": (10, 12),
+        "12–2 PM": (12, 14),
+        "2–4 PM": (14, 16),
+        "4–6 PM": (16, 18),
+        "6–8 PM": (18, 20),
+    }
+
+
+def get_energy_levels():
+    """
+    Returns the energy levels from lowest to highest.
+    """
+    return [
+        "Exhausted 😴",  # Low energy, feeling drained
+        "Fatigued 😓",   # Slightly higher than exhausted
+        "Balanced 😐",   # Neutral energy, steady state
+        "Energized 🚀",  # Positive, ready to work
+        "Recharged 🌟",  # Fully refreshed and motivated
+    ]
+
+
+def get_energy_mapping():
+    """
+    Returns a dictionary mapping each energy level to its score (1-5).
+    """
+    return {level: score for score, level in enumerate(get_energy_levels(), start=1)}
+
+
+def get_sleep_start_times():
+    """
+    Returns the selectable bedtimes, from evening to early morning.
+    """
+    return [f"{hour:02d}:00" for hour in range(18, 24)] + [f"{hour:02d}:00" for hour in range(0, 7)]
+
+
+def get_wake_up_times():
+    """
+    Returns the selectable wake-up times.
+    """
+    return [f"{hour:02d}:00" for hour in range(4, 12)]
+
+
+def get_task_types():
+    """
+    Returns the task types a task can be logged as.
+    """
+    return ["Data Processing", "Writing", "Analysis", "Meeting", "Coding", "Design"]
+
+
+def get_task_lengths():
+    """
+    Returns the task lengths from longest to shortest.
+    """
+    return ["Full Day Task", "Half Day Task", "Few Hours Task", "Less than 1 Hour"]